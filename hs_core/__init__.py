@@ -0,0 +1,74 @@
+"""
+Núcleo de análise do Football Studio Pro Analyzer, sem dependência de interface.
+
+Os analisadores, os padrões de patterns.txt, o gerador de sugestões e o motor incremental são
+carregados na importação do pacote; os módulos mais pesados (backend NumPy, backtest, varredura,
+simulação, persistência, importação, registro de mesas, ingestão e exportação) só são importados
+quando um de seus nomes é acessado pela primeira vez.
+"""
+import importlib
+
+from .analysis import (ANALYSIS_BACKENDS, analyze_break_probability, analyze_colors, analyze_draw_specifics,
+                       analyze_history_matches, analyze_surf, analyze_transitions, analyze_windows,
+                       check_guarantee_status, find_complex_patterns, generate_advanced_suggestion, update_analysis)
+from .config import (DASHBOARD_COLUMNS, DASHBOARD_RECENT_RESULTS, DEFAULT_CONFIG, EMOJIS_PER_ROW,
+                     MAX_HISTORY_TO_STORE, MIN_RESULTS_FOR_SUGGESTION, NUM_HISTORY_TO_DISPLAY,
+                     NUM_RECENT_RESULTS_FOR_ANALYSIS, AnalysisConfig, get_color, get_color_emoji, get_result_emoji)
+from .engine import IncrementalAnalyzer
+from .history import RESULT_CODES, RESULT_TYPES, HistoryView, ResultHistory, encode_history
+from .instrumentation import METRICS, instrumented, start_metrics_server, timed
+from .ledger import GuaranteeLedger
+from .patterns import (BREAK_PATTERNS, DRAW_PATTERNS, PatternKey, PatternSet, PatternSyntaxError, format_pattern,
+                       load_patterns, parse_patterns)
+from .runs import RunLengthEncoding
+from .suffix_index import SuffixIndex
+from .transitions import TransitionModel
+from .windows import WindowCounts
+
+_LAZY_ATTRIBUTES = {
+    'run_backtest': 'backtest',
+    'run_parameter_sweep': 'sweep',
+    'run_simulation': 'simulation',
+    'open_history_store': 'storage',
+    'MemoryHistoryStore': 'storage',
+    'BinaryLogHistoryStore': 'storage',
+    'SQLiteHistoryStore': 'storage',
+    'list_history_tables': 'storage',
+    'TableRegistry': 'tables',
+    'TableState': 'tables',
+    'IngestService': 'ingest',
+    'start_ingest_server': 'ingest',
+    'SnapshotExporter': 'export',
+    'parse_results': 'importer',
+    'import_results': 'importer',
+    'ImportFormatError': 'importer',
+    'results_to_codes': 'vectorized',
+    'analyze_surf_np': 'vectorized',
+    'analyze_colors_np': 'vectorized',
+    'find_complex_patterns_np': 'vectorized',
+    'analyze_break_probability_np': 'vectorized',
+    'analyze_draw_specifics_np': 'vectorized',
+}
+
+__all__ = [
+    'ANALYSIS_BACKENDS', 'BREAK_PATTERNS', 'DASHBOARD_COLUMNS', 'DASHBOARD_RECENT_RESULTS', 'DEFAULT_CONFIG',
+    'DRAW_PATTERNS', 'EMOJIS_PER_ROW', 'MAX_HISTORY_TO_STORE', 'MIN_RESULTS_FOR_SUGGESTION',
+    'NUM_HISTORY_TO_DISPLAY', 'NUM_RECENT_RESULTS_FOR_ANALYSIS', 'RESULT_CODES', 'RESULT_TYPES', 'AnalysisConfig',
+    'METRICS', 'GuaranteeLedger', 'HistoryView', 'IncrementalAnalyzer', 'PatternKey', 'PatternSet',
+    'PatternSyntaxError', 'ResultHistory', 'RunLengthEncoding', 'SuffixIndex', 'TransitionModel', 'WindowCounts',
+    'analyze_break_probability', 'analyze_colors', 'analyze_draw_specifics', 'analyze_history_matches',
+    'analyze_surf', 'analyze_transitions', 'analyze_windows', 'check_guarantee_status', 'encode_history',
+    'find_complex_patterns', 'format_pattern', 'generate_advanced_suggestion', 'get_color', 'get_color_emoji',
+    'get_result_emoji', 'instrumented', 'load_patterns', 'parse_patterns', 'start_metrics_server', 'timed',
+    'update_analysis',
+    *_LAZY_ATTRIBUTES,
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,598 @@
+"""Analisadores do histórico, gerador de sugestões e verificação de garantia."""
+import collections
+import itertools
+import operator
+
+from .config import DEFAULT_CONFIG, NUM_RECENT_RESULTS_FOR_ANALYSIS, get_color, get_color_emoji, optional_numpy
+from .history import RESULT_CODES, RESULT_TYPES, ResultHistory, encode_history
+from .instrumentation import METRICS, instrumented
+from .patterns import BREAK_PATTERNS, COLORS, DRAW_PATTERNS, PatternKey
+from .transitions import TransitionModel
+from .windows import WindowCounts
+
+CODE_LETTERS = tuple(get_color(result)[0].upper() for result in RESULT_TYPES) # Letra de `color_pattern_27` por código
+
+def _history_runs(results):
+    """Codificação por sequências mantida pelo histórico, se `results` for um ResultHistory; senão None."""
+    return results.runs if isinstance(results, ResultHistory) else None
+
+@instrumented('analysis.analyze_surf')
+def analyze_surf(results, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """
+    Analisa os padrões de "surf" (sequências de Home/Away/Draw)
+    nos últimos N resultados para 'current' e no histórico completo para 'max'.
+    Em um ResultHistory, lê as sequências e os máximos já mantidos por ele, em O(1).
+    """
+    runs = _history_runs(results)
+    if runs is not None:
+        current = dict.fromkeys(RESULT_TYPES, 0)
+        if runs and window > 0:
+            code, size = runs.newest
+            current[RESULT_TYPES[code]] = min(size, window)
+        return {
+            'home_sequence': current['home'],
+            'away_sequence': current['away'],
+            'draw_sequence': current['draw'],
+            'max_home_sequence': runs.max_run(RESULT_CODES['home']),
+            'max_away_sequence': runs.max_run(RESULT_CODES['away']),
+            'max_draw_sequence': runs.max_run(RESULT_CODES['draw'])
+        }
+
+    relevant_results = results[:window]
+    
+    current_home_sequence = 0
+    current_away_sequence = 0
+    current_draw_sequence = 0
+    
+    if relevant_results:
+        # A sequência atual é sempre do resultado mais recente (results[0])
+        first_result_current_analysis = relevant_results[0]
+        for r in relevant_results:
+            if r == first_result_current_analysis:
+                if first_result_current_analysis == 'home': 
+                    current_home_sequence += 1
+                elif first_result_current_analysis == 'away': 
+                    current_away_sequence += 1
+                else: # draw
+                    current_draw_sequence += 1
+            else:
+                break
+    
+    # Calcular sequências máximas em todo o histórico disponível para maior precisão
+    max_home_sequence = 0
+    max_away_sequence = 0
+    max_draw_sequence = 0
+    
+    temp_home_seq = 0
+    temp_away_seq = 0
+    temp_draw_seq = 0
+
+    for res in results: # Percorre TODOS os resultados (histórico completo) para o máximo
+        if res == 'home':
+            temp_home_seq += 1
+            temp_away_seq = 0
+            temp_draw_seq = 0
+        elif res == 'away':
+            temp_away_seq += 1
+            temp_home_seq = 0
+            temp_draw_seq = 0
+        else: # draw
+            temp_draw_seq += 1
+            temp_home_seq = 0
+            temp_away_seq = 0
+        
+        max_home_sequence = max(max_home_sequence, temp_home_seq)
+        max_away_sequence = max(max_away_sequence, temp_away_seq)
+        max_draw_sequence = max(max_draw_sequence, temp_draw_seq)
+
+    return {
+        'home_sequence': current_home_sequence,
+        'away_sequence': current_away_sequence,
+        'draw_sequence': current_draw_sequence,
+        'max_home_sequence': max_home_sequence,
+        'max_away_sequence': max_away_sequence,
+        'max_draw_sequence': max_draw_sequence
+    }
+
+@instrumented('analysis.analyze_colors')
+def analyze_colors(results, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """
+    Analisa a contagem e as sequências de cores nos últimos N resultados.
+    Em um ResultHistory, a sequência atual e o padrão de cores vêm das sequências do histórico.
+    """
+    relevant_results = results[:window]
+    if not relevant_results:
+        return {'red': 0, 'blue': 0, 'yellow': 0, 'current_color': '', 'streak': 0, 'color_pattern_27': ''}
+
+    runs = _history_runs(results)
+    if runs is not None:
+        color_counts = {get_color(result): relevant_results.count(result) for result in RESULT_TYPES}
+        return {
+            'red': color_counts['red'],
+            'blue': color_counts['blue'],
+            'yellow': color_counts['yellow'],
+            'current_color': get_color(RESULT_TYPES[runs.newest[0]]),
+            'streak': runs.newest[1],
+            'color_pattern_27': ''.join(CODE_LETTERS[code] * size for code, size in runs.newest_first(window))
+        }
+
+    color_counts = {'red': 0, 'blue': 0, 'yellow': 0}
+
+    for result in relevant_results:
+        color = get_color(result)
+        color_counts[color] += 1
+
+    current_color = get_color(results[0]) if results else ''
+    streak = 0
+    for result in results: # Streak é sempre do resultado mais recente no histórico completo
+        if get_color(result) == current_color:
+            streak += 1
+        else:
+            break
+            
+    color_pattern_27 = ''.join([get_color(r)[0].upper() for r in relevant_results])
+
+    return {
+        'red': color_counts['red'],
+        'blue': color_counts['blue'],
+        'yellow': color_counts['yellow'],
+        'current_color': current_color,
+        'streak': streak,
+        'color_pattern_27': color_pattern_27
+    }
+
+@instrumented('analysis.find_complex_patterns')
+def find_complex_patterns(results, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """
+    Identifica padrões de quebra e padrões específicos (2x2, 3x3, 3x1, 2x1, etc.) nos últimos N resultados.
+    Os padrões são os da seção [quebras] de patterns.txt, contados pelo autômato em uma única passada.
+    """
+    return BREAK_PATTERNS.count_results(results[:window])
+
+@instrumented('analysis.analyze_break_probability')
+def analyze_break_probability(results, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """
+    Analisa a probabilidade de quebra com base no histórico dos últimos N resultados.
+    Em um ResultHistory, cada quebra é a fronteira entre duas sequências da janela.
+    """
+    relevant_results = results[:window]
+    if not relevant_results or len(relevant_results) < 2:
+        return {'break_chance': 0, 'last_break_type': ''}
+
+    runs = _history_runs(results)
+    if runs is not None:
+        breaks = sum(1 for _ in runs.newest_first(window)) - 1
+        last_break_type = ""
+        if runs.newest[1] == 1: # A janela tem ao menos dois resultados, então há uma sequência anterior
+            (newest, _), (previous, _) = itertools.islice(runs.newest_first(), 2)
+            previous, newest = get_color(RESULT_TYPES[previous]), get_color(RESULT_TYPES[newest])
+            last_break_type = f"Quebrou de {previous.capitalize()} para {newest.capitalize()}"
+        return {
+            'break_chance': round(breaks / (len(relevant_results) - 1) * 100, 2),
+            'last_break_type': last_break_type
+        }
+    
+    breaks = 0
+    total_sequences_considered = 0
+    
+    for i in range(len(relevant_results) - 1):
+        if get_color(relevant_results[i]) != get_color(relevant_results[i+1]):
+            breaks += 1
+        total_sequences_considered += 1
+            
+    break_chance = (breaks / total_sequences_considered) * 100 if total_sequences_considered > 0 else 0
+
+    last_break_type = ""
+    if len(results) >= 2 and get_color(results[0]) != get_color(results[1]):
+        last_break_type = f"Quebrou de {get_color(results[1]).capitalize()} para {get_color(results[0]).capitalize()}"
+    
+    return {
+        'break_chance': round(break_chance, 2),
+        'last_break_type': last_break_type
+    }
+
+@instrumented('analysis.analyze_transitions')
+def analyze_transitions(results, order=DEFAULT_CONFIG.markov_order, min_support=DEFAULT_CONFIG.markov_min_support):
+    """
+    Estima P(próximo resultado | últimos j resultados) com contagens de transição de ordem 0 a `order`
+    sobre o histórico completo, usando a maior ordem cujo contexto atual tenha `min_support` ocorrências.
+    """
+    return TransitionModel.from_codes(encode_history(results), order).analyze(min_support)
+
+@instrumented('analysis.analyze_history_matches')
+def analyze_history_matches(results, max_context=DEFAULT_CONFIG.suffix_max_context):
+    """
+    Procura no histórico completo as ocorrências anteriores da sequência atual (os últimos m resultados,
+    m até `max_context`) e conta o que saiu depois de cada uma. Varredura linear do histórico; o
+    IncrementalAnalyzer obtém o mesmo resultado de um SuffixIndex atualizado a cada resultado.
+    Com NumPy, os fins candidatos são filtrados em bloco, um comprimento por vez.
+    """
+    codes = encode_history(results)
+    last = len(codes) - 1
+    rows = [] # Por comprimento: [ocorrências, próximos (home, away, draw), fim da ocorrência mais recente]
+    np = optional_numpy()
+    if np is not None and last >= 64:
+        array = np.frombuffer(codes, dtype=np.uint8)
+        ends = np.arange(last) # Fins (anteriores ao último) das ocorrências dos últimos m resultados
+        for length in range(max_context):
+            ends = ends[ends >= length]
+            ends = ends[array[ends - length] == codes[last - length]]
+            if not len(ends):
+                break
+            rows.append([len(ends), *np.bincount(array[ends + 1], minlength=3).tolist(), int(ends[-1])])
+    else:
+        for end in range(last - 1, -1, -1): # Da ocorrência mais recente para a mais antiga
+            size = 0
+            while size < max_context and size <= end and codes[end - size] == codes[last - size]:
+                size += 1
+            for length in range(size):
+                if length == len(rows):
+                    rows.append([0, 0, 0, 0, end])
+                rows[length][0] += 1
+                rows[length][1 + codes[end + 1]] += 1
+    if not rows:
+        return {'length': 0, 'context': '', 'occurrences': 0, 'next': dict.fromkeys(RESULT_TYPES, 0), 'last_seen': -1, 'by_length': []}
+    occurrences, *following, end = rows[-1]
+    return {
+        'length': len(rows),
+        'context': ''.join(get_color(RESULT_TYPES[code])[0].upper() for code in codes[last : last - len(rows) : -1]),
+        'occurrences': occurrences,
+        'next': dict(zip(RESULT_TYPES, following)),
+        'last_seen': last - end,
+        'by_length': [{'length': length, 'occurrences': row[0], **dict(zip(RESULT_TYPES, row[1:4]))} for length, row in enumerate(rows, 1)],
+    }
+
+@instrumented('analysis.analyze_windows')
+def analyze_windows(results, windows=DEFAULT_CONFIG.analysis_windows):
+    """
+    Contagens, chance de quebra, frequência de empate e padrões de [quebras] de várias janelas
+    (os últimos w resultados, para cada w em `windows`) em uma única passada pela maior delas.
+    Retorna {w: {'stats', 'break_chance', 'draw_frequency', 'break_patterns'}}.
+    """
+    largest = max(windows, default=0)
+    return WindowCounts.from_codes(encode_history(results[:largest]), largest).query(windows)
+
+@instrumented('analysis.analyze_draw_specifics')
+def analyze_draw_specifics(results, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """Análise específica para empates nos últimos N resultados e padrões de recorrência."""
+    relevant_results = results[:window]
+    if not relevant_results:
+        return {'draw_frequency_27': 0, 'time_since_last_draw': -1, 'draw_patterns': {}, 'recurrent_draw': False}
+
+    draw_count_27 = relevant_results.count('draw')
+    draw_frequency_27 = (draw_count_27 / len(relevant_results)) * 100 if len(relevant_results) > 0 else 0
+
+    time_since_last_draw = -1
+    for i, result in enumerate(results): # Tempo desde o último empate no histórico COMPLETO
+        if result == 'draw':
+            time_since_last_draw = i
+            break
+    
+    draw_patterns_found = DRAW_PATTERNS.count_results(relevant_results) # Seção [empates] de patterns.txt
+
+    # Detecção de Empate Recorrente (intervalos curtos)
+    draw_indices = [i for i, r in enumerate(relevant_results) if r == 'draw']
+    recurrent_draw = False
+    if len(draw_indices) >= 2:
+        for i in range(len(draw_indices) - 1):
+            interval = draw_indices[i] - draw_indices[i+1] -1
+            if 0 <= interval <= 3: # Empates em até 3 rodadas de distância
+                recurrent_draw = True
+                break
+
+    return {
+        'draw_frequency_27': round(draw_frequency_27, 2),
+        'time_since_last_draw': time_since_last_draw,
+        'draw_patterns': draw_patterns_found,
+        'recurrent_draw': recurrent_draw
+    }
+
+# --- Regras de Sugestão por Padrão ---
+
+COLOR_BETS = {'red': 'home', 'blue': 'away', 'yellow': 'draw'}
+RESULT_LABELS = {'home': 'Casa', 'away': 'Visitante', 'draw': 'Empate'}
+TAIL_RUN_CAP = 4 # Para as regras, sequências atuais de 4 ou mais são equivalentes
+RED_BLUE_DRAW = PatternKey('red_blue_draw')
+BLUE_RED_DRAW = PatternKey('blue_red_draw')
+
+def _run_break(run, at_least=False):
+    """Padrão de X para Y (só Vermelho/Azul) com a sequência atual de X igual a `run` (ou maior, se `at_least`): aposta em Y."""
+    def condition(colors, current, streak, previous):
+        first, second = colors
+        if {first, second} == {'red', 'blue'} and current == first and (streak >= run if at_least else streak == run):
+            return second
+    return condition
+
+def _block_reversal(colors, current, streak, previous):
+    """Blocos alternados de X e Y: com o bloco atual em andamento, espera-se a reversão para a outra cor."""
+    first, second = colors
+    if streak >= 2:
+        if current == first and second != 'yellow':
+            return second
+        if current == second and first != 'yellow':
+            return first
+
+def _zigzag(colors, current, streak, previous):
+    """X-Y-X (só Vermelho/Azul): se acabou de sair X depois de Y, espera-se Y."""
+    first, second = colors
+    if {first, second} == {'red', 'blue'} and current == first and streak == 1 and previous == second:
+        return second
+
+def _mirror(colors, current, streak, previous):
+    """X-Y-Y-X: com Y Y depois de X, espera-se o fechamento do espelho com X (nunca empate)."""
+    first, second = colors
+    if first != 'yellow' and current == second and streak == 2 and previous == first:
+        return first
+
+# (famílias de patterns.txt, condição, peso em AnalysisConfig, motivo). A condição recebe as cores do
+# padrão e o estado do fim do histórico (cor atual, sequência atual, cor anterior à sequência) e
+# retorna a cor apostada, ou None.
+SUGGESTION_RULES = (
+    (('2x1',), _run_break(2), 'weight_2x1', "Padrão '{name}' altamente recorrente ({count}x)."),
+    (('3x1',), _run_break(3), 'weight_3x1', "Padrão '{name}' altamente recorrente ({count}x)."),
+    (('2x2',), _run_break(2, at_least=True), 'weight_2x2', "Padrão '{name}' recorrente ({count}x)."),
+    (('3x3',), _run_break(3, at_least=True), 'weight_3x3', "Padrão '{name}' altamente recorrente ({count}x)."),
+    (('bloco_alternado_2x2', 'bloco_alternado_3x3'), _block_reversal, 'weight_block_reversal',
+     "Padrão '{name}' altamente recorrente ({count}x). Espera-se a reversão para {target}."),
+    (('zigzag',), _zigzag, 'weight_zigzag', "Padrão '{name}' recorrente ({count}x). Espera-se o próximo alternado."),
+    (('espelho',), _mirror, 'weight_mirror', "Padrão '{name}' recorrente ({count}x). Espera-se o fechamento do espelho com {target}."),
+)
+
+def compile_rule_table(rules=SUGGESTION_RULES):
+    """
+    Avalia as regras para todo estado possível do fim do histórico e todo par de cores de padrão.
+    Retorna {(cor atual, sequência limitada a TAIL_RUN_CAP, cor anterior): ((PatternKey, aposta, cor, peso, motivo), ...)}.
+    """
+    table = collections.defaultdict(list)
+    for tail in itertools.product(COLORS, range(1, TAIL_RUN_CAP + 1), COLORS + (None,)):
+        for families, condition, weight, reason in rules:
+            for family in families:
+                for colors in itertools.permutations(COLORS, 2):
+                    target = condition(colors, *tail)
+                    if target:
+                        table[tail].append((PatternKey(family, colors), COLOR_BETS[target], target, weight, reason))
+    return {tail: tuple(entries) for tail, entries in table.items()}
+
+SUGGESTION_RULE_TABLE = compile_rule_table()
+
+def _render_reason(reason):
+    if isinstance(reason, str):
+        return reason
+    template, key, count, target_color = reason
+    return template.format(name=str(key).split('(')[0].strip(), count=count, target=target_color.capitalize())
+
+@instrumented('suggestion.generate')
+def generate_advanced_suggestion(results, surf_analysis, color_analysis, break_patterns, break_probability, draw_specifics, config=DEFAULT_CONFIG, transitions=None, history_matches=None, ledger=None):
+    """
+    Gera uma sugestão de aposta baseada em múltiplas análises usando um sistema de pontuação,
+    com foco em segurança e incorporando os novos padrões. Prioriza sugestões mais fortes e evita conflitos.
+    Pesos e limites vêm de `config` (AnalysisConfig); `transitions` (analyze_transitions),
+    `history_matches` (analyze_history_matches) e `ledger` (GuaranteeLedger) são opcionais. Com o
+    `ledger`, as regras cuja garantia está falhando na janela recente pontuam só `ledger_penalty`% do peso.
+    """
+    if not results or len(results) < config.min_results_for_suggestion: 
+        return {'suggestion': f'Aguardando no mínimo {config.min_results_for_suggestion} resultados para análise detalhada.', 'confidence': 0, 'reason': '', 'guarantee_pattern': 'N/A', 'bet_type': 'none'}
+
+    last_result = results[0]
+    last_result_color = get_color(last_result)
+    current_streak = color_analysis['streak']
+    
+    bet_scores = {'home': 0, 'away': 0, 'draw': 0}
+    reasons = collections.defaultdict(list)
+    guarantees = collections.defaultdict(list)
+    failing = ledger.is_failing if ledger is not None and ledger.failing else None # Nada a consultar sem padrões em falha
+
+    def score(bet_type, weight, reason, guarantee):
+        if failing is not None and failing(guarantee):
+            weight = weight * config.ledger_penalty // 100
+        bet_scores[bet_type] += weight
+        reasons[bet_type].append(reason)
+        guarantees[bet_type].append(guarantee)
+
+    # --- Nível 1: Sugestões de Alta Confiança (Pontuação 100+) ---
+
+    # 1. Quebra de Sequência Longa (Surf Max)
+    # Se a sequência atual já atingiu ou superou o máximo histórico, há grande chance de quebra.
+    if last_result_color == 'red' and surf_analysis['max_home_sequence'] > 0 and current_streak >= surf_analysis['max_home_sequence'] and current_streak >= config.surf_min_streak:
+        score('away', config.weight_surf_max, f"Sequência atual de Vermelho ({current_streak}x) atingiu ou superou o máximo histórico de surf ({surf_analysis['max_home_sequence']}x). Alta probabilidade de quebra para Azul.", f"Surf Max Quebra: {last_result_color.capitalize()}") # Pontuação mais alta
+    elif last_result_color == 'blue' and surf_analysis['max_away_sequence'] > 0 and current_streak >= surf_analysis['max_away_sequence'] and current_streak >= config.surf_min_streak:
+        score('home', config.weight_surf_max, f"Sequência atual de Azul ({current_streak}x) atingiu ou superou o máximo histórico de surf ({surf_analysis['max_away_sequence']}x). Alta probabilidade de quebra para Vermelho.", f"Surf Max Quebra: {last_result_color.capitalize()}")
+    elif last_result_color == 'yellow' and surf_analysis['max_draw_sequence'] > 0 and current_streak >= surf_analysis['max_draw_sequence'] and current_streak >= config.surf_min_draw_streak:
+        # Se empate atingiu o máximo, pode quebrar para qualquer lado.
+        for bet_type in ('home', 'away'):
+            score(bet_type, config.weight_surf_max_draw, f"Sequência atual de Empate ({current_streak}x) atingiu ou superou o máximo histórico.", "Surf Max Quebra: Empate")
+
+    # --- Nível 2: Padrões Recorrentes e Fortes (Pontuação 70-110) ---
+
+    # 2. Padrões recorrentes (2x1, 3x1, 2x2, 3x3, Reversão/Bloco Alternado, Zig-Zag e Espelho)
+    # A tabela de regras já traz, para o estado atual do fim do histórico, cada padrão que pontuaria;
+    # basta consultar sua contagem.
+    tail = (last_result_color, min(current_streak, TAIL_RUN_CAP), get_color(results[current_streak]) if current_streak < len(results) else None)
+    for key, bet_type, target_color, weight, reason in SUGGESTION_RULE_TABLE.get(tail, ()):
+        count = break_patterns.get(key, 0)
+        if count and count >= config.pattern_recurrence: # Múltiplas ocorrências do padrão
+            score(bet_type, getattr(config, weight), (reason, key, count, target_color), key) # Texto montado só para a sugestão final
+
+    # 3. Sugestão de Empate (se atrasado OU recorrente)
+    # Empate Atrasado: Mais de 7 rodadas sem empate E baixa frequência
+    if draw_specifics['time_since_last_draw'] >= config.draw_delay_rounds and draw_specifics['draw_frequency_27'] < config.draw_delay_max_frequency: # Frequência ajustada para 15%
+        score('draw', config.weight_draw_delayed, f"Empate não ocorre há {draw_specifics['time_since_last_draw']} rodadas e frequência baixa ({draw_specifics['draw_frequency_27']}% nos últimos {config.window}).", "Empate Atrasado/Baixa Frequência")
+    
+    # Padrões específicos de empate (Ex: R B Y ou B R Y)
+    if len(results) >= 2:
+        if get_color(results[0]) == 'away' and get_color(results[1]) == 'home': # Situação atual é Home (R) -> Away (B)
+            if RED_BLUE_DRAW in draw_specifics['draw_patterns']:
+                score('draw', config.weight_draw_sequence, f"Padrão 'Red-Blue-Draw' detectado e recorrente ({draw_specifics['draw_patterns'][RED_BLUE_DRAW]}x).", "Padrão Red-Blue-Draw")
+        elif get_color(results[0]) == 'home' and get_color(results[1]) == 'away': # Situação atual é Away (B) -> Home (R)
+            if BLUE_RED_DRAW in draw_specifics['draw_patterns']:
+                score('draw', config.weight_draw_sequence, f"Padrão 'Blue-Red-Draw' detectado e recorrente ({draw_specifics['draw_patterns'][BLUE_RED_DRAW]}x).", "Padrão Blue-Red-Draw")
+
+    # 4. Empate Recorrente (intervalos curtos)
+    if draw_specifics['recurrent_draw'] and draw_specifics['time_since_last_draw'] >= 0 and draw_specifics['time_since_last_draw'] <= 3: 
+        score('draw', config.weight_draw_recurrent, f"Empate é recorrente, ocorrendo em intervalos curtos (último há {draw_specifics['time_since_last_draw']} rodadas).", "Empate Recorrente") # Um pouco mais de confiança
+
+    # --- Nível 3: Sugestões de Confiança Média (Pontuação 40-70) ---
+
+    # 5. Modelo de transições: o contexto atual (últimos j resultados) foi seguido com frequência pelo mesmo resultado
+    if transitions and transitions['order'] > 0: # A ordem 0 é só a frequência geral, sem contexto
+        bet_type, probability = max(transitions['probabilities'].items(), key=operator.itemgetter(1))
+        if probability >= config.markov_min_probability:
+            score(bet_type, config.weight_markov, f"Após a sequência {transitions['context']}, {RESULT_LABELS[bet_type]} saiu em {probability}% das {transitions['support']} ocorrências no histórico.", f"Transição de Ordem {transitions['order']}: {transitions['context']}")
+
+    # 6. Sequência atual longa já vista várias vezes no histórico, seguida quase sempre pelo mesmo resultado
+    if history_matches:
+        # Maior sequência atual com ocorrências suficientes (as linhas vão do comprimento 1 ao maior repetido)
+        match = next((row for row in reversed(history_matches['by_length']) if row['occurrences'] >= config.suffix_min_occurrences), None)
+        if match and match['length'] >= config.suffix_min_context:
+            bet_type = max(RESULT_TYPES, key=match.get)
+            if match[bet_type] / match['occurrences'] * 100 >= config.suffix_min_probability:
+                context = history_matches['context'][:match['length']]
+                score(bet_type, config.weight_suffix_match, f"A sequência {context} ({match['length']} resultados) já apareceu {match['occurrences']}x no histórico e foi seguida por {RESULT_LABELS[bet_type]} em {match[bet_type]} delas.", f"Sequência Repetida ({match['length']}): {context}")
+
+    # 7. Alta Probabilidade de Quebra Geral (mas sem um padrão específico forte)
+    # Esta sugestão só deve ser considerada se não houver uma sugestão mais forte já determinada
+    if break_probability['break_chance'] > config.general_break_chance and current_streak < config.general_break_max_streak:
+        if len(results) >= 1:
+            # Não devemos sugerir empate aqui, a não ser que o empate seja a quebra esperada.
+            # Essa é uma sugestão de quebra de sequência de cor.
+            if last_result_color == 'red':
+                if bet_scores['away'] < 70: # Só adiciona se não houver uma sugestão mais forte de 'away'
+                    score('away', config.weight_general_break, f"Alta chance de quebra geral ({break_probability['break_chance']}%). Previsão de quebra da sequência de {last_result_color.capitalize()}.", "Alta Probabilidade de Quebra Geral") # Confiança um pouco maior
+            elif last_result_color == 'blue':
+                if bet_scores['home'] < 70: # Só adiciona se não houver uma sugestão mais forte de 'home'
+                    score('home', config.weight_general_break, f"Alta chance de quebra geral ({break_probability['break_chance']}%). Previsão de quebra da sequência de {last_result_color.capitalize()}.", "Alta Probabilidade de Quebra Geral")
+
+    if METRICS.enabled:
+        # Cada regra que pontua registra exatamente uma garantia, então as garantias contam as regras disparadas
+        METRICS.count('patterns_matched', len(break_patterns))
+        METRICS.count('draw_patterns_matched', len(draw_specifics['draw_patterns']))
+        for bet_type, fired in guarantees.items():
+            METRICS.count(f'rules_fired_{bet_type}', len(fired))
+
+    # --- Determinar a Melhor Sugestão ---
+    max_score = 0
+    best_bet_type = 'none'
+
+    # Itera em uma ordem preferencial: home, away, draw (para desempate de score)
+    # Isso prioriza as apostas em "Casa" e "Visitante" sobre "Empate" se as pontuações forem iguais
+    # e garante que a "melhor" seja escolhida.
+    preferred_order = ['home', 'away', 'draw']
+    for bet_type in preferred_order:
+        bet_score = bet_scores[bet_type]
+        if bet_score > max_score:
+            max_score = bet_score
+            best_bet_type = bet_type
+        # Se as pontuações são iguais, a ordem de preferência já cuida disso.
+
+    final_suggestion = "Manter observação."
+    final_confidence = 50
+    final_reason = f"Nenhum padrão de 'garantia' forte detectado nos últimos {config.window} resultados para uma aposta segura no momento."
+    final_guarantee = "Nenhum Padrão Forte"
+    
+    if best_bet_type != 'none' and max_score > 0:
+        final_confidence = min(100, max_score) # Limita a confiança a 100%
+        
+        # REMOÇÃO DOS ÍCONES DE CASA/AVIÃO/APERTO DE MÃO DA SUGESTÃO
+        # A sugestão agora mostrará APENAS a bolinha colorida
+        if best_bet_type == 'home':
+            final_suggestion = f"APOSTAR em **CASA** {get_color_emoji('red')}"
+        elif best_bet_type == 'away':
+            final_suggestion = f"APOSTAR em **VISITANTE** {get_color_emoji('blue')}"
+        elif best_bet_type == 'draw':
+            final_suggestion = f"APOSTAR em **EMPATE** {get_color_emoji('yellow')}"
+        
+        # Constrói as strings de razão e garantia
+        final_reason = ". ".join(sorted(set(map(_render_reason, reasons[best_bet_type]))))
+        final_guarantee = " | ".join(sorted(set(map(str, guarantees[best_bet_type]))))
+        
+        if not final_reason: # Fallback se nenhuma razão específica foi adicionada
+            final_reason = "Padrões identificados indicam alta probabilidade."
+        if not final_guarantee: # Fallback se nenhuma garantia específica foi adicionada
+            final_guarantee = "Padrão de pontuação geral."
+
+
+    return {
+        'suggestion': final_suggestion, 
+        'confidence': round(final_confidence), 
+        'reason': final_reason,
+        'guarantee_pattern': final_guarantee,
+        'bet_type': best_bet_type
+    }
+
+
+@instrumented('analysis.update')
+def update_analysis(results, backend='python', config=DEFAULT_CONFIG, ledger=None, windows=None):
+    """
+    Coordena todas as análises e retorna os resultados consolidados.
+    `backend` escolhe a implementação dos analisadores (ver ANALYSIS_BACKENDS); todas produzem a mesma saída.
+    `ledger` (GuaranteeLedger, opcional) é repassado ao gerador de sugestões. Com `windows` (tamanhos
+    de janela), o resultado inclui também 'windows' (ver analyze_windows).
+    analyze_transitions e analyze_history_matches varrem o histórico inteiro a cada chamada, então cada
+    rodada custa O(n) no tamanho do histórico; para atualizar resultado a resultado, use IncrementalAnalyzer.
+    """
+    
+    stats = {'home': results[:config.window].count('home'), 
+             'away': results[:config.window].count('away'), 
+             'draw': results[:config.window].count('draw'), 
+             'total': len(results[:config.window])}
+    
+    surf_analysis, color_analysis, break_patterns, break_probability, draw_specifics = ANALYSIS_BACKENDS[backend](results, config.window)
+    transitions = analyze_transitions(results, config.markov_order, config.markov_min_support)
+    history_matches = analyze_history_matches(results, config.suffix_max_context)
+
+    suggestion_data = generate_advanced_suggestion(results, surf_analysis, color_analysis, break_patterns, break_probability, draw_specifics, config, transitions, history_matches, ledger)
+    
+    analysis = {
+        'stats': stats,
+        'surf_analysis': surf_analysis,
+        'color_analysis': color_analysis,
+        'break_patterns': break_patterns,
+        'break_probability': break_probability,
+        'draw_specifics': draw_specifics, 
+        'transitions': transitions,
+        'history_matches': history_matches,
+        'suggestion': suggestion_data
+    }
+    if windows:
+        analysis['windows'] = analyze_windows(results, windows)
+    return analysis
+
+# --- Verificação de Garantia ---
+
+def check_guarantee_status(suggested_bet_type, actual_result, guarantee_pattern):
+    """
+    Verifica se a aposta sugerida anteriormente (com base no padrão de garantia)
+    foi bem-sucedida ou falhou.
+    """
+    if suggested_bet_type == 'none':
+        return True # Não havia sugestão de aposta, então não falhou.
+
+    # Um empate pode ser sugerido, mas o resultado pode ser Casa ou Fora.
+    # Se a sugestão foi "draw" e o resultado foi "draw", sucesso.
+    if suggested_bet_type == 'draw' and actual_result != 'draw':
+        return False
+    # Se a sugestão foi "home" e o resultado não foi "home", falha.
+    elif suggested_bet_type == 'home' and actual_result != 'home':
+        return False
+    # Se a sugestão foi "away" e o resultado não foi "away", falha.
+    elif suggested_bet_type == 'away' and actual_result != 'away':
+        return False
+    
+    return True # A aposta sugerida foi bem-sucedida.
+
+# --- Backends de Análise ---
+
+def _analyze_python(results, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    return (analyze_surf(results, window), analyze_colors(results, window), find_complex_patterns(results, window),
+            analyze_break_probability(results, window), analyze_draw_specifics(results, window))
+
+def _analyze_numpy(results, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    from . import vectorized # Importado sob demanda: exige NumPy
+
+    return vectorized.analyze_numpy(results, window)
+
+# Backends disponíveis para update_analysis; 'numpy' exige a biblioteca NumPy instalada.
+ANALYSIS_BACKENDS = {
+    'python': _analyze_python,
+    'numpy': _analyze_numpy,
+}
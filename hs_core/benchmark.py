@@ -0,0 +1,237 @@
+"""
+Benchmark reprodutível dos analisadores, da sugestão e do ciclo completo de add_result.
+
+Uso:
+    python -m hs_core.benchmark --output baseline.json
+    python -m hs_core.benchmark --compare baseline.json --output atual.json
+
+Cada alvo é medido sobre históricos sintéticos (semente fixa) de 27, 1K, 100K e 1M resultados;
+o relatório traz percentis de latência por chamada e o pico de memória alocada (tracemalloc)
+ao montar o histórico e o estado do alvo e executar uma chamada. Alvos com limite absoluto em
+TIME_LIMITS (ex.: a rodada do backtest) falham acima dele, mesmo sem relatório anterior para comparar.
+Alvos que processam um bloco de rodadas por chamada (`rounds` na função medida) informam a latência
+por rodada.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from .analysis import (analyze_break_probability, analyze_colors, analyze_draw_specifics, analyze_history_matches,
+                       analyze_surf, analyze_transitions, analyze_windows, check_guarantee_status,
+                       find_complex_patterns, generate_advanced_suggestion, update_analysis)
+from .backtest import _backtest_tally
+from .config import DEFAULT_CONFIG, MAX_HISTORY_TO_STORE, optional_numpy
+from .engine import IncrementalAnalyzer
+from .history import RESULT_TYPES, ResultHistory, encode_history
+from .ledger import GuaranteeLedger
+
+DEFAULT_SIZES = (27, 1_000, 100_000, 1_000_000)
+DEFAULT_SEED = 2024
+RESULT_WEIGHTS = (45, 45, 10) # Proporção aproximada de home/away/draw no Football Studio
+MIN_CALLS = 5
+MAX_CALLS = 2_000
+TIME_BUDGET = 0.5 # Segundos de medição por alvo e tamanho (respeitando MIN_CALLS)
+DEFAULT_REGRESSION_THRESHOLD = 1.25 # p50 atual / p50 da base acima disso é regressão
+BACKTEST_BLOCK = 10_000 # Rodadas por chamada do alvo do backtest vetorizado
+TIME_LIMITS = {'backtest_round[numpy]': 15} # p50 máximo (us) por alvo, em qualquer tamanho
+
+def synthetic_history(size, seed=DEFAULT_SEED):
+    """Histórico sintético determinístico (mais recente primeiro) com `size` resultados."""
+    rng = random.Random(seed)
+    return ResultHistory(size, rng.choices(RESULT_TYPES, weights=RESULT_WEIGHTS, k=size))
+
+def _analyzer_target(analyzer):
+    def setup(history, rng):
+        return lambda: analyzer(history)
+    return setup
+
+def _suggestion_target(history, rng):
+    inputs = (analyze_surf(history), analyze_colors(history), find_complex_patterns(history),
+              analyze_break_probability(history), analyze_draw_specifics(history))
+    return lambda: generate_advanced_suggestion(history, *inputs)
+
+def _update_analysis_target(backend):
+    def setup(history, rng):
+        return lambda: update_analysis(history, backend)
+    return setup
+
+def _add_result_target(history, rng):
+    """
+    Mesmo ciclo de `TableState.add_result`: verificação de garantia da rodada anterior, acréscimo
+    ao histórico, atualização incremental e captura da nova sugestão.
+    """
+    analyzer = IncrementalAnalyzer.from_codes(encode_history(history), history.capacity)
+    state = {'suggestion': analyzer.snapshot()['suggestion']}
+
+    def add_result():
+        result_type = rng.choices(RESULT_TYPES, weights=RESULT_WEIGHTS)[0]
+        suggestion = state['suggestion']
+        if suggestion['bet_type'] != 'none' and suggestion['confidence'] >= DEFAULT_CONFIG.guarantee_confidence:
+            check_guarantee_status(suggestion['bet_type'], result_type, suggestion['guarantee_pattern'])
+        history.append(result_type)
+        analyzer.push(result_type)
+        state['suggestion'] = analyzer.snapshot()['suggestion']
+    return add_result
+
+def _backtest_round_target(history, rng):
+    """
+    Uma rodada do backend 'python' de `run_backtest`: verificação e registro da sugestão no livro de
+    garantias, acréscimo ao estado e nova sugestão pelo caminho de IncrementalAnalyzer.suggestion.
+    """
+    analyzer = IncrementalAnalyzer.from_codes(encode_history(history), MAX_HISTORY_TO_STORE)
+    ledger = GuaranteeLedger.from_config(DEFAULT_CONFIG)
+    state = {'suggestion': analyzer.suggestion(ledger)}
+
+    def backtest_round():
+        result_type = rng.choices(RESULT_TYPES, weights=RESULT_WEIGHTS)[0]
+        suggestion = state['suggestion']
+        if suggestion['bet_type'] != 'none' and suggestion['confidence'] >= DEFAULT_CONFIG.guarantee_confidence:
+            ledger.record(suggestion['guarantee_pattern'],
+                          check_guarantee_status(suggestion['bet_type'], result_type, suggestion['guarantee_pattern']))
+        analyzer.push(result_type)
+        state['suggestion'] = analyzer.suggestion(ledger)
+    return backtest_round
+
+def _numpy_backtest_target(history, rng):
+    """
+    Rodadas do backend 'numpy' de `run_backtest`, com o livro de garantias: um bloco de BACKTEST_BLOCK
+    resultados depois do histórico, aquecido pelos últimos MAX_HISTORY_TO_STORE dele.
+    """
+    chronological = list(reversed(history)) + rng.choices(RESULT_TYPES, weights=RESULT_WEIGHTS, k=BACKTEST_BLOCK)
+    start = len(history)
+
+    def backtest_block():
+        _backtest_tally(chronological, start, len(chronological), MAX_HISTORY_TO_STORE, DEFAULT_CONFIG, True, 'numpy')
+    backtest_block.rounds = BACKTEST_BLOCK
+    return backtest_block
+
+TARGETS = {
+    'analyze_surf': _analyzer_target(analyze_surf),
+    'analyze_colors': _analyzer_target(analyze_colors),
+    'find_complex_patterns': _analyzer_target(find_complex_patterns),
+    'analyze_break_probability': _analyzer_target(analyze_break_probability),
+    'analyze_draw_specifics': _analyzer_target(analyze_draw_specifics),
+    'analyze_transitions': _analyzer_target(analyze_transitions),
+    'analyze_history_matches': _analyzer_target(analyze_history_matches),
+    'analyze_windows': _analyzer_target(analyze_windows),
+    'generate_advanced_suggestion': _suggestion_target,
+    'update_analysis': _update_analysis_target('python'),
+    'update_analysis[numpy]': _update_analysis_target('numpy'),
+    'add_result': _add_result_target,
+    'backtest_round': _backtest_round_target,
+    'backtest_round[numpy]': _numpy_backtest_target,
+}
+NUMPY_TARGETS = ('update_analysis[numpy]', 'backtest_round[numpy]') # Omitidos sem o NumPy instalado
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def measure(setup, size, seed=DEFAULT_SEED):
+    """
+    Mede um alvo em um histórico de `size` resultados; retorna latências em microssegundos (por rodada,
+    se a chamada informa `rounds`) e pico de memória.
+    """
+    call = setup(synthetic_history(size, seed), random.Random(seed))
+    call() # Aquecimento (caches, importações sob demanda)
+    scale = 1e6 / getattr(call, 'rounds', 1)
+    timings = []
+    deadline = time.perf_counter() + TIME_BUDGET
+    while len(timings) < MIN_CALLS or (len(timings) < MAX_CALLS and time.perf_counter() < deadline):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * scale)
+    timings.sort()
+
+    # Memória medida à parte: o tracemalloc deixa as chamadas bem mais lentas
+    tracemalloc.start()
+    call = setup(synthetic_history(size, seed), random.Random(seed))
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'calls': len(timings),
+        'mean_us': round(sum(timings) / len(timings), 2),
+        'p50_us': round(_percentile(timings, 0.50), 2),
+        'p90_us': round(_percentile(timings, 0.90), 2),
+        'p99_us': round(_percentile(timings, 0.99), 2),
+        'max_us': round(timings[-1], 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+def run_benchmarks(sizes=DEFAULT_SIZES, targets=None, seed=DEFAULT_SEED, progress=None):
+    """Executa os alvos escolhidos (padrão: todos) em cada tamanho e retorna o relatório completo."""
+    targets = list(targets or TARGETS)
+    if optional_numpy() is None:
+        targets = [name for name in targets if name not in NUMPY_TARGETS]
+    report = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': seed,
+            'sizes': list(sizes),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': {},
+    }
+    for name in targets:
+        report['results'][name] = {}
+        for size in sizes:
+            stats = measure(TARGETS[name], size, seed)
+            report['results'][name][str(size)] = stats
+            if progress:
+                progress(f"{name:<30} {size:>9} p50={stats['p50_us']:>12.2f}us p99={stats['p99_us']:>12.2f}us peak={stats['peak_kib']:>10.1f}KiB")
+    return report
+
+def compare_reports(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """Lista (alvo, tamanho, p50 base, p50 atual, razão) onde a mediana piorou mais que `threshold`."""
+    regressions = []
+    for name, by_size in current['results'].items():
+        for size, stats in by_size.items():
+            base = baseline.get('results', {}).get(name, {}).get(size)
+            if not base or not base['p50_us']:
+                continue
+            ratio = stats['p50_us'] / base['p50_us']
+            if ratio > threshold:
+                regressions.append((name, size, base['p50_us'], stats['p50_us'], round(ratio, 2)))
+    return regressions
+
+def check_time_limits(report, limits=TIME_LIMITS):
+    """Lista (alvo, tamanho, p50, limite) onde a mediana passou do limite absoluto do alvo."""
+    return [(name, size, stats['p50_us'], limits[name])
+            for name, by_size in report['results'].items() if name in limits
+            for size, stats in by_size.items() if stats['p50_us'] > limits[name]]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos analisadores do hs_core.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS))
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', help="Arquivo JSON onde salvar o relatório (base para comparações futuras).")
+    parser.add_argument('--compare', help="Relatório JSON anterior para detectar regressões.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.targets, args.seed, progress=print)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    over_limit = check_time_limits(report)
+    for name, size, p50, limit in over_limit:
+        print(f"LIMITE {name} ({size}): p50 {p50}us > {limit}us")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(json.load(f), report, args.threshold)
+        for name, size, before, after, ratio in regressions:
+            print(f"REGRESSÃO {name} ({size}): p50 {before}us -> {after}us ({ratio}x)")
+        if regressions:
+            return 1
+    return 1 if over_limit else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Constantes, parâmetros da análise (AnalysisConfig) e funções auxiliares de cores."""
+import dataclasses
+
+NUM_RECENT_RESULTS_FOR_ANALYSIS = 27
+MAX_HISTORY_TO_STORE = 1000
+NUM_HISTORY_TO_DISPLAY = 100 # Número de resultados do histórico a serem exibidos
+EMOJIS_PER_ROW = 9 # Quantos emojis por linha no histórico horizontal
+MIN_RESULTS_FOR_SUGGESTION = 9
+DASHBOARD_COLUMNS = 3 # Mesas por linha no painel de mesas
+DASHBOARD_RECENT_RESULTS = 18 # Resultados recentes exibidos por mesa no painel de mesas
+
+@dataclasses.dataclass(frozen=True)
+class AnalysisConfig:
+    """
+    Parâmetros da janela de análise e da pontuação de `generate_advanced_suggestion`.
+    Os valores padrão são os originais do app; outras combinações podem ser avaliadas com `run_parameter_sweep`.
+    """
+    window: int = NUM_RECENT_RESULTS_FOR_ANALYSIS
+    analysis_windows: tuple = (9, NUM_RECENT_RESULTS_FOR_ANALYSIS, 54, 100, 1000) # Janelas comparadas (WindowCounts)
+    min_results_for_suggestion: int = MIN_RESULTS_FOR_SUGGESTION
+    guarantee_confidence: int = 70 # Confiança mínima para a garantia ser verificada em add_result
+    pattern_recurrence: int = 3 # Ocorrências mínimas para um padrão ser considerado recorrente
+    surf_min_streak: int = 3
+    surf_min_draw_streak: int = 2
+    draw_delay_rounds: int = 7 # Rodadas sem empate para considerá-lo atrasado...
+    draw_delay_max_frequency: float = 15 # ...desde que a frequência na janela seja menor que esta (%)
+    general_break_chance: float = 60 # Chance de quebra (%) acima da qual a quebra geral é sugerida
+    general_break_max_streak: int = 4
+    markov_order: int = 3 # Maior ordem do modelo de transições (contextos de até 3 resultados)
+    markov_min_support: int = 30 # Ocorrências mínimas do contexto para a ordem ser usada
+    markov_min_probability: float = 65 # P(próximo | contexto) mínima (%) para pontuar a aposta
+    suffix_max_context: int = 27 # Maior sequência atual procurada no histórico pelo índice de sufixos (a janela inteira)
+    suffix_min_context: int = 6 # Tamanho mínimo da sequência repetida para pontuar a aposta...
+    suffix_min_occurrences: int = 8 # ...com ao menos estas ocorrências anteriores...
+    suffix_min_probability: float = 80 # ...seguidas pelo mesmo resultado nesta proporção (%)
+    ledger_window: int = 30 # Sugestões recentes de cada padrão na taxa móvel do GuaranteeLedger
+    ledger_min_trials: int = 10 # Sugestões na janela antes de um padrão poder ser considerado em falha...
+    ledger_min_hit_rate: float = 35 # ...quando a taxa móvel de acerto (%) fica abaixo desta
+    ledger_penalty: int = 50 # Parte do peso (%) mantida pelas regras de um padrão em falha
+    weight_surf_max: int = 150
+    weight_surf_max_draw: int = 100
+    weight_3x3: int = 130
+    weight_3x1: int = 120
+    weight_block_reversal: int = 115
+    weight_2x1: int = 110
+    weight_2x2: int = 100
+    weight_draw_sequence: int = 95
+    weight_mirror: int = 95
+    weight_zigzag: int = 90
+    weight_draw_recurrent: int = 85
+    weight_draw_delayed: int = 80
+    weight_markov: int = 70
+    weight_suffix_match: int = 65
+    weight_general_break: int = 60
+
+    def __post_init__(self):
+        # A sugestão só consulta os primeiros resultados do histórico; exigir que eles caibam na janela
+        # permite que o motor incremental trabalhe apenas com a janela.
+        if self.window < max(self.min_results_for_suggestion, 3):
+            raise ValueError("window deve ser >= min_results_for_suggestion (e >= 3).")
+
+DEFAULT_CONFIG = AnalysisConfig()
+
+def get_color(result):
+    """Retorna a cor associada ao resultado."""
+    if result == 'home':
+        return 'red'
+    elif result == 'away':
+        return 'blue'
+    else: # 'draw'
+        return 'yellow'
+
+def get_color_emoji(color):
+    """Retorna o emoji correspondente à cor."""
+    if color == 'red':
+        return '🔴'
+    elif color == 'blue':
+        return '🔵'
+    elif color == 'yellow':
+        return '🟡'
+    return ''
+
+def get_result_emoji(result_type):
+    """Retorna o emoji correspondente ao tipo de resultado. Agora retorna uma string vazia para remover os ícones."""
+    return ''
+
+def optional_numpy():
+    """Importa o NumPy sob demanda; retorna None se ele não estiver instalado (é uma dependência opcional)."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
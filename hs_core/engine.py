@@ -0,0 +1,360 @@
+"""Motor de análise incremental: atualiza a análise em O(1) a cada novo resultado."""
+import collections
+import itertools
+
+from .analysis import generate_advanced_suggestion
+from .config import DEFAULT_CONFIG, MAX_HISTORY_TO_STORE, get_color
+from .history import RESULT_CODES, RESULT_TYPES, ResultHistory
+from .instrumentation import instrumented
+from .patterns import BREAK_PATTERNS, DRAW_PATTERNS
+from .suffix_index import SuffixIndex
+from .transitions import TransitionModel
+from .windows import WindowCounts
+
+# Maior ocorrência deslizante de [quebras] ou [empates] (e no mínimo 2, para as quebras simples)
+MAX_PATTERN_SPAN = max(BREAK_PATTERNS.spans + DRAW_PATTERNS.spans + (2,))
+
+class IncrementalAnalyzer:
+    """
+    Mantém o estado da análise e o atualiza em tempo constante a cada novo resultado.
+
+    Produz exatamente a mesma saída de `update_analysis(results)`, onde `results` é o
+    histórico armazenado (mais recente primeiro, limitado a `max_history`). Contagens,
+    quebras e padrões da janela de N resultados são somados quando uma ocorrência entra
+    na janela e subtraídos quando ela sai; as sequências máximas do histórico completo
+    vêm da codificação por sequências (RunLengthEncoding), com um histograma de tamanhos por resultado.
+    O histórico armazenado (`history`, um ResultHistory) pertence ao motor: a TableState o expõe como
+    `results`, e as sequências são as dele (`runs`), sem uma segunda cópia.
+    """
+
+    def __init__(self, max_history=MAX_HISTORY_TO_STORE, config=DEFAULT_CONFIG):
+        self.max_history = max_history
+        self.config = config
+        self.reset()
+
+    def reset(self):
+        self.history = ResultHistory(self.max_history) # Histórico armazenado, com as sequências (surf) e seus máximos
+        self.seq = -1 # Número sequencial absoluto do resultado mais recente
+        # Resultados da janela, mais recente primeiro (nunca maior que o histórico armazenado)
+        self.window = collections.deque(maxlen=min(self.config.window, self.max_history))
+        self.colors = collections.deque(maxlen=self.window.maxlen) # Cores correspondentes a `window`
+        self.letters = collections.deque(maxlen=self.window.maxlen) # Letras de `color_pattern_27` (R, B, Y)
+        self.codes = collections.deque(maxlen=self.window.maxlen) # Códigos (0, 1, 2) lidos pelos autômatos de padrões
+        self.counts = {'home': 0, 'away': 0, 'draw': 0}
+        self.breaks = 0
+        self.patterns = collections.defaultdict(int)
+        self.draw_patterns = collections.defaultdict(int)
+        self.last_draw_seq = None
+        self.transitions = TransitionModel(self.config.markov_order) # Contagens de transição do histórico armazenado
+        self.suffix_index = SuffixIndex(self.history, self.config.suffix_max_context) # Ocorrências anteriores da sequência atual
+        # Somas acumuladas das janelas de config.analysis_windows (ver window_stats)
+        self.window_counts = WindowCounts(max(self.config.analysis_windows, default=0))
+
+    @property
+    def runs(self):
+        return self.history.runs
+
+    @property
+    def length(self):
+        """Tamanho do histórico armazenado."""
+        return len(self.history)
+
+    @classmethod
+    def from_results(cls, results, max_history=MAX_HISTORY_TO_STORE, config=DEFAULT_CONFIG):
+        """Constrói o estado a partir de um histórico existente (mais recente primeiro)."""
+        analyzer = cls(max_history, config)
+        for result in reversed(results[:max_history]):
+            analyzer.push(result)
+        return analyzer
+
+    @classmethod
+    def from_codes(cls, codes, max_history=MAX_HISTORY_TO_STORE, config=DEFAULT_CONFIG):
+        """
+        Reconstrói o estado em uma única passada a partir de códigos uint8 (mais antigo primeiro),
+        como os retornados por um armazenamento de histórico. Só os resultados da janela são
+        adicionados um a um; as sequências e os modelos do restante são montados de uma vez.
+        """
+        codes = bytes(codes[-max_history:])
+        analyzer = cls(max_history, config)
+        head_size = max(0, len(codes) - analyzer.window.maxlen)
+        head = codes[:head_size]
+        analyzer.history = ResultHistory.from_codes(head, max_history)
+        analyzer.transitions = TransitionModel.from_codes(head, config.markov_order)
+        analyzer.suffix_index = SuffixIndex(analyzer.history, config.suffix_max_context)
+        analyzer.window_counts = WindowCounts.from_codes(head, analyzer.window_counts.max_window)
+        analyzer.seq = head_size - 1
+        last_draw = head.rfind(RESULT_CODES['draw'])
+        if last_draw >= 0:
+            analyzer.last_draw_seq = last_draw
+        for code in codes[head_size:]:
+            analyzer.push(RESULT_TYPES[code])
+        return analyzer
+
+    @staticmethod
+    def _add_keys(counter, keys, delta):
+        for key in keys:
+            counter[key] += delta
+            if counter[key] == 0:
+                del counter[key]
+
+    def _add_window_tail(self, change):
+        """Soma `change` às contribuições do resultado mais antigo da janela (cheia)."""
+        window = self.window
+        size = len(window)
+        codes = tuple(self.codes[i] for i in range(max(0, size - MAX_PATTERN_SPAN), size))
+        for span in BREAK_PATTERNS.spans:
+            if size >= span:
+                self._add_keys(self.patterns, BREAK_PATTERNS.match(codes[-span:]), change)
+        for span in DRAW_PATTERNS.spans:
+            if size >= span:
+                self._add_keys(self.draw_patterns, DRAW_PATTERNS.match(codes[-span:]), change)
+        if size >= 2 and codes[-2] != codes[-1]:
+            self.breaks += change
+
+        self.counts[window[-1]] += change
+
+    def _add_window_head(self, change):
+        """Soma `change` às contribuições do resultado mais recente da janela."""
+        size = len(self.window)
+        codes = tuple(itertools.islice(self.codes, MAX_PATTERN_SPAN))
+        for span in BREAK_PATTERNS.spans:
+            if size >= span:
+                self._add_keys(self.patterns, BREAK_PATTERNS.match(codes[:span]), change)
+        for span in DRAW_PATTERNS.spans:
+            if size >= span:
+                self._add_keys(self.draw_patterns, DRAW_PATTERNS.match(codes[:span]), change)
+        if size >= 2 and codes[0] != codes[1]:
+            self.breaks += change
+        self.counts[self.window[0]] += change
+
+    def _push_window_head(self, result):
+        color = get_color(result)
+        self.window.appendleft(result)
+        self.colors.appendleft(color)
+        self.letters.appendleft(color[0].upper())
+        self.codes.appendleft(RESULT_CODES[result])
+        self._add_window_head(1)
+
+    def _push_window_tail(self, result):
+        color = get_color(result)
+        self.window.append(result)
+        self.colors.append(color)
+        self.letters.append(color[0].upper())
+        self.codes.append(RESULT_CODES[result])
+        self._add_window_tail(1)
+
+    def _last_draw_seq(self):
+        """Número sequencial do empate mais recente do histórico armazenado (None se não houver)."""
+        codes = self.history.to_bytes()
+        position = codes.rfind(RESULT_CODES['draw'])
+        return None if position < 0 else self.seq - (len(codes) - 1 - position)
+
+    @instrumented('engine.push')
+    def push(self, result):
+        """Adiciona um novo resultado (o mais recente) e atualiza todo o estado em O(1)."""
+        if len(self.window) == self.window.maxlen:
+            self._add_window_tail(-1)
+        self.seq += 1
+        self._push_window_head(result)
+        if result == 'draw':
+            self.last_draw_seq = self.seq
+
+        code = RESULT_CODES[result]
+        full = len(self.history) == self.max_history
+        if full: # Primeiros códigos do histórico com o novo resultado, lidos antes que o acréscimo descarte o mais antigo
+            oldest = (self.runs.oldest_codes(self.transitions.order + 1) + [code])[:self.transitions.order + 1]
+        self.history.append(result)
+        self.transitions.push(code)
+        self.suffix_index.push(code)
+        self.window_counts.push(code)
+        if full:
+            self.transitions.drop(oldest)
+
+    @instrumented('engine.pop')
+    def pop(self, restore=None):
+        """
+        Desfaz o último `push` em O(1) e retorna o resultado removido (o índice de sufixos, que só cresce, é
+        remontado na próxima consulta). Se aquele acréscimo descartou o resultado mais antigo (histórico
+        cheio), `restore` é o código dele, devolvido ao início do histórico.
+        """
+        order = self.transitions.order
+        result = self.history.pop(restore)
+        code = RESULT_CODES[result]
+        if restore is not None:
+            self.transitions.push_oldest((self.runs.oldest_codes(order + 1) + [code])[:order + 1])
+        self.suffix_index.invalidate()
+        self.transitions.pop(self.history.to_bytes(0, order), code)
+        self.window_counts.pop(self.history.to_bytes())
+
+        self._add_window_head(-1)
+        for values in (self.window, self.colors, self.letters, self.codes):
+            values.popleft()
+        if self.length > len(self.window): # O resultado que tinha saído da janela volta a ela
+            self._push_window_tail(self.history[len(self.window)])
+        self.seq -= 1
+        if result == 'draw':
+            self.last_draw_seq = self._last_draw_seq()
+        return result
+
+    @instrumented('engine.replace')
+    def replace(self, index, result):
+        """
+        Troca o resultado na posição `index` (0 = mais recente) do histórico armazenado. Sequências e
+        transições mudam só em volta dele; a janela e as somas das janelas de análise são remontadas se ele
+        estiver ao alcance delas, e o índice de sufixos, na próxima consulta. Custa O(order^2 + janela),
+        mais localizar a sequência que o contém.
+        """
+        codes = self.history.to_bytes()
+        position = len(codes) - 1 - index
+        previous, code = codes[position], RESULT_CODES[result]
+        if previous == code:
+            return
+        self.transitions.replace(codes, position, code)
+        self.history.replace(index, result)
+        self.suffix_index.invalidate()
+        codes = self.history.to_bytes()
+        self.window_counts.replace(codes, index)
+        if index < len(self.window):
+            self._load_window(codes[len(codes) - len(self.window):])
+        if RESULT_CODES['draw'] in (previous, code):
+            self.last_draw_seq = self._last_draw_seq()
+
+    def _load_window(self, codes):
+        """Refaz a janela e suas contagens a partir dos seus códigos (mais antigo primeiro)."""
+        for values in (self.window, self.colors, self.letters, self.codes):
+            values.clear()
+        self.counts = {'home': 0, 'away': 0, 'draw': 0}
+        self.breaks = 0
+        self.patterns.clear()
+        self.draw_patterns.clear()
+        for code in codes:
+            self._push_window_head(RESULT_TYPES[code])
+
+    def window_stats(self, windows=None):
+        """
+        Totais de cada janela (padrão: config.analysis_windows), no formato de `analyze_windows`, lidos
+        das somas acumuladas em O(colunas) por janela. Janelas maiores que a maior configurada são limitadas a ela.
+        """
+        return self.window_counts.query(self.config.analysis_windows if windows is None else windows, self.length)
+
+    def _time_since_last_draw(self):
+        if self.last_draw_seq is not None and self.seq - self.last_draw_seq < self.length:
+            return self.seq - self.last_draw_seq
+        return -1
+
+    @instrumented('engine.snapshot')
+    def snapshot(self, ledger=None):
+        """Retorna a análise consolidada no mesmo formato de `update_analysis` (com o mesmo `ledger`)."""
+        window_analysis = self._window_analysis()
+        transitions = self.transitions.analyze(self.config.markov_min_support)
+        history_matches = self.suffix_index.matches()
+        # A sugestão só consulta o tamanho do histórico (>= min_results_for_suggestion, que cabe na janela)
+        # e os 3 primeiros resultados, então a janela é equivalente ao histórico completo para ela.
+        suggestion_data = generate_advanced_suggestion(self.window, window_analysis['surf_analysis'], window_analysis['color_analysis'],
+                                                       window_analysis['break_patterns'], window_analysis['break_probability'],
+                                                       window_analysis['draw_specifics'], self.config, transitions, history_matches, ledger)
+        return {**window_analysis, 'transitions': transitions, 'history_matches': history_matches, 'suggestion': suggestion_data}
+
+    def _window_analysis(self):
+        """Partes da análise que só dependem da janela, da sequência atual, dos máximos e do último empate."""
+        window = list(self.window)
+        size = len(window)
+        streak = self.runs.newest[1] if self.runs else 0
+        current_sequence = min(streak, size)
+        newest = window[0] if window else None
+
+        stats = {'home': self.counts['home'], 'away': self.counts['away'], 'draw': self.counts['draw'], 'total': size}
+
+        surf_analysis = {
+            'home_sequence': current_sequence if newest == 'home' else 0,
+            'away_sequence': current_sequence if newest == 'away' else 0,
+            'draw_sequence': current_sequence if newest == 'draw' else 0,
+            'max_home_sequence': self.runs.max_run(RESULT_CODES['home']),
+            'max_away_sequence': self.runs.max_run(RESULT_CODES['away']),
+            'max_draw_sequence': self.runs.max_run(RESULT_CODES['draw'])
+        }
+
+        if not window:
+            color_analysis = {'red': 0, 'blue': 0, 'yellow': 0, 'current_color': '', 'streak': 0, 'color_pattern_27': ''}
+        else:
+            color_analysis = {
+                'red': self.counts['home'],
+                'blue': self.counts['away'],
+                'yellow': self.counts['draw'],
+                'current_color': self.colors[0],
+                'streak': streak,
+                'color_pattern_27': ''.join(self.letters)
+            }
+
+        break_patterns = dict(self.patterns)
+        for key in BREAK_PATTERNS.prefix_matches(tuple(itertools.islice(self.codes, BREAK_PATTERNS.prefix_length)), size):
+            break_patterns[key] = break_patterns.get(key, 0) + 1
+
+        if size < 2:
+            break_probability = {'break_chance': 0, 'last_break_type': ''}
+        else:
+            break_chance = (self.breaks / (size - 1)) * 100
+            last_break_type = ""
+            if get_color(window[0]) != get_color(window[1]):
+                last_break_type = f"Quebrou de {get_color(window[1]).capitalize()} para {get_color(window[0]).capitalize()}"
+            break_probability = {'break_chance': round(break_chance, 2), 'last_break_type': last_break_type}
+
+        if not window:
+            draw_specifics = {'draw_frequency_27': 0, 'time_since_last_draw': -1, 'draw_patterns': {}, 'recurrent_draw': False}
+        else:
+            # Empate recorrente: mesmo cálculo de intervalo de analyze_draw_specifics sobre a janela
+            draw_indices = [i for i, code in enumerate(self.codes) if code == RESULT_CODES['draw']]
+            recurrent_draw = any(0 <= draw_indices[i] - draw_indices[i + 1] - 1 <= 3 for i in range(len(draw_indices) - 1))
+            draw_specifics = {
+                'draw_frequency_27': round((self.counts['draw'] / size) * 100, 2),
+                'time_since_last_draw': self._time_since_last_draw(),
+                'draw_patterns': dict(self.draw_patterns),
+                'recurrent_draw': recurrent_draw
+            }
+
+        return {
+            'stats': stats,
+            'surf_analysis': surf_analysis,
+            'color_analysis': color_analysis,
+            'break_patterns': break_patterns,
+            'break_probability': break_probability,
+            'draw_specifics': draw_specifics
+        }
+
+    @instrumented('engine.suggestion')
+    def suggestion(self, ledger=None):
+        """
+        Só a sugestão de `snapshot(ledger)`, montando apenas os campos que generate_advanced_suggestion
+        consulta (sem textos de cores nem estatísticas, e só as sequências repetidas longas e frequentes
+        o bastante para a regra). É o caminho do backtest e da simulação, que pedem uma sugestão por rodada.
+        """
+        window = self.window
+        size = len(window)
+        if not size or size < self.config.min_results_for_suggestion: # Só a mensagem de espera
+            return generate_advanced_suggestion(window, None, None, None, None, None, self.config)
+        streak = self.runs.newest[1]
+        surf_analysis = {
+            'max_home_sequence': self.runs.max_run(RESULT_CODES['home']),
+            'max_away_sequence': self.runs.max_run(RESULT_CODES['away']),
+            'max_draw_sequence': self.runs.max_run(RESULT_CODES['draw'])
+        }
+        break_patterns = self.patterns
+        prefix_matches = BREAK_PATTERNS.prefix_matches(tuple(itertools.islice(self.codes, BREAK_PATTERNS.prefix_length)), size)
+        if prefix_matches:
+            break_patterns = dict(break_patterns)
+            for key in prefix_matches:
+                break_patterns[key] = break_patterns.get(key, 0) + 1
+        time_since_last_draw = self._time_since_last_draw()
+        recurrent_draw = False
+        if 0 <= time_since_last_draw <= 3: # A regra de empate recorrente só é consultada logo após um empate
+            draw_indices = [i for i, code in enumerate(self.codes) if code == RESULT_CODES['draw']]
+            recurrent_draw = any(0 <= draw_indices[i] - draw_indices[i + 1] - 1 <= 3 for i in range(len(draw_indices) - 1))
+        draw_specifics = {
+            'draw_frequency_27': round((self.counts['draw'] / size) * 100, 2),
+            'time_since_last_draw': time_since_last_draw,
+            'draw_patterns': self.draw_patterns,
+            'recurrent_draw': recurrent_draw
+        }
+        break_probability = {'break_chance': round((self.breaks / (size - 1)) * 100, 2) if size >= 2 else 0}
+        return generate_advanced_suggestion(window, surf_analysis, {'streak': streak}, break_patterns, break_probability, draw_specifics, self.config,
+                                            self.transitions.analyze(self.config.markov_min_support), self.suffix_index.matches(self.config.suffix_min_occurrences, self.config.suffix_min_context), ledger)
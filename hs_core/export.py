@@ -0,0 +1,252 @@
+"""
+Exportação colunar das rodadas: cada resultado registrado, a sugestão que ele avaliou e a análise
+resultante (mesmo formato de `update_analysis`), achatados em registros tipados (ROUND_SCHEMA).
+
+`TableState.add_result` só enfileira referências em memória; uma thread de gravação achata os
+registros e os grava em lote, a cada `batch_size` rodadas ou `flush_interval` segundos, particionados
+por mesa e dia (UTC) no estilo Hive:
+
+    <diretório>/table=<mesa>/date=<AAAA-MM-DD>/part-<carimbo>-<n>.parquet   (PyArrow)
+    <diretório>/table=<mesa>/date=<AAAA-MM-DD>/rounds.csv                   (acrescentado a cada lote)
+
+Uma rodada só sai da fila depois que sua partição foi gravada; se a gravação falhar, ela volta para
+a fila e é tentada de novo no lote seguinte.
+
+A exportação é ativada no app definindo HS_EXPORT_DIR; HS_EXPORT_FORMAT escolhe 'parquet' (padrão,
+requer PyArrow) ou 'csv'.
+"""
+import atexit
+import collections
+import csv
+import datetime
+import functools
+import io
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+from .instrumentation import METRICS
+from .storage import sanitize_table_id
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.environ.get('HS_EXPORT_DIR', '')
+EXPORT_FORMAT = os.environ.get('HS_EXPORT_FORMAT', 'parquet') # 'parquet' ou 'csv'
+EXPORT_BATCH_SIZE = 4096 # Rodadas pendentes que antecipam a gravação
+EXPORT_FLUSH_INTERVAL = float(os.environ.get('HS_EXPORT_INTERVAL', '5')) # Segundos entre gravações
+
+# (coluna, tipo): 'timestamp', 'str', 'int', 'float' ou 'bool'. Todas aceitam nulo: as rodadas
+# registradas em lote (TableState.add_results) só têm a análise calculada na última.
+ROUND_SCHEMA = (
+    ('recorded_at', 'timestamp'),
+    ('table', 'str'),
+    ('round', 'int'), # Posição absoluta do resultado no histórico da mesa (0 = primeiro)
+    ('result', 'str'),
+    ('previous_bet_type', 'str'), # Sugestão vigente antes do resultado, avaliada por ele
+    ('previous_confidence', 'int'),
+    ('previous_guarantee_pattern', 'str'),
+    ('previous_hit', 'bool'), # Nulo quando não havia sugestão
+    ('guarantee_failed', 'bool'),
+    ('home', 'int'),
+    ('away', 'int'),
+    ('draw', 'int'),
+    ('window_total', 'int'),
+    ('home_sequence', 'int'),
+    ('away_sequence', 'int'),
+    ('draw_sequence', 'int'),
+    ('max_home_sequence', 'int'),
+    ('max_away_sequence', 'int'),
+    ('max_draw_sequence', 'int'),
+    ('current_color', 'str'),
+    ('streak', 'int'),
+    ('color_pattern_27', 'str'),
+    ('break_chance', 'float'),
+    ('last_break_type', 'str'),
+    ('draw_frequency_27', 'float'),
+    ('time_since_last_draw', 'int'),
+    ('break_patterns', 'str'), # JSON {padrão: ocorrências}
+    ('draw_patterns', 'str'),
+    ('markov_order', 'int'),
+    ('markov_context', 'str'),
+    ('markov_support', 'int'),
+    ('markov_home', 'float'),
+    ('markov_away', 'float'),
+    ('markov_draw', 'float'),
+    ('match_length', 'int'),
+    ('match_occurrences', 'int'),
+    ('bet_type', 'str'),
+    ('confidence', 'int'),
+    ('guarantee_pattern', 'str'),
+    ('suggestion', 'str'),
+    ('reason', 'str'),
+)
+ROUND_COLUMNS = tuple(name for name, _ in ROUND_SCHEMA)
+_ANALYSIS_COLUMNS = len(ROUND_SCHEMA) - ROUND_COLUMNS.index('home')
+
+@functools.lru_cache(maxsize=None) # Poucas chaves possíveis (famílias x cores); formatar cada uma é caro
+def _pattern_label(key):
+    return str(key)
+
+_encode_json = json.JSONEncoder(ensure_ascii=False, sort_keys=True).encode
+
+def _patterns_json(patterns):
+    return _encode_json({_pattern_label(key): count for key, count in patterns.items()})
+
+def round_record(table_id, round_number, recorded_at, result, previous, hit, guarantee_failed, analysis):
+    """
+    Achata uma rodada em uma tupla na ordem de ROUND_SCHEMA. `previous` é (bet_type, confiança,
+    padrão de garantia) da sugestão vigente antes do resultado; `analysis` pode ser None.
+    """
+    head = (datetime.datetime.fromtimestamp(recorded_at, datetime.timezone.utc), table_id, round_number, result,
+            *previous, hit, guarantee_failed)
+    if analysis is None:
+        return head + (None,) * _ANALYSIS_COLUMNS
+    stats, surf, colors = analysis['stats'], analysis['surf_analysis'], analysis['color_analysis']
+    breaks, draws, transitions = analysis['break_probability'], analysis['draw_specifics'], analysis['transitions']
+    matches, suggestion = analysis['history_matches'], analysis['suggestion']
+    probabilities = transitions['probabilities']
+    return head + (
+        stats['home'], stats['away'], stats['draw'], stats['total'],
+        surf['home_sequence'], surf['away_sequence'], surf['draw_sequence'],
+        surf['max_home_sequence'], surf['max_away_sequence'], surf['max_draw_sequence'],
+        colors['current_color'], colors['streak'], colors['color_pattern_27'],
+        float(breaks['break_chance']), breaks['last_break_type'],
+        float(draws['draw_frequency_27']), draws['time_since_last_draw'],
+        _patterns_json(analysis['break_patterns']), _patterns_json(draws['draw_patterns']),
+        transitions['order'], transitions['context'], transitions['support'],
+        float(probabilities['home']), float(probabilities['away']), float(probabilities['draw']),
+        matches['length'], matches['occurrences'],
+        suggestion['bet_type'], suggestion['confidence'], suggestion['guarantee_pattern'],
+        suggestion['suggestion'], suggestion['reason'],
+    )
+
+def _arrow_schema(pa):
+    types = {'timestamp': pa.timestamp('ms', tz='UTC'), 'str': pa.string(), 'int': pa.int64(),
+             'float': pa.float64(), 'bool': pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in ROUND_SCHEMA])
+
+
+class SnapshotExporter:
+    """
+    Fila em memória das rodadas de todas as mesas e a thread que as grava em lote.
+    `record` custa um acréscimo a uma deque; achatar e gravar acontece fora da thread de quem registra.
+    """
+
+    def __init__(self, directory=EXPORT_DIR or '.hs_export', format=EXPORT_FORMAT, batch_size=EXPORT_BATCH_SIZE,
+                 flush_interval=EXPORT_FLUSH_INTERVAL):
+        if format not in ('parquet', 'csv'):
+            raise ValueError(f"Formato de exportação desconhecido: {format!r} (use 'parquet' ou 'csv').")
+        if format == 'parquet':
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError as exc: # PyArrow é opcional: sem ele, use o formato CSV
+                raise ImportError("A exportação em Parquet requer a biblioteca PyArrow instalada; use HS_EXPORT_FORMAT=csv.") from exc
+            self._pa, self._schema = pyarrow, _arrow_schema(pyarrow)
+        self.directory = directory
+        self.format = format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {'written': 0, 'files': 0, 'flushes': 0, 'errors': 0, 'last_error': ''}
+        self._pending = collections.deque()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event() # Interrompe a espera entre tentativas após uma falha
+        self._closed = False
+        self._parts = 0
+        self._thread = threading.Thread(target=self._run, name='hs-export', daemon=True)
+        self._thread.start()
+        atexit.register(self.close) # As rodadas pendentes são gravadas também no encerramento do processo
+
+    def record(self, table_id, round_number, result, previous, hit, guarantee_failed, analysis):
+        """Enfileira uma rodada; `analysis` (dicionário de snapshot, nunca alterado depois) é guardado por referência."""
+        self._pending.append((table_id, round_number, time.time(), result, previous, hit, guarantee_failed, analysis))
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:
+                # Falha de gravação (disco cheio, permissão...): as rodadas não gravadas voltaram para a
+                # fila; a próxima tentativa espera o intervalo, mesmo que a fila encha antes
+                self.stats['errors'] += 1
+                self.stats['last_error'] = f"{type(exc).__name__}: {exc}"
+                logger.warning("Falha ao exportar rodadas (%d pendentes): %s", len(self._pending), self.stats['last_error'])
+                self._stop.wait(self.flush_interval)
+
+    def flush(self):
+        """
+        Grava agora todas as rodadas pendentes; retorna quantas foram gravadas. Se a gravação de uma
+        partição falhar, ela e as seguintes voltam para o início da fila, na ordem original, e o erro é propagado.
+        """
+        with self._flush_lock:
+            pending = self._pending
+            partitions = collections.defaultdict(list)
+            for index in range(len(pending)): # Só o que já estava na fila; novas rodadas ficam para o próximo lote
+                entry = pending.popleft()
+                day = datetime.datetime.fromtimestamp(entry[2], datetime.timezone.utc).date().isoformat()
+                partitions[(entry[0], day)].append((index, entry))
+            written = 0
+            try:
+                for table_id, day in list(partitions):
+                    entries = partitions[(table_id, day)]
+                    self._write(os.path.join(self.directory, f'table={sanitize_table_id(table_id)}', f'date={day}'),
+                                [round_record(*entry) for _, entry in entries])
+                    written += len(entries)
+                    del partitions[(table_id, day)] # Só sai da fila depois de gravada
+            finally:
+                if partitions: # Não gravadas: voltam antes das rodadas enfileiradas durante a gravação
+                    unwritten = sorted(itertools.chain.from_iterable(partitions.values()))
+                    pending.extendleft(entry for _, entry in reversed(unwritten))
+                if written:
+                    self.stats['written'] += written
+                    self.stats['flushes'] += 1
+                    if METRICS.enabled:
+                        METRICS.count('export_rows', written)
+            return written
+
+    def _write(self, directory, records):
+        os.makedirs(directory, exist_ok=True)
+        if self.format == 'csv':
+            path = os.path.join(directory, 'rounds.csv')
+            new_file = not os.path.exists(path)
+            buffer = io.StringIO() # Montado antes e acrescentado em uma única escrita, para o lote não ficar pela metade
+            writer = csv.writer(buffer)
+            if new_file:
+                writer.writerow(ROUND_COLUMNS)
+            writer.writerows((record[0].isoformat(timespec='milliseconds'),) + record[1:] for record in records)
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                f.write(buffer.getvalue())
+            if new_file:
+                self.stats['files'] += 1
+            return
+        columns = {name: list(values) for name, values in zip(ROUND_COLUMNS, zip(*records))}
+        table = self._pa.Table.from_pydict(columns, schema=self._schema)
+        self._parts += 1
+        name = f'part-{time.strftime("%Y%m%dT%H%M%S", time.gmtime())}-{os.getpid()}-{self._parts}.parquet'
+        temporary = os.path.join(directory, f'.{name}.tmp') # Arquivos ocultos são ignorados pelos leitores de partições
+        self._pa.parquet.write_table(table, temporary)
+        os.replace(temporary, os.path.join(directory, name))
+        self.stats['files'] += 1
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def close(self):
+        """Encerra a thread de gravação e grava o que ainda estiver pendente."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
@@ -0,0 +1,223 @@
+"""Histórico de resultados em buffer circular uint8 (índice 0 = resultado mais recente)."""
+import abc
+import array
+import collections.abc
+
+from .config import MAX_HISTORY_TO_STORE
+from .runs import RunLengthEncoding
+
+RESULT_TYPES = ('home', 'away', 'draw') # Código uint8 de cada resultado = índice nesta tupla
+RESULT_CODES = {result: code for code, result in enumerate(RESULT_TYPES)}
+
+class _HistorySequence(collections.abc.Sequence):
+    """Interface de sequência comum ao histórico e às suas visões (índice 0 = resultado mais recente)."""
+
+    @abc.abstractmethod
+    def _codes(self):
+        """Gera os códigos uint8 em ordem (mais recente primeiro)."""
+
+    @abc.abstractmethod
+    def _code_at(self, index):
+        """Código uint8 da posição `index` (0 <= index < len(self))."""
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return HistoryView(self, start, max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice fora do histórico")
+        return RESULT_TYPES[self._code_at(index)]
+
+    def __iter__(self):
+        for code in self._codes():
+            yield RESULT_TYPES[code]
+
+    def __contains__(self, result):
+        return self.count(result) > 0
+
+    def count(self, result):
+        code = RESULT_CODES.get(result)
+        if code is None:
+            return 0
+        return sum(1 for c in self._codes() if c == code)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, _HistorySequence)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class ResultHistory(_HistorySequence):
+    """
+    Histórico de resultados em um buffer circular de capacidade fixa (um byte por resultado).
+
+    `append` insere o resultado mais recente em O(1) e descarta o mais antigo quando a
+    capacidade é atingida, substituindo o antigo `insert(0, ...)` seguido de fatiamento.
+    O índice 0 é sempre o resultado mais recente, como na lista original, e fatias como
+    `history[:NUM_RECENT_RESULTS_FOR_ANALYSIS]` retornam visões sem cópia.
+    Ao lado dos códigos, `runs` mantém a codificação por sequências (RunLengthEncoding, 4 bytes por
+    sequência), também atualizada em O(1) a cada acréscimo, `pop` (inverso de `append`) ou `replace`,
+    lida pelos analisadores de surf, cores e quebras e pelo IncrementalAnalyzer, que é dono do histórico
+    de cada mesa: a codificação existe uma única vez.
+    """
+
+    def __init__(self, capacity=MAX_HISTORY_TO_STORE, results=()):
+        if capacity < 1:
+            raise ValueError("A capacidade do histórico deve ser de pelo menos 1 resultado.")
+        self.capacity = capacity
+        self._buffer = array.array('B', bytes(capacity))
+        self._head = 0 # Próxima posição de escrita
+        self._size = 0
+        self._runs = RunLengthEncoding()
+        for result in reversed(list(results)[:capacity]):
+            self.append(result)
+
+    @classmethod
+    def from_codes(cls, codes, capacity=MAX_HISTORY_TO_STORE):
+        """Cria o histórico de uma vez a partir de códigos uint8 (mais antigo primeiro), sem acréscimos um a um."""
+        history = cls(capacity)
+        codes = bytes(codes[-capacity:])
+        history._buffer[:len(codes)] = array.array('B', codes)
+        history._head = len(codes) % capacity
+        history._size = len(codes)
+        history._runs = RunLengthEncoding.from_codes(codes)
+        return history
+
+    @property
+    def runs(self):
+        return self._runs
+
+    def append(self, result):
+        """Adiciona o resultado mais recente (equivalente a `insert(0, result)` + limite de tamanho)."""
+        code = RESULT_CODES[result]
+        self._buffer[self._head] = code
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._runs.drop_oldest() # O mais antigo acabou de ser sobrescrito
+        self._runs.push(code)
+
+    def pop(self, restore=None):
+        """
+        Remove e retorna o resultado mais recente, desfazendo o último `append`. Se aquele acréscimo
+        descartou o resultado mais antigo (histórico cheio), `restore` é o código dele, devolvido ao buffer.
+        """
+        if not self._size:
+            raise IndexError("histórico vazio")
+        self._head = (self._head - 1) % self.capacity
+        result = RESULT_TYPES[self._buffer[self._head]]
+        self._runs.pop()
+        if restore is None:
+            self._size -= 1
+        else: # A posição liberada é a que o resultado mais antigo ocupava
+            self._buffer[self._head] = restore
+            self._runs.push_oldest(restore)
+        return result
+
+    def replace(self, index, result):
+        """Substitui o resultado na posição `index` (0 = mais recente)."""
+        if not 0 <= index < self._size:
+            raise IndexError("índice fora do histórico")
+        self._buffer[(self._head - 1 - index) % self.capacity] = RESULT_CODES[result]
+        self._runs.replace(self._size - 1 - index, RESULT_CODES[result])
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+        self._runs = RunLengthEncoding()
+
+    def __len__(self):
+        return self._size
+
+    def _code_at(self, index):
+        return self._buffer[(self._head - 1 - index) % self.capacity]
+
+    def _segments(self, start, stop):
+        """Trechos contíguos do buffer (do mais recente para o mais antigo) que cobrem [start, stop)."""
+        if start >= stop:
+            return []
+        first = (self._head - 1 - start) % self.capacity # Posição física do índice `start`
+        length = stop - start
+        if length <= first + 1:
+            return [(first - length + 1, first + 1)]
+        return [(0, first + 1), (self.capacity - (length - first - 1), self.capacity)]
+
+    def _codes(self, start=0, stop=None):
+        stop = self._size if stop is None else stop
+        buffer = self._buffer
+        for begin, end in self._segments(start, stop):
+            for position in range(end - 1, begin - 1, -1):
+                yield buffer[position]
+
+    def _count_codes(self, code, start, stop):
+        view = memoryview(self._buffer)
+        return sum(view[begin:end].tobytes().count(code) for begin, end in self._segments(start, stop))
+
+    def count(self, result):
+        code = RESULT_CODES.get(result)
+        return 0 if code is None else self._count_codes(code, 0, self._size)
+
+    def to_numpy(self, start=0, stop=None):
+        """Copia o intervalo [start, stop) para um array NumPy uint8, mais recente primeiro."""
+        import numpy as np
+
+        stop = self._size if stop is None else min(stop, self._size)
+        buffer = np.frombuffer(self._buffer, dtype=np.uint8)
+        segments = [buffer[begin:end][::-1] for begin, end in self._segments(start, stop)]
+        if not segments:
+            return np.empty(0, dtype=np.uint8)
+        return np.concatenate(segments)
+
+    def to_bytes(self, start=0, stop=None):
+        """
+        Códigos do intervalo [start, stop) (índice 0 = mais recente) como bytes, do mais antigo para o mais
+        recente; sem argumentos, o histórico inteiro no formato de encode_history.
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        view = memoryview(self._buffer)
+        return b''.join(view[begin:end] for begin, end in reversed(self._segments(start, stop)))
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos resultados armazenados e pelas suas sequências."""
+        return self._buffer.itemsize * self.capacity + self._runs.nbytes
+
+
+class HistoryView(_HistorySequence):
+    """Visão sem cópia de um intervalo do histórico, no mesmo sentido (mais recente primeiro)."""
+
+    def __init__(self, history, start, stop):
+        if isinstance(history, HistoryView):
+            start, stop = history._start + start, history._start + stop
+            history = history._history
+        self._history = history
+        self._start = start
+        self._stop = min(stop, len(history))
+
+    def __len__(self):
+        return max(0, min(self._stop, len(self._history)) - self._start)
+
+    def _code_at(self, index):
+        return self._history._code_at(self._start + index)
+
+    def _codes(self):
+        return self._history._codes(self._start, self._start + len(self))
+
+    def count(self, result):
+        code = RESULT_CODES.get(result)
+        return 0 if code is None else self._history._count_codes(code, self._start, self._start + len(self))
+
+
+def encode_history(results):
+    """Codifica um histórico (mais recente primeiro) em bytes, do mais antigo para o mais recente."""
+    if isinstance(results, ResultHistory):
+        return results.to_bytes()
+    return bytes(map(RESULT_CODES.__getitem__, reversed(results)))
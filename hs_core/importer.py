@@ -0,0 +1,110 @@
+"""Importação em lote de resultados a partir de CSV ou texto, lida em partes."""
+import csv
+import io
+import re
+
+from .config import MAX_HISTORY_TO_STORE, get_color_emoji
+
+_IMPORT_WORDS = {
+    'home': 0, 'casa': 0, 'red': 0, 'vermelho': 0,
+    'away': 1, 'visitante': 1, 'fora': 1, 'blue': 1, 'azul': 1,
+    'draw': 2, 'empate': 2, 'yellow': 2, 'amarelo': 2,
+}
+# Letras de `color_pattern_27` (R, B, Y) e bolinhas de cor, aceitas também em sequência compacta ("RBYRRB...")
+_IMPORT_SYMBOLS = {'R': 0, 'B': 1, 'Y': 2, get_color_emoji('red'): 0, get_color_emoji('blue'): 1, get_color_emoji('yellow'): 2}
+_IMPORT_SYMBOL_TABLE = str.maketrans({symbol: chr(code) for symbol, code in _IMPORT_SYMBOLS.items()})
+_IMPORT_SEPARATORS = re.compile(r'[\s,;|]+')
+_COMPACT_TOKEN = re.compile('[' + ''.join(_IMPORT_SYMBOLS) + ']+')
+IMPORT_CHUNK_SIZE = 1 << 16 # Caracteres lidos por vez
+
+class ImportFormatError(ValueError):
+    """Arquivo de importação incompatível com o pedido (ex.: coluna ausente no cabeçalho do CSV)."""
+
+
+def _token_codes(token):
+    """Códigos de um token (palavra, letra ou sequência compacta); None se o token não for reconhecido."""
+    code = _IMPORT_WORDS.get(token.lower())
+    if code is not None:
+        return bytes((code,))
+    token = token.upper()
+    if _COMPACT_TOKEN.fullmatch(token):
+        return token.translate(_IMPORT_SYMBOL_TABLE).encode('latin-1')
+    return None
+
+def _iter_tokens(source, column=None):
+    """Lê `source` (arquivo de texto ou string) aos poucos e gera seus tokens, sem carregá-lo inteiro."""
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    if column is not None:
+        reader = csv.reader(source)
+        index = column
+        for row in reader:
+            if isinstance(column, str) and index == column: # Primeira linha é o cabeçalho
+                headers = [name.strip() for name in row]
+                if column not in headers:
+                    raise ImportFormatError(f"Coluna {column!r} não encontrada no cabeçalho do CSV; "
+                                            f"colunas disponíveis: {', '.join(map(repr, headers)) or 'nenhuma'}.")
+                index = headers.index(column)
+                continue
+            if index < len(row):
+                yield row[index].strip()
+        return
+    pending = ''
+    while True:
+        chunk = source.read(IMPORT_CHUNK_SIZE)
+        if not chunk:
+            break
+        tokens = _IMPORT_SEPARATORS.split(pending + chunk)
+        pending = tokens.pop() # O último token pode continuar no próximo trecho
+        yield from tokens
+    yield pending
+
+def parse_results(source, newest_first=False, column=None, stats=None):
+    """
+    Converte texto em lotes de códigos uint8 em ordem cronológica (mais antigo primeiro).
+
+    Aceita CSV (todas as células ou apenas `column`, por índice ou nome do cabeçalho), uma
+    palavra por linha (home/away/draw, casa/visitante/empate, red/blue/yellow) ou sequências
+    compactas como `RBYRRB` (as letras de `color_pattern_27`). Tokens não reconhecidos, como
+    cabeçalhos ou datas, são ignorados e contados em `stats['skipped']`. Se `column` for um nome
+    ausente do cabeçalho, levanta ImportFormatError com as colunas disponíveis.
+    Com `newest_first=True` (ex.: um `color_pattern_27` colado) a ordem é invertida, o que exige
+    guardar os códigos (1 byte por resultado) até o fim da leitura.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('skipped', 0)
+    batch = bytearray()
+    for token in _iter_tokens(source, column):
+        if not token:
+            continue
+        codes = _token_codes(token)
+        if codes is None:
+            stats['skipped'] += 1
+            continue
+        batch += codes
+        if not newest_first and len(batch) >= IMPORT_CHUNK_SIZE:
+            yield bytes(batch)
+            batch.clear()
+    if newest_first:
+        batch.reverse()
+    if batch:
+        yield bytes(batch)
+
+def import_results(source, store, capacity=MAX_HISTORY_TO_STORE, newest_first=False, column=None, stats=None):
+    """
+    Importa resultados de `source` para o armazenamento `store` em lotes e retorna
+    {'imported', 'skipped', 'tail'}, onde `tail` são os últimos `capacity` códigos importados
+    (mais antigo primeiro), suficientes para reconstruir a análise uma única vez ao final.
+    Com `stats` (dict), essas chaves são atualizadas a cada lote gravado: se a leitura falhar no meio
+    (ex.: UnicodeDecodeError), quem chama sabe quais resultados já chegaram ao armazenamento.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(imported=0, skipped=0, tail=b'')
+    tail = bytearray()
+    for codes in parse_results(source, newest_first, column, stats):
+        store.append_codes(codes)
+        stats['imported'] += len(codes)
+        tail += codes
+        del tail[:-capacity]
+        stats['tail'] = bytes(tail)
+    return stats
@@ -0,0 +1,347 @@
+"""
+Ingestão assíncrona de resultados por HTTP (asyncio, sem dependências externas).
+
+Protocolo (HTTP/1.1 com keep-alive, corpo JSON):
+    POST /events          {"table": "mesa1", "result": "home"} ou uma lista desses objetos.
+                          `result` aceita os mesmos tokens da importação em lote (home, casa, R, RBY...).
+                          202 {"accepted": n}; 400 se algum evento for inválido (nada é aceito);
+                          503 {"accepted": n, "rejected": m} com Retry-After quando a fila da mesa está cheia
+                          ou o lote atual dela está falhando; com "error" se a mesa não pôde ser aberta.
+    GET  /tables/<id>     Resumo atual da mesa (TableState.summary); 404 se ela não está aberta nem gravada.
+    GET  /stats           Filas, eventos aceitos/recusados, lotes e latência da ingestão até a nova sugestão.
+
+Cada mesa é aberta (TableRegistry.future) antes de o primeiro evento dela ser aceito: se a abertura
+falha (ex.: armazenamento travado por outro processo), o erro vai para o log e os eventos são recusados
+com 503, e o próximo envio tenta abrir a mesa de novo. Aberta, a mesa ganha uma fila limitada e uma
+tarefa consumidora: os eventos acumulados enquanto o lote
+anterior é processado formam o próximo lote, aplicado de uma vez (TableState.add_results) no pool
+do TableRegistry. Com a fila cheia, o produtor espera até INGEST_PUT_TIMEOUT e depois recebe 503.
+Um lote que falha (ex.: erro de gravação) é registrado no log e aplicado de novo, com espera
+crescente, até INGEST_RETRIES vezes; enquanto isso a mesa recusa novos eventos com 503, para que
+nenhum 202 seja dado a eventos que ainda podem ser descartados. Esgotadas as tentativas, o lote é
+descartado com um erro no log e contado em `dropped`.
+As sessões Streamlit que acompanham a mesa veem a nova versão na próxima verificação (ver HS.py).
+O serviço não tem autenticação e escuta só em 127.0.0.1; expô-lo à rede (HS_INGEST_HOST=0.0.0.0 ou
+--host 0.0.0.0) é uma escolha explícita, de preferência atrás de um proxy que autentique os produtores.
+
+Uso fora do Streamlit (teste local com um produtor simulado):
+    python -m hs_core.ingest serve --port 8600
+    python -m hs_core.ingest produce --url http://127.0.0.1:8600 --tables 20 --rate 5000 --seconds 10
+"""
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+from .history import RESULT_TYPES
+from .importer import _token_codes
+from .instrumentation import METRICS
+from .storage import sanitize_table_id
+
+INGEST_PORT = int(os.environ.get('HS_INGEST_PORT') or 8600)
+# Sem autenticação: só a própria máquina por padrão; HS_INGEST_HOST=0.0.0.0 expõe a ingestão à rede
+INGEST_HOST = os.environ.get('HS_INGEST_HOST', '127.0.0.1')
+INGEST_QUEUE_SIZE = int(os.environ.get('HS_INGEST_QUEUE_SIZE', '4096')) # Eventos pendentes por mesa
+INGEST_BATCH_MAX = 1024 # Eventos aplicados por lote, no máximo
+INGEST_PUT_TIMEOUT = 0.25 # Segundos de espera com a fila cheia antes de recusar o evento
+INGEST_MAX_BODY = 1 << 20
+INGEST_RETRIES = int(os.environ.get('HS_INGEST_RETRIES', '5')) # Novas tentativas de um lote que falhou
+INGEST_RETRY_DELAY = 0.1 # Segundos antes da primeira nova tentativa; dobra a cada falha
+INGEST_LATENCY_SAMPLES = 4096 # Latências recentes mantidas para os percentis de /stats
+INGEST_REFRESH_SECONDS = float(os.environ.get('HS_INGEST_REFRESH', '1')) # Verificação de novas versões nas sessões Streamlit
+
+_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+logger = logging.getLogger(__name__)
+
+class IngestError(ValueError):
+    """Evento inválido recebido pela ingestão."""
+
+class TableUnavailable(RuntimeError):
+    """A mesa de um evento não pôde ser aberta; nenhum evento dela foi aceito."""
+
+
+def parse_events(payload):
+    """Valida eventos já decodificados do JSON; retorna {table_id: bytes de códigos} na ordem recebida."""
+    events = payload if isinstance(payload, list) else [payload]
+    batches = collections.defaultdict(bytearray)
+    for position, event in enumerate(events):
+        if not isinstance(event, dict):
+            raise IngestError(f"evento {position}: esperado um objeto JSON.")
+        table_id, result = event.get('table'), event.get('result')
+        if not isinstance(table_id, str) or not table_id.strip():
+            raise IngestError(f"evento {position}: 'table' ausente ou vazio.")
+        codes = _token_codes(result.strip()) if isinstance(result, str) else None
+        if not codes:
+            raise IngestError(f"evento {position}: resultado inválido {result!r}.")
+        batches[sanitize_table_id(table_id.strip())] += codes
+    return {table_id: bytes(codes) for table_id, codes in batches.items()}
+
+
+class IngestService:
+    """
+    Filas por mesa e consumidores que aplicam os eventos em lote no TableRegistry.
+    Todos os métodos assíncronos rodam no mesmo laço de eventos.
+    """
+
+    def __init__(self, registry, queue_size=INGEST_QUEUE_SIZE, batch_max=INGEST_BATCH_MAX, put_timeout=INGEST_PUT_TIMEOUT,
+                 retries=INGEST_RETRIES, retry_delay=INGEST_RETRY_DELAY):
+        self.registry = registry
+        self.queue_size = queue_size
+        self.batch_max = batch_max
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queues = {}
+        self._consumers = {}
+        self._failing = set() # Mesas cujo lote atual falhou e ainda está sendo tentado de novo
+        self._latencies = collections.deque(maxlen=INGEST_LATENCY_SAMPLES)
+        self.stats = {'accepted': 0, 'rejected': 0, 'applied': 0, 'batches': 0, 'errors': 0, 'dropped': 0}
+
+    async def _queue(self, table_id):
+        """Fila da mesa, abrindo-a antes na primeira vez; TableUnavailable se a abertura falhar."""
+        queue = self._queues.get(table_id)
+        if queue is None:
+            try:
+                table = await asyncio.wrap_future(self.registry.future(table_id))
+            except Exception as exc:
+                logger.exception("Mesa %s: falha ao abrir; eventos recusados.", table_id)
+                self.stats['errors'] += 1
+                raise TableUnavailable(f"mesa {table_id} indisponível: {exc}") from exc
+            queue = self._queues.get(table_id) # Outro envio pode ter aberto a mesa durante a espera
+            if queue is None:
+                queue = self._queues[table_id] = asyncio.Queue(self.queue_size)
+                self._consumers[table_id] = asyncio.get_running_loop().create_task(self._consume(table_id, table, queue))
+        return queue
+
+    async def submit(self, table_id, codes):
+        """
+        Enfileira os códigos de uma mesa, em ordem; retorna quantos foram aceitos antes de a fila encher.
+        Se a mesa não pôde ser aberta, recusa todos e levanta TableUnavailable.
+        """
+        try:
+            queue = await self._queue(table_id)
+        except TableUnavailable:
+            self.stats['rejected'] += len(codes)
+            raise
+        if table_id in self._failing: # Só volta a aceitar eventos quando o lote atual for aplicado ou descartado
+            self.stats['rejected'] += len(codes)
+            return 0
+        received = time.monotonic()
+        for accepted, code in enumerate(codes):
+            item = (code, received)
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                try:
+                    await asyncio.wait_for(queue.put(item), self.put_timeout)
+                except asyncio.TimeoutError:
+                    # Os eventos seguintes da mesa também são recusados, para não aplicá-los fora de ordem
+                    self.stats['accepted'] += accepted
+                    self.stats['rejected'] += len(codes) - accepted
+                    return accepted
+        self.stats['accepted'] += len(codes)
+        return len(codes)
+
+    async def _consume(self, table_id, table, queue):
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_max and not queue.empty():
+                batch.append(queue.get_nowait())
+            if not await self._apply(table_id, table, [RESULT_TYPES[code] for code, _ in batch]):
+                continue
+            latency = time.monotonic() - batch[0][1] # Evento mais antigo do lote até a sugestão atualizada
+            self._latencies.append(latency)
+            self.stats['applied'] += len(batch)
+            self.stats['batches'] += 1
+            if METRICS.enabled:
+                METRICS.record('ingest.latency', latency)
+                METRICS.count('ingest_events', len(batch))
+                METRICS.count('ingest_batches')
+
+    async def _apply(self, table_id, table, results):
+        """
+        Aplica um lote na mesa, tentando de novo após cada falha (add_results não altera a mesa quando
+        a gravação falha); retorna se o lote foi aplicado.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                await asyncio.wrap_future(self.registry.submit(table.add_results, results))
+            except Exception:
+                self.stats['errors'] += 1
+                self._failing.add(table_id)
+                if attempt == self.retries:
+                    logger.exception("Mesa %s: lote de %d eventos descartado após %d tentativas.", table_id, len(results), attempt + 1)
+                    self.stats['dropped'] += len(results)
+                    break
+                logger.warning("Mesa %s: falha ao aplicar lote de %d eventos (tentativa %d).", table_id, len(results),
+                               attempt + 1, exc_info=True)
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            else:
+                self._failing.discard(table_id)
+                return True
+        self._failing.discard(table_id)
+        return False
+
+    def snapshot(self):
+        """Contadores, profundidade das filas e percentis de latência (ms) dos lotes recentes."""
+        latencies = sorted(self._latencies)
+        percentile = lambda fraction: round(latencies[int(fraction * (len(latencies) - 1))] * 1000, 3) if latencies else 0
+        return {
+            **self.stats,
+            'mean_batch': round(self.stats['applied'] / self.stats['batches'], 2) if self.stats['batches'] else 0,
+            'latency_ms': {'p50': percentile(0.5), 'p99': percentile(0.99), 'max': percentile(1)},
+            'queues': {table_id: queue.qsize() for table_id, queue in sorted(self._queues.items())},
+        }
+
+    async def _route(self, method, path, body):
+        """Retorna (status, objeto JSON da resposta)."""
+        if path == '/events':
+            if method != 'POST':
+                return 405, {'error': "use POST"}
+            try:
+                batches = parse_events(json.loads(body))
+            except ValueError as exc: # JSON malformado (JSONDecodeError) ou IngestError
+                return 400, {'error': str(exc)}
+            accepted, errors = 0, []
+            for table_id, codes in batches.items():
+                try:
+                    accepted += await self.submit(table_id, codes)
+                except TableUnavailable as exc:
+                    errors.append(str(exc))
+            total = sum(map(len, batches.values()))
+            if accepted < total:
+                reply = {'accepted': accepted, 'rejected': total - accepted}
+                if errors:
+                    reply['error'] = "; ".join(errors)
+                return 503, reply
+            return 202, {'accepted': accepted}
+        if method != 'GET':
+            return 405, {'error': "use GET"}
+        if path == '/stats':
+            return 200, self.snapshot()
+        if path.startswith('/tables/') and len(path) > len('/tables/'):
+            table_id = urllib.parse.unquote(path[len('/tables/'):])
+            future = self.registry.lookup(table_id) # Uma leitura não cria a mesa
+            if future is None:
+                return 404, {'error': f"mesa desconhecida: {table_id}"}
+            table = await asyncio.wrap_future(future)
+            return 200, table.summary()
+        return 404, {'error': f"caminho desconhecido: {path}"}
+
+    async def handle(self, reader, writer):
+        """Atende uma conexão HTTP/1.1, com várias requisições em sequência (keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while (line := await reader.readline()).strip():
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > INGEST_MAX_BODY:
+                    status, reply = 413, {'error': f"corpo maior que {INGEST_MAX_BODY} bytes"}
+                else:
+                    status, reply = await self._route(method, path.split('?', 1)[0], await reader.readexactly(length))
+                payload = json.dumps(reply).encode()
+                retry = "Retry-After: 1\r\n" if status == 503 else ""
+                writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n{retry}\r\n".encode('latin-1') + payload)
+                await writer.drain()
+                if status == 413 or headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass # Conexão encerrada pelo cliente ou requisição malformada
+        finally:
+            writer.close()
+
+    async def serve(self, host=INGEST_HOST, port=INGEST_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def start_ingest_server(registry, port=INGEST_PORT, host=INGEST_HOST):
+    """Inicia a ingestão em um laço de eventos próprio, em uma thread de fundo; retorna o IngestService."""
+    service = IngestService(registry)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(asyncio.start_server(service.handle, host, port)) # Erros de porta aparecem aqui
+    threading.Thread(target=loop.run_forever, name='hs-ingest', daemon=True).start()
+    return service
+
+
+async def _request(reader, writer, method, path, payload=None):
+    """Requisição HTTP/1.1 mínima em uma conexão aberta; retorna (status, JSON da resposta)."""
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: hs\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()).strip():
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return status, json.loads(await reader.readexactly(int(headers['content-length'])))
+
+async def produce(url, tables=10, rate=1000, seconds=5.0, batch=100, seed=2024):
+    """
+    Produtor simulado: envia `rate` eventos por segundo, em requisições de `batch` eventos, para
+    `tables` mesas sorteadas. Eventos recusados por backpressure não são reenviados.
+    Retorna o total enviado/aceito e as estatísticas do serviço ao final.
+    """
+    from .benchmark import RESULT_WEIGHTS
+
+    target = urllib.parse.urlsplit(url)
+    reader, writer = await asyncio.open_connection(target.hostname, target.port or 80)
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    sent = accepted = 0
+    start = next_send = loop.time()
+    while loop.time() - start < seconds:
+        events = [{'table': f"mesa_{rng.randrange(tables)}", 'result': result}
+                  for result in rng.choices(RESULT_TYPES, weights=RESULT_WEIGHTS, k=batch)]
+        _, reply = await _request(reader, writer, 'POST', '/events', events)
+        sent += len(events)
+        accepted += reply.get('accepted', 0)
+        next_send += batch / rate
+        await asyncio.sleep(max(0, next_send - loop.time()))
+    elapsed = loop.time() - start
+    await asyncio.sleep(0.2) # Deixa os últimos lotes serem aplicados antes de ler as estatísticas
+    _, stats = await _request(reader, writer, 'GET', '/stats')
+    writer.close()
+    return {'sent': sent, 'accepted': accepted, 'events_per_second': round(sent / elapsed), 'service': stats}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão assíncrona de resultados do hs_core.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="Serviço de ingestão com um registro de mesas próprio.")
+    serve.add_argument('--host', default=INGEST_HOST, help="Interface de escuta; use 0.0.0.0 para aceitar conexões da rede.")
+    serve.add_argument('--port', type=int, default=INGEST_PORT)
+    producer = commands.add_parser('produce', help="Produtor simulado para testes de carga.")
+    producer.add_argument('--url', default=f"http://127.0.0.1:{INGEST_PORT}")
+    producer.add_argument('--tables', type=int, default=10)
+    producer.add_argument('--rate', type=float, default=1000, help="Eventos por segundo.")
+    producer.add_argument('--seconds', type=float, default=5.0)
+    producer.add_argument('--batch', type=int, default=100, help="Eventos por requisição.")
+    producer.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        from .tables import TableRegistry
+        asyncio.run(IngestService(TableRegistry()).serve(args.host, args.port))
+    else:
+        report = asyncio.run(produce(args.url, args.tables, args.rate, args.seconds, args.batch, args.seed))
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
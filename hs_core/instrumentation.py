@@ -0,0 +1,154 @@
+"""
+Instrumentação leve do caminho crítico: tempos por etapa e contadores.
+
+Desligada por padrão (ou com HS_INSTRUMENTATION=0), cada ponto instrumentado custa apenas a
+verificação de `METRICS.enabled`. Ligada, acumula contagem, soma, máximo e último tempo de cada
+etapa, além de contadores, exportáveis em JSON ou no formato texto do Prometheus.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+class Metrics:
+    """Registro de métricas do processo, compartilhado por todas as sessões."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {} # etapa -> [contagem, soma (s), máximo (s), último (s)]
+            self.counters = {} # nome -> valor
+
+    def record(self, stage, seconds):
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                self.stages[stage] = [1, seconds, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[3] = seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        """Cópia das métricas: {'stages': {etapa: {...}}, 'counters': {...}}, tempos em milissegundos."""
+        with self._lock:
+            stages = {
+                stage: {
+                    'count': count,
+                    'total_ms': round(total * 1000, 3),
+                    'mean_ms': round(total / count * 1000, 3),
+                    'max_ms': round(maximum * 1000, 3),
+                    'last_ms': round(last * 1000, 3),
+                }
+                for stage, (count, total, maximum, last) in sorted(self.stages.items())
+            }
+            return {'enabled': self.enabled, 'stages': stages, 'counters': dict(sorted(self.counters.items()))}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Métricas no formato de exposição texto do Prometheus."""
+        with self._lock:
+            stages = sorted(self.stages.items())
+            counters = sorted(self.counters.items())
+        lines = [
+            '# HELP hs_stage_seconds Tempo gasto por etapa instrumentada.',
+            '# TYPE hs_stage_seconds summary',
+        ]
+        for stage, (count, total, _, _) in stages:
+            lines.append(f'hs_stage_seconds_count{{stage="{stage}"}} {count}')
+            lines.append(f'hs_stage_seconds_sum{{stage="{stage}"}} {total:.9f}')
+        lines += ['# HELP hs_stage_seconds_max Maior tempo observado por etapa.', '# TYPE hs_stage_seconds_max gauge']
+        for stage, (_, _, maximum, _) in stages:
+            lines.append(f'hs_stage_seconds_max{{stage="{stage}"}} {maximum:.9f}')
+        lines += ['# HELP hs_events_total Contadores de padrões e regras.', '# TYPE hs_events_total counter']
+        for name, value in counters:
+            lines.append(f'hs_events_total{{name="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics(enabled=os.environ.get('HS_INSTRUMENTATION', '0') == '1')
+
+
+class _Timer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        METRICS.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def timed(stage):
+    """Contexto que mede o bloco como `stage`; sem custo de medição quando a instrumentação está desligada."""
+    if not METRICS.enabled:
+        return _NULL_CONTEXT
+    return _Timer(stage)
+
+
+def instrumented(stage):
+    """Decorador equivalente a `timed` para uma função inteira."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                METRICS.record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# Só a própria máquina por padrão; HS_METRICS_HOST=0.0.0.0 expõe as métricas à rede
+METRICS_HOST = os.environ.get('HS_METRICS_HOST', '127.0.0.1')
+
+def start_metrics_server(port, host=METRICS_HOST):
+    """Serve /metrics (Prometheus) e /metrics.json em uma thread de fundo; retorna o servidor."""
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = METRICS.to_prometheus(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, content_type = METRICS.to_json(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='hs-metrics', daemon=True).start()
+    return server
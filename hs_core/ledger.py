@@ -0,0 +1,142 @@
+"""
+Livro de garantias: o desempenho de cada padrão de garantia nas sugestões verificadas.
+
+Cada sugestão com confiança >= `guarantee_confidence` verificada em TableState.add_result é
+registrada para cada padrão que a compõe (as partes de `guarantee_pattern`, separadas por " | ").
+Cada padrão ganha um índice na primeira vez em que aparece. Contadores de toda a vida e da janela
+móvel ficam em arrays indexados por ele, e os últimos `window` resultados de cada padrão ficam em
+um anel de bytes. Registrar custa O(1) por padrão, e o conjunto `failing` (padrões cuja taxa móvel
+está abaixo do mínimo) fica sempre pronto para o gerador de sugestões.
+"""
+import array
+
+from .config import DEFAULT_CONFIG
+
+GUARANTEE_SEPARATOR = " | " # Como `final_guarantee` é montado em generate_advanced_suggestion
+
+class GuaranteeLedger:
+    """Acertos e falhas de cada padrão de garantia: total, janela móvel e sequência atual de falhas."""
+
+    def __init__(self, window=DEFAULT_CONFIG.ledger_window, min_trials=DEFAULT_CONFIG.ledger_min_trials,
+                 min_hit_rate=DEFAULT_CONFIG.ledger_min_hit_rate):
+        self.window = window
+        self.min_trials = min_trials
+        self.min_hit_rate = min_hit_rate
+        self.clear()
+
+    @classmethod
+    def from_config(cls, config=DEFAULT_CONFIG):
+        return cls(config.ledger_window, config.ledger_min_trials, config.ledger_min_hit_rate)
+
+    def clear(self):
+        self.slots = {} # Rótulo do padrão -> índice nos arrays
+        self.labels = [] # Índice -> rótulo
+        self.trials = array.array('I')
+        self.hits = array.array('I')
+        self.window_trials = array.array('I')
+        self.window_hits = array.array('I')
+        self.failure_streak = array.array('I')
+        self.max_failure_streak = array.array('I')
+        self._positions = array.array('I') # Próxima posição de escrita no anel de cada padrão
+        self._outcomes = bytearray() # `window` bytes por padrão: 1 = acerto
+        self._label_cache = {} # PatternKey -> rótulo (formatar a chave é caro)
+        self.failing = set() # Rótulos dos padrões em falha na janela móvel
+        self.rounds = 0 # Sugestões registradas
+
+    def copy(self):
+        """Cópia independente do livro (TableState guarda uma antes de cada registro, para desfazê-lo)."""
+        ledger = GuaranteeLedger(self.window, self.min_trials, self.min_hit_rate)
+        ledger.slots = dict(self.slots)
+        ledger.labels = list(self.labels)
+        for name in ('trials', 'hits', 'window_trials', 'window_hits', 'failure_streak', 'max_failure_streak', '_positions'):
+            setattr(ledger, name, array.array('I', getattr(self, name)))
+        ledger._outcomes = bytearray(self._outcomes)
+        ledger._label_cache = self._label_cache # Só cache de formatação: pode ser compartilhado
+        ledger.failing = set(self.failing)
+        ledger.rounds = self.rounds
+        return ledger
+
+    def _slot(self, label):
+        slot = self.slots.get(label)
+        if slot is None:
+            slot = self.slots[label] = len(self.labels)
+            self.labels.append(label)
+            for counter in (self.trials, self.hits, self.window_trials, self.window_hits, self.failure_streak,
+                            self.max_failure_streak, self._positions):
+                counter.append(0)
+            self._outcomes += bytes(self.window)
+        return slot
+
+    def record(self, guarantee_pattern, hit):
+        """Registra o resultado (acerto ou falha) de uma sugestão verificada em cada um dos seus padrões."""
+        hit = int(bool(hit))
+        window = self.window
+        self.rounds += 1
+        for label in guarantee_pattern.split(GUARANTEE_SEPARATOR):
+            slot = self._slot(label)
+            self.trials[slot] += 1
+            self.hits[slot] += hit
+            if hit:
+                self.failure_streak[slot] = 0
+            else:
+                streak = self.failure_streak[slot] = self.failure_streak[slot] + 1
+                if streak > self.max_failure_streak[slot]:
+                    self.max_failure_streak[slot] = streak
+
+            position = self._positions[slot]
+            cell = slot * window + position
+            if self.window_trials[slot] == window: # Anel cheio: sai o resultado mais antigo da janela
+                self.window_hits[slot] -= self._outcomes[cell]
+            else:
+                self.window_trials[slot] += 1
+            self._outcomes[cell] = hit
+            self.window_hits[slot] += hit
+            self._positions[slot] = (position + 1) % window
+
+            trials = self.window_trials[slot]
+            if trials >= self.min_trials and self.window_hits[slot] * 100 < self.min_hit_rate * trials:
+                self.failing.add(label)
+            else:
+                self.failing.discard(label)
+
+    def label(self, guarantee):
+        """Rótulo de uma garantia (texto ou PatternKey), como aparece em `guarantee_pattern`."""
+        if isinstance(guarantee, str):
+            return guarantee
+        label = self._label_cache.get(guarantee)
+        if label is None:
+            label = self._label_cache[guarantee] = str(guarantee)
+        return label
+
+    def is_failing(self, guarantee):
+        """Se o padrão está em falha na janela móvel; O(1)."""
+        return self.label(guarantee) in self.failing
+
+    def hit_rate(self, guarantee, rolling=True):
+        """Taxa de acerto (%) do padrão na janela móvel (ou em toda a vida); None se nunca foi registrado."""
+        slot = self.slots.get(self.label(guarantee))
+        if slot is None:
+            return None
+        trials, hits = (self.window_trials, self.window_hits) if rolling else (self.trials, self.hits)
+        return round(hits[slot] / trials[slot] * 100, 2)
+
+    def rows(self):
+        """Uma linha por padrão, dos mais registrados para os menos."""
+        rows = []
+        for slot, label in enumerate(self.labels):
+            rows.append({
+                'pattern': label,
+                'trials': self.trials[slot],
+                'hits': self.hits[slot],
+                'hit_rate': round(self.hits[slot] / self.trials[slot] * 100, 2),
+                'window_trials': self.window_trials[slot],
+                'window_hit_rate': round(self.window_hits[slot] / self.window_trials[slot] * 100, 2),
+                'failure_streak': self.failure_streak[slot],
+                'max_failure_streak': self.max_failure_streak[slot],
+                'failing': label in self.failing,
+            })
+        rows.sort(key=lambda row: (-row['trials'], row['pattern']))
+        return rows
+
+    def __len__(self):
+        return len(self.labels)
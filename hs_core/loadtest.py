@@ -0,0 +1,197 @@
+"""
+Teste de carga do app Streamlit (HS.py) com várias sessões simuladas pelo AppTest.
+
+Cada sessão é um AppTest independente (seu próprio session_state), aberto em uma das `tables`
+mesas. Os cliques em CASA/VISITANTE/EMPATE de cada sessão chegam como um processo de Poisson de
+`rate` cliques por segundo (semente fixa). O AppTest não pode executar duas sessões ao mesmo
+tempo no mesmo processo, então um único agendador executa os cliques de todas em ordem de
+chegada. Como no servidor, onde as re-execuções disputam o GIL de um único processo, um clique
+que chega com o anterior ainda em execução espera na fila. Por nível de sessões, o relatório traz:
+
+- os percentis da latência (da chegada do clique ao fim da re-execução) e do tempo de execução,
+  que inclui o trabalho do próprio AppTest (montar a árvore de elementos) e é um limite superior;
+- a CPU do processo;
+- a memória residente acrescentada por sessão, que inclui o próprio AppTest e é, portanto, um
+  limite superior;
+- o tamanho do session_state de cada sessão;
+- a vazão máxima de re-execuções por segundo, base para estimar quantas sessões um processo suporta.
+
+Uso:
+    python -m hs_core.loadtest --sessions 1 10 50 100 200 --rate 0.5 --duration 10 --output carga.json
+"""
+try:
+    import streamlit.config
+    import streamlit.logger
+    from streamlit.testing.v1 import AppTest
+except ImportError as exc: # O Streamlit só é necessário para o app e para este teste de carga
+    raise ImportError("O teste de carga requer a biblioteca Streamlit instalada.") from exc
+
+import argparse
+import heapq
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from .benchmark import RESULT_WEIGHTS, _percentile
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'HS.py')
+RESULT_BUTTONS = ('btn_home', 'btn_away', 'btn_draw') # Mesma ordem de RESULT_WEIGHTS
+DEFAULT_SESSIONS = (1, 10, 50, 100)
+DEFAULT_RATE = 0.5 # Cliques por segundo em cada sessão
+DEFAULT_DURATION = 10.0 # Segundos de carga por nível
+DEFAULT_SEED = 2024
+APP_TIMEOUT = 120 # Segundos; com centenas de sessões uma re-execução pode esperar bastante na fila
+
+def _rss_bytes():
+    """Memória residente atual do processo (Linux); nos demais sistemas, o pico (ru_maxrss)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024 # macOS informa bytes; Linux, KiB
+
+def _approximate_size(value):
+    """Bytes ocupados por `value` e pelos dicionários, tuplas e listas que ele contém (estimativa de sys.getsizeof)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approximate_size(key) + _approximate_size(item) for key, item in value.items())
+    elif isinstance(value, (tuple, list)):
+        size += sum(_approximate_size(item) for item in value)
+    return size
+
+def _latency_row(seconds):
+    values = sorted(value * 1000 for value in seconds)
+    if not values:
+        return {'p50_ms': 0, 'p90_ms': 0, 'p99_ms': 0, 'max_ms': 0}
+    return {
+        'p50_ms': round(_percentile(values, 0.50), 2),
+        'p90_ms': round(_percentile(values, 0.90), 2),
+        'p99_ms': round(_percentile(values, 0.99), 2),
+        'max_ms': round(values[-1], 2),
+    }
+
+def _open_session(script, table_id):
+    session = AppTest.from_file(script, default_timeout=APP_TIMEOUT)
+    session.query_params['table'] = table_id
+    return session.run()
+
+def run_level(sessions, rate=DEFAULT_RATE, duration=DEFAULT_DURATION, tables=1, seed=DEFAULT_SEED, script=APP_SCRIPT):
+    """
+    Abre `sessions` sessões (distribuídas por `tables` mesas), executa `duration` segundos de cliques
+    a `rate` por segundo em cada uma e retorna as medidas do nível.
+    """
+    rss_before = _rss_bytes()
+    opened = []
+    app_sessions = []
+    for index in range(sessions):
+        start = time.perf_counter()
+        app_sessions.append(_open_session(script, f'carga-{index % tables}'))
+        opened.append(time.perf_counter() - start)
+    rss_opened = _rss_bytes()
+
+    # Chegadas de todas as sessões, em ordem: (instante, sessão, botão)
+    rng = random.Random(seed)
+    arrivals = []
+    for index in range(sessions):
+        moment = rng.expovariate(rate)
+        while moment < duration:
+            arrivals.append((moment, index, rng.choices(RESULT_BUTTONS, weights=RESULT_WEIGHTS)[0]))
+            moment += rng.expovariate(rate)
+    heapq.heapify(arrivals)
+
+    latencies, services = [], []
+    errors = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    while arrivals:
+        moment, index, button = heapq.heappop(arrivals)
+        delay = wall_start + moment - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        start = time.perf_counter()
+        session = app_sessions[index]
+        session.button(key=button).click().run()
+        finish = time.perf_counter()
+        errors += bool(session.exception)
+        services.append(finish - start)
+        latencies.append(finish - (wall_start + moment)) # Inclui a espera na fila
+    wall = max(time.perf_counter() - wall_start, duration)
+    cpu = time.process_time() - cpu_start
+
+    state_sizes = [_approximate_size(session.session_state.to_dict()) for session in app_sessions]
+    reruns = len(services)
+    return {
+        'sessions': sessions,
+        'tables': tables,
+        'rate': rate,
+        'duration': duration,
+        'reruns': reruns,
+        'errors': errors,
+        'achieved_rate': round(reruns / wall, 2),
+        'first_run': _latency_row(opened),
+        'latency': _latency_row(latencies),
+        'service': _latency_row(services),
+        'cpu_percent': round(cpu / wall * 100, 1),
+        'cpu_ms_per_rerun': round(cpu / reruns * 1000, 2) if reruns else 0,
+        'max_reruns_per_second': round(reruns / sum(services), 2) if reruns else 0,
+        'rss_mib': round(rss_opened / 2**20, 1),
+        'rss_per_session_kib': round((rss_opened - rss_before) / sessions / 1024, 1) if sessions else 0,
+        'session_state_kib': round(sum(state_sizes) / len(state_sizes) / 1024, 1) if state_sizes else 0,
+    }
+
+def run_load_test(levels=DEFAULT_SESSIONS, rate=DEFAULT_RATE, duration=DEFAULT_DURATION, tables=1, seed=DEFAULT_SEED,
+                  script=APP_SCRIPT, progress=None):
+    """Executa um nível por número de sessões em `levels` e retorna o relatório completo."""
+    report = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'script': script,
+            'seed': seed,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'levels': [],
+    }
+    # Aquecimento: importações e caches do app ficariam na conta das sessões do primeiro nível
+    _open_session(script, 'carga-0').button(key=RESULT_BUTTONS[0]).click().run()
+    for sessions in levels:
+        level = run_level(sessions, rate, duration, tables, seed, script)
+        report['levels'].append(level)
+        if progress:
+            latency = level['latency']
+            progress(f"{sessions:>5} sessões | {level['achieved_rate']:>7} re-execuções/s | latência p50={latency['p50_ms']:>9}ms "
+                     f"p99={latency['p99_ms']:>9}ms | CPU {level['cpu_percent']:>5}% | "
+                     f"{level['rss_per_session_kib']:>8} KiB/sessão | máx. {level['max_reruns_per_second']} re-execuções/s"
+                     + (f" | {level['errors']} erros" if level['errors'] else ""))
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do app Streamlit com sessões simuladas (AppTest).")
+    parser.add_argument('--sessions', type=int, nargs='+', default=list(DEFAULT_SESSIONS), help="Sessões em cada nível.")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="Cliques por segundo em cada sessão.")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help="Segundos de carga por nível.")
+    parser.add_argument('--tables', type=int, default=1, help="Mesas entre as quais as sessões são distribuídas.")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--script', default=APP_SCRIPT)
+    parser.add_argument('--storage', default='memory', help="HS_STORAGE_BACKEND das mesas do teste (padrão: memória).")
+    parser.add_argument('--output', help="Arquivo JSON onde salvar o relatório.")
+    args = parser.parse_args(argv)
+
+    os.environ['HS_STORAGE_BACKEND'] = args.storage # Lido quando o app importa hs_core.storage
+    # Sem servidor, o AppTest avisa a cada sessão; a configuração é lida antes, senão ela redefine o nível
+    streamlit.config.get_config_options()
+    streamlit.logger.set_log_level('error')
+    report = run_load_test(args.sessions, args.rate, args.duration, args.tables, args.seed, args.script, progress=print)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(level['errors'] for level in report['levels']) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Linguagem de definição de padrões e seu autômato de contagem.
+
+Os padrões de `find_complex_patterns` e `analyze_draw_specifics` são descritos em um arquivo texto
+(`patterns.txt`, sintaxe documentada no próprio arquivo) e compilados em um autômato determinístico
+(Aho–Corasick sobre o alfabeto de cores) que conta todos os padrões em uma única passada pela
+janela; o custo por resultado não depende do número de padrões definidos.
+
+As ocorrências são identificadas por `PatternKey(família, cores)`; o nome de exibição só é montado
+quando a chave é convertida em texto.
+"""
+import collections
+import dataclasses
+import itertools
+import operator
+import os
+import re
+import typing
+
+from .config import get_color
+from .history import RESULT_CODES, RESULT_TYPES
+
+COLORS = tuple(get_color(result) for result in RESULT_TYPES) # Cor de cada código: ('red', 'blue', 'yellow')
+PATTERNS_FILE = os.environ.get('HS_PATTERNS_FILE', os.path.join(os.path.dirname(__file__), 'patterns.txt'))
+
+_COMPARISONS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+_ELEMENT = re.compile(r'([A-Z]|[a-z]+)(?:\{(\d+)\})?$')
+_CONSTRAINT = re.compile(r'(\w+)\s*(==|!=)\s*(\w+)$')
+_LENGTH_GUARD = re.compile(r'len\s*(==|!=|<=|>=|<|>)\s*(\d+)$')
+_SECTION = re.compile(r'\[\s*([^\]]+?)\s*\]$')
+_FAMILY = re.compile(r'@(\S+)\s+')
+
+class PatternKey(typing.NamedTuple):
+    """Chave estruturada de um padrão: família (identificador da regra) e cores atribuídas às variáveis."""
+    family: str
+    colors: tuple = ()
+
+    def __str__(self):
+        return format_pattern(self)
+
+def format_pattern(key, labels=None):
+    """
+    Nome de exibição de uma chave de padrão, ex.: PatternKey('2x1', ('red', 'blue')) -> '2x1 (Red para Blue)'.
+    `labels` ({família: (modelo, variáveis)}, ver PatternSet.labels) tem por padrão os do arquivo carregado (PATTERN_LABELS).
+    """
+    template, variables = (PATTERN_LABELS if labels is None else labels)[key.family]
+    return template.format(**{v: c.capitalize() for v, c in zip(variables, key.colors)})
+
+class PatternSyntaxError(ValueError):
+    """Definição de padrão inválida; a mensagem indica o arquivo e a linha."""
+
+@dataclasses.dataclass(frozen=True)
+class PatternRule:
+    """Um padrão já interpretado: família, modelo do nome, elementos da sequência (variáveis ou cores) e restrições."""
+    family: str
+    name: str
+    elements: tuple
+    constraints: tuple = ()
+    anchored: bool = False
+    length_guard: tuple = None # (operador, limite) aplicado ao tamanho da janela, só em padrões ancorados
+
+    @property
+    def variables(self):
+        return tuple(dict.fromkeys(e for e in self.elements if e not in COLORS))
+
+    @property
+    def label(self):
+        """Modelo do nome e variáveis na ordem das cores da chave."""
+        return self.name, self.variables
+
+    def expand(self):
+        """Gera (códigos, PatternKey) para cada atribuição de cores às variáveis que satisfaz as restrições."""
+        variables = self.variables
+        for assignment in itertools.product(COLORS, repeat=len(variables)):
+            colors = dict(zip(variables, assignment))
+            value = lambda term: colors.get(term, term)
+            if all(op(value(left), value(right)) for left, op, right in self.constraints):
+                codes = tuple(COLORS.index(value(e)) for e in self.elements)
+                yield codes, PatternKey(self.family, assignment)
+
+def parse_patterns(text, source='<padrões>'):
+    """
+    Interpreta definições de padrões e retorna {seção: [PatternRule, ...]}, na ordem do texto. Uma
+    família tem um único nome e as mesmas variáveis em todo o texto (os nomes ficam em PatternSet.labels).
+    """
+    groups = collections.defaultdict(list)
+    labels = {}
+    section = None
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        where = f"{source}, linha {number}"
+        match = _SECTION.match(line)
+        if match:
+            section = match.group(1)
+            continue
+        if section is None:
+            raise PatternSyntaxError(f"{where}: padrão fora de uma seção [nome].")
+        name, separator, body = line.partition(':=')
+        if not separator or not name.strip():
+            raise PatternSyntaxError(f"{where}: esperado '<nome> := <sequência>'.")
+        name = name.strip()
+        family = name # Sem @identificador, o próprio modelo do nome identifica a família
+        match = _FAMILY.match(name)
+        if match:
+            family, name = match.group(1), name[match.end():]
+        sequence, *clauses = [part.strip() for part in body.split(';')]
+        rule = _parse_rule(family, name, sequence, clauses, where)
+        if labels.setdefault(family, rule.label) != rule.label:
+            raise PatternSyntaxError(f"{where}: família '{family}' já definida com outro nome ou outras variáveis.")
+        groups[section].append(rule)
+    return dict(groups)
+
+def _parse_rule(family, name, sequence, clauses, where):
+    tokens = sequence.split()
+    anchored = bool(tokens) and tokens[0] == '^'
+    elements = []
+    for token in tokens[anchored:]:
+        match = _ELEMENT.match(token)
+        if not match or (match.group(1).islower() and match.group(1) not in COLORS):
+            raise PatternSyntaxError(f"{where}: elemento inválido '{token}' (use uma variável X ou {', '.join(COLORS)}).")
+        elements += [match.group(1)] * int(match.group(2) or 1)
+    if not elements:
+        raise PatternSyntaxError(f"{where}: sequência vazia.")
+
+    variables = {e for e in elements if e not in COLORS}
+    constraints = []
+    length_guard = None
+    for clause in clauses:
+        guard = _LENGTH_GUARD.match(clause)
+        if guard:
+            if not anchored:
+                raise PatternSyntaxError(f"{where}: limites de 'len' só valem para padrões ancorados (^).")
+            length_guard = (_COMPARISONS[guard.group(1)], int(guard.group(2)))
+            continue
+        match = _CONSTRAINT.match(clause)
+        if not match:
+            raise PatternSyntaxError(f"{where}: restrição inválida '{clause}'.")
+        left, op, right = match.groups()
+        for term in (left, right):
+            if term not in variables and term not in COLORS:
+                raise PatternSyntaxError(f"{where}: '{term}' não é variável da sequência nem cor.")
+        constraints.append((left, _COMPARISONS[op], right))
+
+    try:
+        name.format(**{v: '' for v in variables})
+    except (KeyError, IndexError, ValueError) as exc:
+        raise PatternSyntaxError(f"{where}: nome com campo inválido ({exc}).") from None
+    return PatternRule(family, name, tuple(elements), tuple(constraints), anchored, length_guard)
+
+class PatternSet:
+    """
+    Conjunto de padrões compilado em um autômato de Aho–Corasick sobre os códigos 0, 1 e 2.
+
+    `count` lê a janela uma vez (mais recente primeiro) registrando quantas vezes cada estado
+    foi visitado; as saídas de cada estado (padrões que terminam nele) são somadas no final.
+    Padrões ancorados são verificados separadamente, apenas no início da janela. `labels` traz o
+    modelo de nome de cada família ({família: (modelo, variáveis)}), usado por `format`.
+    """
+
+    def __init__(self, rules=()):
+        self.rules = tuple(rules)
+        self.labels = {}
+        for rule in self.rules:
+            self.labels.setdefault(rule.family, rule.label)
+        self.keys = [] # PatternKey de cada identificador usado nas saídas do autômato
+        key_ids = {}
+        sliding = []
+        self.anchored = []
+        for rule in self.rules:
+            for codes, key in rule.expand():
+                key_id = key_ids.setdefault(key, len(self.keys))
+                if key_id == len(self.keys):
+                    self.keys.append(key)
+                if rule.anchored:
+                    self.anchored.append((codes, key, rule.length_guard))
+                else:
+                    sliding.append((codes, key_id))
+        self.spans = tuple(sorted({len(codes) for codes, _ in sliding})) # Tamanhos das ocorrências deslizantes
+        # (tamanho, chave) de cada padrão deslizante, em ordem de tamanho
+        self.sliding_keys = tuple(sorted({(len(codes), self.keys[key_id]) for codes, key_id in sliding}))
+        self.prefix_length = max((len(codes) for codes, _, _ in self.anchored), default=0)
+        self._build(sliding)
+        self._matches = {}
+
+    def _build(self, sliding):
+        # Transições em uma lista plana: o estado s ocupa as posições 3*s, 3*s+1 e 3*s+2,
+        # e cada transição já guarda 3 * próximo estado para dispensar a multiplicação no laço.
+        goto = [{}]
+        own = [[]]
+        for codes, key_id in sliding:
+            state = 0
+            for code in codes:
+                if code not in goto[state]:
+                    goto.append({})
+                    own.append([])
+                    goto[state][code] = len(goto) - 1
+                state = goto[state][code]
+            own[state].append((key_id, len(codes)))
+
+        fail = [0] * len(goto)
+        outputs = [tuple(own[0])] * len(goto)
+        delta = [0] * (3 * len(goto))
+        queue = collections.deque([0])
+        while queue:
+            state = queue.popleft()
+            for code in range(3):
+                child = goto[state].get(code)
+                if child is None:
+                    delta[3 * state + code] = delta[3 * fail[state] + code] if state else 0
+                    continue
+                fail[child] = delta[3 * fail[state] + code] // 3 if state else 0
+                outputs[child] = tuple(own[child]) + outputs[fail[child]]
+                delta[3 * state + code] = 3 * child
+                queue.append(child)
+        self._delta = delta
+        self._outputs = outputs
+
+    def format(self, key):
+        """Nome de exibição de uma chave deste conjunto (ver format_pattern)."""
+        return format_pattern(key, self.labels)
+
+    def count(self, codes):
+        """Conta os padrões em uma sequência de códigos (mais recente primeiro): {PatternKey: ocorrências}."""
+        delta = self._delta
+        visits = [0] * len(delta)
+        state = 0
+        for code in codes:
+            state = delta[state + code]
+            visits[state] += 1
+        totals = {}
+        keys = self.keys
+        for state in range(0, len(visits), 3):
+            visited = visits[state]
+            if visited:
+                for key_id, _ in self._outputs[state // 3]:
+                    key = keys[key_id]
+                    totals[key] = totals.get(key, 0) + visited
+        for key in self.prefix_matches(tuple(codes[:self.prefix_length]), len(codes)):
+            totals[key] = totals.get(key, 0) + 1
+        return totals
+
+    def count_results(self, results):
+        """`count` a partir de resultados ('home', 'away', 'draw')."""
+        return self.count([RESULT_CODES[r] for r in results])
+
+    def match(self, codes):
+        """Chaves das ocorrências deslizantes que ocupam exatamente `codes` (tupla); memoizado."""
+        keys = self._matches.get(codes)
+        if keys is None:
+            state = 0
+            for code in codes:
+                state = self._delta[state + code]
+            keys = tuple(self.keys[key_id] for key_id, length in self._outputs[state // 3] if length == len(codes))
+            self._matches[codes] = keys
+        return keys
+
+    def prefix_matches(self, prefix, size):
+        """Chaves dos padrões ancorados satisfeitos por `prefix` (início da janela) em uma janela de `size` resultados."""
+        return tuple(key for codes, key, guard in self.anchored
+                     if prefix[:len(codes)] == codes and (guard is None or guard[0](size, guard[1])))
+
+def load_patterns(path=PATTERNS_FILE):
+    """Lê e compila um arquivo de padrões: {seção: PatternSet}."""
+    with open(path, encoding='utf-8') as f:
+        groups = parse_patterns(f.read(), path)
+    return {section: PatternSet(rules) for section, rules in groups.items()}
+
+PATTERN_GROUPS = load_patterns()
+BREAK_PATTERNS = PATTERN_GROUPS.get('quebras', PatternSet()) # Padrões de find_complex_patterns
+DRAW_PATTERNS = PATTERN_GROUPS.get('empates', PatternSet()) # Padrões de analyze_draw_specifics
+# Modelo de nome de cada família do arquivo carregado, usado ao converter uma PatternKey em texto
+PATTERN_LABELS = {family: label for patterns in PATTERN_GROUPS.values() for family, label in patterns.labels.items()}
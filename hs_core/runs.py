@@ -0,0 +1,230 @@
+"""
+Codificação por sequências (run-length) do histórico: pares (código, tamanho), do mais antigo para o
+mais recente, mais o maior tamanho de sequência de cada resultado.
+
+Cada sequência ocupa 2 bytes em um array('H') (tamanho << 2 | código), que passa a array('I'), com 4
+bytes, só se alguma sequência chegar a WIDE_RUN resultados; as descartadas no início só saem do array
+quando passam de um quarto dele, então descartar o mais antigo também não move o restante a cada
+chamada. Acrescentar o resultado mais recente, descartar o mais antigo ou desfazer qualquer um dos dois
+custa O(1) amortizado; o máximo de cada resultado vem de um histograma dos tamanhos de suas sequências,
+outro array('I') indexado pelo tamanho (cada uma dessas operações muda uma sequência em uma unidade,
+então o máximo só sobe ou desce um passo). Os códigos são os de RESULT_TYPES (0 = home,
+1 = away, 2 = draw).
+"""
+import array
+import re
+
+from .config import optional_numpy
+
+NUM_CODES = 3
+_RUN_PATTERN = re.compile(rb'\x00+|\x01+|\x02+') # Sequências de um mesmo código em um histórico codificado
+_COMPACT_MIN = 64 # Sequências descartadas toleradas no início do array antes de compactá-lo
+WIDE_RUN = 1 << 14 # Menor sequência que não cabe em 16 bits com o código
+
+class RunLengthEncoding:
+    """Sequências do histórico (mais antiga primeiro) e o maior tamanho de sequência de cada código."""
+
+    def __init__(self):
+        self.runs = array.array('H') # tamanho << 2 | código; as vivas começam em `first`
+        self.first = 0 # Sequências já descartadas no início de `runs`
+        self.sizes = tuple(array.array('I') for _ in range(NUM_CODES)) # sizes[código][tamanho] = sequências
+        self.maxima = [0] * NUM_CODES
+        self.length = 0 # Resultados cobertos pelas sequências
+
+    @classmethod
+    def from_codes(cls, codes):
+        """Monta as sequências de códigos uint8 (mais antigo primeiro) de uma vez; usa NumPy se disponível."""
+        encoding = cls()
+        codes = bytes(codes)
+        if not codes:
+            return encoding
+        np = optional_numpy()
+        if np is not None:
+            encoding._load_np(np.frombuffer(codes, dtype=np.uint8))
+        else:
+            for match in _RUN_PATTERN.finditer(codes):
+                encoding.push(codes[match.start()], match.end() - match.start())
+        return encoding
+
+    def _load_np(self, codes):
+        """Equivale a chamar `push` para cada sequência de `codes`."""
+        import numpy as np
+
+        starts = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1))
+        lengths = np.diff(np.append(starts, len(codes)))
+        values = codes[starts]
+        typecode, dtype = ('H', np.uint16) if lengths.max() < WIDE_RUN else ('I', np.uint32)
+        self.runs = array.array(typecode, (lengths << 2 | values).astype(dtype).tobytes())
+        for code in range(NUM_CODES):
+            histogram = np.bincount(lengths[values == code]).astype(np.uint32)
+            self.sizes[code].frombytes(histogram.tobytes())
+            self.maxima[code] = len(histogram) - 1 if len(histogram) else 0
+        self.length = len(codes)
+
+    def _resize(self, code, previous, size):
+        """Uma sequência de `code` passa de `previous` a `size` resultados (0 = inexistente); atualiza histograma e máximo."""
+        if size >= WIDE_RUN and self.runs.typecode == 'H': # Antes de gravar a sequência: passa a 4 bytes
+            self.runs = array.array('I', self.runs)
+        sizes = self.sizes[code]
+        if previous:
+            sizes[previous] -= 1
+        if size:
+            if size >= len(sizes):
+                sizes.frombytes(bytes(4 * (size + 1 - len(sizes))))
+            sizes[size] += 1
+        maximum = self.maxima[code]
+        if size > maximum:
+            self.maxima[code] = size
+        elif previous == maximum and not sizes[previous]:
+            # Só uma troca (`replace`) encolhe uma sequência em mais de uma unidade
+            while maximum and not sizes[maximum]:
+                maximum -= 1
+            self.maxima[code] = maximum
+
+    def _set(self, index, code, previous, size):
+        self._resize(code, previous, size)
+        self.runs[index] = size << 2 | code
+
+    def push(self, code, count=1):
+        """Acrescenta `count` resultados `code` como os mais recentes."""
+        runs = self.runs
+        if len(runs) > self.first and runs[-1] & 3 == code:
+            previous = runs[-1] >> 2
+            self._set(len(runs) - 1, code, previous, previous + count)
+        else:
+            self._resize(code, 0, count)
+            self.runs.append(count << 2 | code)
+        self.length += count
+
+    def pop(self):
+        """Remove o resultado mais recente (desfaz `push` de um resultado) e retorna o seu código."""
+        runs = self.runs
+        code, size = runs[-1] & 3, runs[-1] >> 2
+        self._resize(code, size, size - 1)
+        if size == 1:
+            runs.pop()
+        else:
+            runs[-1] -= 4
+        self.length -= 1
+        return code
+
+    def drop_oldest(self):
+        """Descarta o resultado mais antigo."""
+        runs, first = self.runs, self.first
+        code, size = runs[first] & 3, runs[first] >> 2
+        self._resize(code, size, size - 1)
+        if size > 1:
+            runs[first] -= 4
+        else:
+            first += 1
+            if first >= _COMPACT_MIN and 4 * first >= len(runs):
+                del runs[:first]
+                first = 0
+            self.first = first
+        self.length -= 1
+
+    def push_oldest(self, code):
+        """Devolve `code` ao início do histórico (desfaz `drop_oldest`)."""
+        runs, first = self.runs, self.first
+        if len(runs) > first and runs[first] & 3 == code:
+            size = runs[first] >> 2
+            self._set(first, code, size, size + 1)
+        else:
+            if first:
+                self.first = first - 1
+                runs[first - 1] = 1 << 2 | code
+            else:
+                runs.insert(0, 1 << 2 | code)
+            self._resize(code, 0, 1)
+        self.length += 1
+
+    def replace(self, position, code):
+        """
+        Troca o código na posição `position` (0 = mais antigo): a sequência que a contém é dividida e
+        a nova se junta às vizinhas do mesmo código. Localizar a sequência percorre as sequências a partir
+        da ponta mais próxima; dividir ou juntar desloca o restante do array (uma cópia de memória).
+        """
+        runs = self.runs
+        if position >= self.length / 2: # Procura a partir da mais recente
+            index, start = len(runs), self.length
+            while start > position:
+                index -= 1
+                start -= runs[index] >> 2
+        else:
+            index, start = self.first, 0
+            while start + (runs[index] >> 2) <= position:
+                start += runs[index] >> 2
+                index += 1
+        old, size = runs[index] & 3, runs[index] >> 2
+        if old == code:
+            return
+        offset = position - start
+        remaining = size - offset - 1 # Resultados da sequência depois da posição
+        self._resize(old, size, 0)
+        del runs[index]
+        merged = 1
+        if not offset and index > self.first and runs[index - 1] & 3 == code: # Junta-se à sequência anterior
+            index -= 1
+            merged += runs[index] >> 2
+            self._resize(code, runs[index] >> 2, 0)
+            del runs[index]
+        if not remaining and index < len(runs) and runs[index] & 3 == code: # Junta-se à seguinte
+            merged += runs[index] >> 2
+            self._resize(code, runs[index] >> 2, 0)
+            del runs[index]
+        for piece, size in ((old, remaining), (code, merged), (old, offset)): # Inseridas de trás para frente
+            if size:
+                self._resize(piece, 0, size)
+                self.runs.insert(index, size << 2 | piece)
+
+    def clear(self):
+        del self.runs[:]
+        self.first = 0
+        for sizes in self.sizes:
+            del sizes[:]
+        self.maxima = [0] * NUM_CODES
+        self.length = 0
+
+    def __len__(self):
+        return len(self.runs) - self.first
+
+    def __iter__(self):
+        """Gera (código, tamanho) do mais antigo para o mais recente."""
+        for index in range(self.first, len(self.runs)):
+            yield self.runs[index] & 3, self.runs[index] >> 2
+
+    def max_run(self, code):
+        """Maior sequência de `code` no histórico; O(1)."""
+        return self.maxima[code]
+
+    @property
+    def newest(self):
+        """(código, tamanho) da sequência atual (a do resultado mais recente), ou None."""
+        if len(self.runs) == self.first:
+            return None
+        return self.runs[-1] & 3, self.runs[-1] >> 2
+
+    def newest_first(self, limit=None):
+        """Gera (código, tamanho) do mais recente para o mais antigo, cortando em `limit` resultados."""
+        runs = self.runs
+        remaining = self.length if limit is None else min(limit, self.length)
+        index = len(runs)
+        while remaining > 0:
+            index -= 1
+            size = runs[index] >> 2
+            yield runs[index] & 3, min(size, remaining)
+            remaining -= size
+
+    def oldest_codes(self, count):
+        """Os `count` primeiros códigos do histórico (mais antigo primeiro)."""
+        codes = []
+        index = self.first
+        while len(codes) < count and index < len(self.runs):
+            codes += [self.runs[index] & 3] * min(self.runs[index] >> 2, count - len(codes))
+            index += 1
+        return codes
+
+    @property
+    def nbytes(self):
+        """Memória das sequências e dos histogramas de tamanhos."""
+        return sum(values.itemsize * len(values) for values in (self.runs, *self.sizes))
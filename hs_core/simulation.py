@@ -0,0 +1,184 @@
+"""
+Simulação de Monte Carlo da estratégia de sugestões contra o acaso.
+
+Sequências sintéticas de resultados são sorteadas com NumPy a partir de probabilidades fixas de
+home/away/draw; cada sequência é reproduzida do zero pelo IncrementalAnalyzer, pontuando cada
+sugestão contra o resultado seguinte, como no backtest. O relatório compara a taxa de acerto
+com a taxa esperada por acaso (a probabilidade do resultado apostado) e mede a calibração:
+confiança prevista versus frequência de acerto observada, com intervalos de Wilson.
+
+As sequências são distribuídas por um pool de processos. Cada uma tem a sua semente derivada
+de `seed` (numpy.random.SeedSequence), então o relatório não depende do número de processos.
+
+Uso:
+    python -m hs_core.simulation --rounds 1000000 --probabilities 0.45 0.45 0.10 --output simulacao.json
+"""
+try:
+    import numpy as np
+except ImportError as exc: # NumPy é opcional para o restante do pacote
+    raise ImportError("A simulação de Monte Carlo requer a biblioteca NumPy instalada.") from exc
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import math
+import os
+
+from .analysis import check_guarantee_status
+from .backtest import _confidence_bucket
+from .config import DEFAULT_CONFIG, MAX_HISTORY_TO_STORE
+from .engine import IncrementalAnalyzer
+from .history import RESULT_TYPES
+from .ledger import GuaranteeLedger
+
+DEFAULT_PROBABILITIES = (0.45, 0.45, 0.10) # home, away, draw (proporção aproximada do Football Studio)
+DEFAULT_ROUNDS = 100_000
+DEFAULT_STREAMS = 32 # Sequências independentes; fixo para que o resultado não dependa dos processos
+Z_95 = 1.959964 # Quantil normal do intervalo de confiança de 95%
+
+def wilson_interval(hits, trials, z=Z_95):
+    """Intervalo de confiança de Wilson (em %) para uma proporção de `hits` em `trials`."""
+    if not trials:
+        return (0.0, 0.0)
+    p = hits / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return (round(max(0.0, center - margin) * 100, 2), round(min(1.0, center + margin) * 100, 2))
+
+def _simulate_stream(args):
+    """Reproduz uma sequência sintética; retorna {(bet_type, confiança): [sugestões, acertos]}."""
+    seed_sequence, rounds, probabilities, max_history, config, use_ledger = args
+    rng = np.random.default_rng(seed_sequence)
+    codes = rng.choice(len(RESULT_TYPES), size=rounds, p=probabilities).astype(np.uint8)
+
+    tally = collections.defaultdict(lambda: [0, 0])
+    analyzer = IncrementalAnalyzer(max_history, config)
+    # Como em TableState.add_result: as sugestões verificadas alimentam o livro, consultado pelas próximas
+    ledger = GuaranteeLedger.from_config(config) if use_ledger else None
+    suggestion = analyzer.suggestion(ledger)
+    for code in codes.tolist():
+        result = RESULT_TYPES[code]
+        if suggestion['bet_type'] != 'none':
+            row = tally[(suggestion['bet_type'], suggestion['confidence'])]
+            hit = check_guarantee_status(suggestion['bet_type'], result, suggestion['guarantee_pattern'])
+            row[0] += 1
+            row[1] += hit
+            if ledger is not None and suggestion['confidence'] >= config.guarantee_confidence:
+                ledger.record(suggestion['guarantee_pattern'], hit)
+        analyzer.push(result)
+        suggestion = analyzer.suggestion(ledger)
+    return dict(tally)
+
+def _rate_row(suggestions, hits, expected_hits):
+    """Taxa de acerto, intervalo de 95% e taxa esperada por acaso (todas em %)."""
+    low, high = wilson_interval(hits, suggestions)
+    return {
+        'suggestions': suggestions,
+        'hits': hits,
+        'hit_rate': round(hits / suggestions * 100, 2) if suggestions else 0,
+        'ci_low': low,
+        'ci_high': high,
+        'chance_rate': round(expected_hits / suggestions * 100, 2) if suggestions else 0,
+    }
+
+def _simulation_report(tally, rounds, probabilities, config):
+    """Agrega {(bet_type, confiança): [sugestões, acertos]} no relatório final."""
+    chance = dict(zip(RESULT_TYPES, probabilities))
+    keys = sorted(tally)
+    suggestions = np.array([tally[key][0] for key in keys], dtype=np.int64)
+    hits = np.array([tally[key][1] for key in keys], dtype=np.int64)
+    confidences = np.array([confidence for _, confidence in keys], dtype=np.float64)
+    expected = np.array([chance[bet_type] for bet_type, _ in keys]) * suggestions
+
+    def summary(mask):
+        return _rate_row(int(suggestions[mask].sum()), int(hits[mask].sum()), float(expected[mask].sum()))
+
+    everything = np.ones(len(keys), dtype=bool)
+    by_bet_type = {bet_type: summary(np.array([key[0] == bet_type for key in keys], dtype=bool))
+                   for bet_type in RESULT_TYPES if any(key[0] == bet_type for key in keys)}
+
+    # Calibração: confiança média prevista versus frequência de acerto em cada faixa
+    calibration = {}
+    buckets = np.array([_confidence_bucket(int(confidence)) for confidence in confidences], dtype=object)
+    for bucket in sorted(set(buckets.tolist()), key=lambda label: int(label.split('-')[0])):
+        mask = buckets == bucket
+        row = summary(mask)
+        row['mean_confidence'] = round(float((confidences[mask] * suggestions[mask]).sum() / suggestions[mask].sum()), 2)
+        calibration[bucket] = row
+    total = int(suggestions.sum())
+    # Erro de calibração esperado: diferença média |confiança - acerto|, ponderada pelo volume de cada faixa
+    calibration_error = sum(row['suggestions'] * abs(row['mean_confidence'] - row['hit_rate']) for row in calibration.values())
+
+    overall = summary(everything)
+    return {
+        'rounds': rounds,
+        'probabilities': dict(zip(RESULT_TYPES, probabilities)),
+        **overall,
+        'edge': round(overall['hit_rate'] - overall['chance_rate'], 2),
+        'gated': summary(confidences >= config.guarantee_confidence),
+        'by_bet_type': by_bet_type,
+        'calibration': calibration,
+        'calibration_error': round(calibration_error / total, 2) if total else 0,
+    }
+
+def run_simulation(rounds=DEFAULT_ROUNDS, probabilities=DEFAULT_PROBABILITIES, seed=0, streams=DEFAULT_STREAMS,
+                   workers=None, max_history=MAX_HISTORY_TO_STORE, config=DEFAULT_CONFIG, ledger=False):
+    """
+    Simula `rounds` rodadas divididas em `streams` sequências independentes (cada uma começa com o
+    histórico vazio) e retorna o relatório: taxa de acerto geral, das sugestões com confiança
+    >= `config.guarantee_confidence` e por `bet_type`, cada uma com intervalo de 95% e a taxa esperada
+    por acaso, mais a calibração por faixa de confiança. Com a mesma `seed`, o relatório é o mesmo
+    para qualquer `workers` (padrão: todos os núcleos). Com `ledger`, cada sequência mantém um
+    GuaranteeLedger, como as mesas do app, e as sugestões reduzem o peso dos padrões em falha.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    if probabilities.shape != (len(RESULT_TYPES),) or (probabilities < 0).any() or not probabilities.sum():
+        raise ValueError("Informe três probabilidades não negativas (home, away, draw).")
+    probabilities = tuple((probabilities / probabilities.sum()).tolist())
+
+    streams = max(1, min(streams, rounds))
+    sizes = [rounds // streams + (index < rounds % streams) for index in range(streams)]
+    tasks = [(child, size, probabilities, max_history, config, ledger)
+             for child, size in zip(np.random.SeedSequence(seed).spawn(streams), sizes)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        tallies = [_simulate_stream(task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            tallies = list(executor.map(_simulate_stream, tasks))
+
+    merged = collections.defaultdict(lambda: [0, 0])
+    for tally in tallies:
+        for key, (suggestions, hits) in tally.items():
+            merged[key][0] += suggestions
+            merged[key][1] += hits
+    return _simulation_report(merged, rounds, probabilities, config)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulação de Monte Carlo das sugestões do hs_core.")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--probabilities', type=float, nargs=3, default=list(DEFAULT_PROBABILITIES),
+                        metavar=('HOME', 'AWAY', 'DRAW'))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--streams', type=int, default=DEFAULT_STREAMS)
+    parser.add_argument('--workers', type=int, help="Processos (padrão: todos os núcleos).")
+    parser.add_argument('--ledger', action='store_true', help="Reduz o peso dos padrões de garantia em falha (GuaranteeLedger).")
+    parser.add_argument('--output', help="Arquivo JSON onde salvar o relatório.")
+    args = parser.parse_args(argv)
+
+    report = run_simulation(args.rounds, args.probabilities, args.seed, args.streams, args.workers, ledger=args.ledger)
+    print(f"Rodadas: {report['rounds']} | Sugestões: {report['suggestions']} | "
+          f"Acerto: {report['hit_rate']}% [{report['ci_low']}, {report['ci_high']}] | "
+          f"Acaso: {report['chance_rate']}% | Vantagem: {report['edge']} p.p.")
+    print(f"Erro de calibração: {report['calibration_error']} p.p.")
+    for bucket, row in report['calibration'].items():
+        print(f"  {bucket:>7}: confiança média {row['mean_confidence']:>6}% | acerto {row['hit_rate']:>6}% "
+              f"[{row['ci_low']}, {row['ci_high']}] | {row['suggestions']} sugestões")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Índice de sufixos do histórico: onde a sequência atual (os últimos m resultados) já apareceu
+e o que saiu em seguida.
+
+É um autômato de sufixos montado online sobre os códigos uint8 do histórico armazenado: cada estado
+reúne as subsequências com o mesmo conjunto de fins, e cinco arrays guardam, por estado, as três
+transições (`next`), o elo de sufixo (`link`), o tamanho da maior subsequência (`length`), quantos
+fins ela tem no histórico (`count`) e o fim mais recente (`last`), em 28 bytes por estado, com no
+máximo dois estados por resultado. Não há limite no tamanho do contexto além de `max_context`, o
+das linhas devolvidas por `matches` (27 por padrão, a janela de `color_pattern_27`).
+
+Acrescentar um resultado custa O(1) amortizado no autômato, mais um passo por estado do caminho de
+elos até o contexto de `max_context` + 1 resultados, os únicos cujas contagens são mantidas: são no
+máximo `max_context` + 1 estados e, em históricos aleatórios, perto do maior contexto repetido
+(log3 do histórico). Consultar a sequência atual custa O(max_context).
+
+O autômato não remove o início do texto. Quando o histórico descarta o mais antigo, os fins das
+primeiras `max_context` posições armazenadas deixam de ser contados (um caminho de elos cada), e
+`matches` confere essas posições direto nos códigos, porque nelas um contexto longo pode começar
+antes do histórico. Quando os resultados descartados passam do tamanho do histórico, o autômato é
+remontado só com os armazenados, O(1) amortizado por descarte. Desfazer o último resultado ou
+corrigir um do meio (`invalidate`) também remonta o autômato, na próxima consulta ou acréscimo.
+"""
+import array
+
+from .history import RESULT_TYPES
+
+_LETTERS = 'RBY' # Letras de `color_pattern_27` por código
+_NO_TRANSITIONS = array.array('i', [-1, -1, -1])
+REBUILD_MIN = 256 # Resultados descartados tolerados no autômato antes de remontá-lo, mesmo com histórico pequeno
+
+def _empty_matches():
+    return {'length': 0, 'context': '', 'occurrences': 0, 'next': dict.fromkeys(RESULT_TYPES, 0), 'last_seen': -1, 'by_length': []}
+
+class SuffixIndex:
+    """Autômato de sufixos de `history` (ResultHistory), acompanhado resultado a resultado."""
+
+    def __init__(self, history, max_context=27):
+        self.history = history
+        self.max_context = max_context
+        self.span = max_context + 1 # Maior subsequência contada: um contexto e o resultado seguinte
+        self._rebuild()
+
+    def _rebuild(self):
+        """Monta o autômato só com os códigos armazenados no histórico."""
+        self.next = array.array('i', _NO_TRANSITIONS) # Estado 0: a sequência vazia
+        self.link = array.array('i', [-1])
+        self.length = array.array('I', [0])
+        self.count = array.array('I', [0]) # Fins a partir de `start` + span - 1 (só nos estados com contexto de até `span`)
+        self.last = array.array('i', [-1]) # Fim mais recente contado
+        self.anchors = array.array('i') # Estado do sufixo de até `span` resultados que termina em cada posição
+        self.size = 0 # Resultados acrescentados ao autômato (posições 0 a size - 1)
+        self.start = 0 # Posição do resultado mais antigo ainda armazenado
+        self.tail = 0 # Estado do texto inteiro
+        self.anchor = 0 # Estado do sufixo de min(span, size) resultados
+        self.stale = False
+        for code in self.history.to_bytes():
+            self._append(code)
+
+    def _new_state(self, length, link, source=-1):
+        """Novo estado; com `source`, uma cópia das transições, contagem e fim mais recente dele (um clone)."""
+        if source < 0:
+            self.next.extend(_NO_TRANSITIONS)
+            self.count.append(0)
+            self.last.append(-1)
+        else:
+            self.next.extend(self.next[3 * source : 3 * source + 3])
+            self.count.append(self.count[source])
+            self.last.append(self.last[source])
+        self.link.append(link)
+        self.length.append(length)
+        return len(self.length) - 1
+
+    def _extend(self, code):
+        """Acrescenta `code` ao autômato (construção online clássica) e acha o estado do novo sufixo de `span` resultados."""
+        next, link, length = self.next, self.link, self.length
+        size, span = self.size, self.span
+        suffix = self.anchor # Estado do sufixo de min(span - 1, size) resultados, que seguido de `code` é o novo sufixo
+        if size >= span and length[link[suffix]] >= span - 1:
+            suffix = link[suffix]
+        current = self._new_state(length[self.tail] + 1, -1)
+        state = self.tail
+        while state >= 0 and next[3 * state + code] < 0:
+            next[3 * state + code] = current
+            state = link[state]
+        if state < 0:
+            link[current] = 0
+        else:
+            target = next[3 * state + code]
+            if length[state] + 1 == length[target]:
+                link[current] = target
+            else: # Os sufixos mais curtos de `target` passam a terminar também aqui: vão para um clone
+                clone = self._new_state(length[state] + 1, link[target], target)
+                while state >= 0 and next[3 * state + code] == target:
+                    next[3 * state + code] = clone
+                    state = link[state]
+                link[target] = link[current] = clone
+                if suffix == target and min(span - 1, size) <= length[clone]:
+                    suffix = clone
+        self.tail = current
+        self.anchor = next[3 * suffix + code]
+        self.anchors.append(self.anchor)
+        self.size = size + 1
+
+    def _append(self, code):
+        self._extend(code)
+        end = self.size - 1
+        if end >= self.start + self.span - 1: # Nas primeiras posições, os fins são conferidos nos códigos
+            count, last, link = self.count, self.last, self.link
+            state = self.anchor
+            while state > 0:
+                count[state] += 1
+                last[state] = end
+                state = link[state]
+
+    def _uncount(self, end):
+        """Deixa de contar os fins em `end` (a partir do estado do sufixo de até `span` resultados, que pode ter sido clonado)."""
+        count, link, length = self.count, self.link, self.length
+        size = min(self.span, end + 1)
+        state = self.anchors[end]
+        while length[link[state]] >= size:
+            state = link[state]
+        while state > 0:
+            count[state] -= 1
+            state = link[state]
+
+    def push(self, code):
+        """Acompanha o acréscimo de `code` ao histórico (e o descarte do mais antigo, se ele estava cheio)."""
+        if self.stale:
+            self._rebuild()
+            return
+        self._append(code)
+        start = self.size - len(self.history)
+        for end in range(self.start + self.span - 1, min(start + self.span - 1, self.size)):
+            self._uncount(end)
+        self.start = start
+        if start >= max(len(self.history), REBUILD_MIN):
+            self._rebuild()
+
+    def invalidate(self):
+        """O histórico mudou fora do fim (último resultado desfeito ou um resultado corrigido): remonta na próxima consulta."""
+        self.stale = True
+
+    def _zone(self, tail, upper, min_length):
+        """
+        Ocorrências anteriores da sequência atual, de ao menos `min_length` resultados, que terminam nas
+        primeiras posições armazenadas, ainda não contadas: (extra, fins), com extra[3 * m + código] por
+        comprimento m e, para cada ocorrência, (fim, maior comprimento em que ela coincide com a atual).
+        """
+        stored = len(self.history)
+        size = min(self.span - 1, self.size - self.start) # Posições start a start + size - 1
+        zone = self.history.to_bytes(stored - size, stored)
+        extra, ends = [0] * (3 * (upper + 1)), []
+        context = tail[-min_length:]
+        found = zone.find(context, 0, size - 1) # Seguida de algum resultado ainda na zona
+        while found >= 0:
+            position = found + min_length # Posição do resultado seguinte
+            limit, matched = min(upper, position), min_length
+            while matched < limit and zone[position - 1 - matched] == tail[-1 - matched]:
+                matched += 1
+            code = zone[position]
+            for m in range(min_length, matched + 1):
+                extra[3 * m + code] += 1
+            ends.append((self.start + position - 1, matched))
+            found = zone.find(context, found + 1, size - 1)
+        return extra, ends
+
+    def matches(self, min_occurrences=1, min_length=1):
+        """
+        Ocorrências anteriores da sequência atual: para cada comprimento m, de `min_length` ao maior
+        contexto que já apareceu antes ao menos `min_occurrences` vezes (`length`), quantas vezes apareceu
+        e o que saiu em seguida (`by_length`); para o maior, também a sequência e há quantas rodadas foi a
+        ocorrência mais recente (`last_seen`). As ocorrências só diminuem com m, então as linhas omitidas
+        pelos limites são justamente as que a regra de sequência repetida descartaria.
+        """
+        if self.stale:
+            self._rebuild()
+        upper = min(self.max_context, len(self.history) - 1)
+        if upper < max(min_length, 1):
+            return _empty_matches()
+        next, count, length = self.next, self.count, self.length
+        tail = self.history.to_bytes(0, upper)
+        extra, zone_ends = self._zone(tail, upper, min_length)
+        path = [] # Estados dos sufixos, do mais curto para o mais longo
+        state = self.anchor
+        while state > 0:
+            path.append(state)
+            state = self.link[state]
+        path.reverse()
+        by_length, step = [], 0
+        for m in range(min_length, upper + 1):
+            while length[path[step]] < m:
+                step += 1
+            first = 3 * path[step]
+            home, away, draw = (extra[3 * m + code] + (count[next[first + code]] if next[first + code] >= 0 else 0) for code in range(3))
+            occurrences = home + away + draw
+            if not occurrences or occurrences < min_occurrences: # Um contexto que nunca apareceu não tem extensões que tenham aparecido
+                break
+            by_length.append({'length': m, 'occurrences': occurrences, 'home': home, 'away': away, 'draw': draw})
+            state = path[step]
+        if not by_length:
+            return _empty_matches()
+        longest = by_length[-1]
+        size = longest['length']
+        following = [longest[result] for result in RESULT_TYPES]
+        ends = [end for end, matched in zone_ends if matched >= size]
+        for code in range(3):
+            target = next[3 * state + code]
+            if target >= 0 and count[target]:
+                ends.append(self.last[target] - 1)
+        return {
+            'length': size,
+            'context': ''.join(_LETTERS[code] for code in tail[:-size - 1:-1]),
+            'occurrences': longest['occurrences'],
+            'next': dict(zip(RESULT_TYPES, following)),
+            'last_seen': self.size - 1 - max(ends),
+            'by_length': by_length,
+        }
+
+    def __len__(self):
+        return len(self.length)
+
+    @property
+    def nbytes(self):
+        """Memória dos arrays do autômato."""
+        return sum(values.itemsize * len(values) for values in (self.next, self.link, self.length, self.count, self.last, self.anchors))
@@ -0,0 +1,91 @@
+"""Varredura paralela de parâmetros de AnalysisConfig avaliados pelo backtest."""
+import concurrent.futures
+import dataclasses
+import itertools
+import os
+import random
+
+from .backtest import _backtest_report, _backtest_tally, _merge_backtest_tallies
+from .config import DEFAULT_CONFIG, MAX_HISTORY_TO_STORE
+from .history import RESULT_TYPES, encode_history
+
+_sweep_histories = [] # Históricos (mais antigo primeiro) carregados uma única vez em cada processo da varredura
+
+def _sweep_init(encoded_histories):
+    global _sweep_histories
+    _sweep_histories = [[RESULT_TYPES[code] for code in encoded] for encoded in encoded_histories]
+
+def _sweep_evaluate(args):
+    params, max_history = args
+    try:
+        config = dataclasses.replace(DEFAULT_CONFIG, **params)
+    except ValueError:
+        return None # Combinação inválida (ex.: janela menor que o mínimo de resultados)
+    tallies = [_backtest_tally(history, 0, len(history), max_history, config) for history in _sweep_histories]
+    report = _backtest_report(_merge_backtest_tallies(tallies))
+    return {
+        **params,
+        'suggestions': report['suggestions'],
+        'hit_rate': report['hit_rate'],
+        'gated_suggestions': report['gated_suggestions'],
+        'gated_hit_rate': report['gated_hit_rate'],
+    }
+
+def _grid_configs(grid):
+    """Todas as combinações de {campo: [valores]}."""
+    fields = list(grid)
+    return [dict(zip(fields, values)) for values in itertools.product(*(grid[field] for field in fields))]
+
+def _random_configs(space, samples, seed):
+    """`samples` combinações distintas sorteadas de {campo: [valores]} com semente fixa."""
+    rng = random.Random(seed)
+    fields = list(space)
+    choices = {field: list(dict.fromkeys(space[field])) for field in fields} # Sem repetidos: o total é o de combinações distintas
+    total = 1
+    for field in fields:
+        total *= len(choices[field])
+    seen = set()
+    configs = []
+    while len(configs) < min(samples, total):
+        values = tuple(rng.choice(choices[field]) for field in fields)
+        if values not in seen:
+            seen.add(values)
+            configs.append(dict(zip(fields, values)))
+    return configs
+
+def run_parameter_sweep(histories, grid=None, random_space=None, samples=100, seed=0, workers=None,
+                        max_history=MAX_HISTORY_TO_STORE, rank_by='gated_hit_rate', min_suggestions=30):
+    """
+    Avalia combinações de parâmetros de AnalysisConfig com o backtest sobre históricos gravados
+    (cada um mais recente primeiro) e retorna uma tabela ordenada do melhor para o pior.
+
+    `grid` ({campo: [valores]}) avalia todas as combinações; `random_space` sorteia `samples` delas.
+    As tarefas rodam em um pool de processos (`workers`, padrão: todos os núcleos); os históricos são
+    enviados uma única vez a cada processo, e cada tarefa leva apenas os parâmetros da combinação.
+    Combinações com menos de `min_suggestions` sugestões ficam no fim da tabela.
+    """
+    if grid is not None:
+        configs = _grid_configs(grid)
+    elif random_space is not None:
+        configs = _random_configs(random_space, samples, seed)
+    else:
+        raise ValueError("Informe `grid` ou `random_space`.")
+
+    encoded_histories = [encode_history(history) for history in histories]
+    tasks = [(params, max_history) for params in configs]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _sweep_init(encoded_histories)
+        rows = [_sweep_evaluate(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_sweep_init,
+                                                    initargs=(encoded_histories,)) as executor:
+            rows = list(executor.map(_sweep_evaluate, tasks, chunksize=chunksize))
+
+    count_field = 'gated_suggestions' if rank_by.startswith('gated') else 'suggestions'
+    rows = [row for row in rows if row is not None]
+    rows.sort(key=lambda row: (row[count_field] >= min_suggestions, row[rank_by], row[count_field]), reverse=True)
+    for rank, row in enumerate(rows, start=1):
+        row['rank'] = rank
+    return rows
@@ -0,0 +1,385 @@
+"""
+Registro de mesas: histórico, persistência e análise de cada mesa acompanhada, compartilhados
+entre todas as sessões do processo. Carregamentos e atualizações de várias mesas são despachados
+para um único pool de threads, com uma trava por mesa.
+"""
+import collections
+import concurrent.futures
+import os
+import threading
+
+from .analysis import check_guarantee_status
+from .config import DEFAULT_CONFIG, MAX_HISTORY_TO_STORE
+from .engine import IncrementalAnalyzer
+from .history import RESULT_CODES, RESULT_TYPES, encode_history
+from .importer import import_results
+from .ledger import GuaranteeLedger
+from .storage import (HISTORY_STORAGE_BACKEND, HISTORY_STORAGE_DIR, list_history_tables, open_history_store,
+                      sanitize_table_id)
+
+TABLE_WORKERS = int(os.environ.get('HS_TABLE_WORKERS', '8')) # Threads do pool compartilhado entre as mesas
+UNDO_DEPTH = int(os.environ.get('HS_UNDO_DEPTH', '100')) # Resultados que cada mesa consegue desfazer
+
+class TableState:
+    """
+    Estado de uma mesa: histórico, armazenamento, motor incremental, análise atual e a sugestão
+    vigente usada na verificação de garantia da próxima rodada. `version` muda a cada alteração
+    do histórico. Todas as mutações acontecem sob `lock`. Com um `exporter` (SnapshotExporter),
+    cada rodada registrada é enfileirada para a exportação colunar. `ledger` (GuaranteeLedger)
+    acumula o desempenho de cada padrão de garantia verificado e é consultado pelas sugestões.
+
+    Cada resultado registrado guarda uma revisão em `undo_stack` (até `undo_depth`) com o estado
+    anterior a ele: análise, sugestão vigente, alerta de garantia e, se a garantia foi verificada,
+    o livro. `undo` e `redo` trocam esses estados em O(1), sem recalcular a análise, e o motor
+    incremental desfaz ou refaz o resultado (IncrementalAnalyzer.pop e push); corrigir um resultado
+    antigo também só ajusta o motor em volta dele (IncrementalAnalyzer.replace). Rodadas desfeitas ou
+    corrigidas não são retiradas da exportação.
+    """
+
+    def __init__(self, table_id, store, capacity=MAX_HISTORY_TO_STORE, config=DEFAULT_CONFIG, exporter=None,
+                 undo_depth=UNDO_DEPTH):
+        self.table_id = table_id
+        self.store = store
+        self.capacity = capacity
+        self.config = config
+        self.exporter = exporter
+        self.ledger = GuaranteeLedger.from_config(config)
+        # (código, código descartado do início do buffer ou None, análise, (aposta, padrão, confiança, garantia falhou),
+        # livro) antes de cada resultado; a análise é None nas rodadas de um lote (add_results)
+        self.undo_stack = collections.deque(maxlen=undo_depth)
+        self.redo_stack = [] # (revisão, análise, sugestão vigente e livro depois dela), a mais recente desfeita no fim
+        self.lock = threading.RLock()
+        self.version = 0
+        self._rebuild(store.load(capacity)) # O histórico gravado é carregado de uma só vez
+
+    @property
+    def results(self):
+        """Histórico armazenado (ResultHistory, mais recente primeiro), o mesmo que o motor atualiza."""
+        return self.analyzer.history
+
+    def _rebuild(self, codes):
+        self.analyzer = IncrementalAnalyzer.from_codes(codes, self.capacity, self.config)
+        self.analysis_data = self.analyzer.snapshot(self.ledger)
+        # Com histórico recuperado, a sugestão vigente volta a ser a referência da próxima verificação de garantia
+        self._track_suggestion()
+        self.guarantee_failed = False
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.version += 1
+
+    def _track_suggestion(self):
+        self._track(self.analysis_data['suggestion'])
+
+    def _track(self, suggestion):
+        self.last_suggested_bet_type = suggestion['bet_type']
+        self.last_guarantee_pattern = suggestion['guarantee_pattern']
+        self.last_suggestion_confidence = suggestion['confidence']
+
+    def _tracking(self):
+        return (self.last_suggested_bet_type, self.last_guarantee_pattern, self.last_suggestion_confidence, self.guarantee_failed)
+
+    def _restore_tracking(self, tracking):
+        self.last_suggested_bet_type, self.last_guarantee_pattern, self.last_suggestion_confidence, self.guarantee_failed = tracking
+
+    def _append(self, result_type, analysis, tracking, ledger):
+        """Acrescenta ao motor (e ao seu histórico), guardando a revisão com o estado anterior."""
+        dropped = RESULT_CODES[self.results[-1]] if len(self.results) == self.capacity else None
+        self.undo_stack.append((RESULT_CODES[result_type], dropped, analysis, tracking, ledger))
+        self.analyzer.push(result_type)
+
+    def add_result(self, result_type):
+        """Registra um resultado: verifica a garantia da rodada anterior e atualiza a análise de forma incremental."""
+        with self.lock:
+            self.redo_stack.clear()
+            return self._record(result_type)
+
+    def _record(self, result_type, export=True, store=True):
+        if store: # Gravado antes de qualquer mudança: se a gravação falhar, a mesa fica como estava
+            self.store.append(result_type)
+        previous = (self.last_suggested_bet_type, self.last_suggestion_confidence, self.last_guarantee_pattern)
+        tracking = self._tracking()
+        # 1. Verificar a garantia da rodada ANTERIOR (se houver sugestão com alta confiança)
+        # Isso é feito ANTES de adicionar o NOVO resultado.
+        ledger = self._check_guarantee(result_type)
+
+        # 2. Adicionar o novo resultado ao topo do histórico (o buffer circular limita o tamanho)
+        # 3. Atualizar a análise de forma incremental (mesmo resultado de update_analysis com o histórico ATUALIZADO)
+        self._append(result_type, self.analysis_data, tracking, ledger)
+        self.analysis_data = self.analyzer.snapshot(self.ledger)
+
+        # 4. A sugestão atual passa a ser a referência da verificação da PRÓXIMA rodada
+        self._track_suggestion()
+        self.version += 1
+        if export and self.exporter is not None:
+            self._export(result_type, previous, self.guarantee_failed, self.analysis_data)
+        return self.analysis_data
+
+    def _check_guarantee(self, result_type, keep_ledger=True):
+        """
+        Verifica a sugestão vigente contra `result_type` e a registra no livro se ela passou do corte de
+        confiança. Retorna a cópia do livro anterior ao registro (para desfazê-lo), ou None se nada foi
+        registrado ou `keep_ledger` é falso.
+        """
+        if self.last_suggested_bet_type != 'none' and self.last_suggestion_confidence >= self.config.guarantee_confidence:
+            hit = check_guarantee_status(self.last_suggested_bet_type, result_type, self.last_guarantee_pattern)
+            self.guarantee_failed = not hit
+            ledger = self.ledger.copy() if keep_ledger else None # Para desfazer o registro
+            self.ledger.record(self.last_guarantee_pattern, hit)
+            return ledger
+        self.guarantee_failed = False # Reset se não havia sugestão relevante
+        return None
+
+    def _export(self, result_type, previous, guarantee_failed, analysis):
+        bet_type = previous[0]
+        hit = None if bet_type == 'none' else check_guarantee_status(bet_type, result_type, previous[2])
+        self.exporter.record(self.table_id, self.analyzer.seq, result_type, previous, hit, guarantee_failed, analysis)
+
+    def add_results(self, result_types):
+        """
+        Registra vários resultados (mais antigo primeiro) com uma única captura da análise antes do último.
+        O estado final é o mesmo de chamar add_result para cada um: a sugestão vigente antes de cada
+        resultado vem do motor (IncrementalAnalyzer.suggestion, sem a análise completa) e é verificada e
+        registrada no livro como em add_result. Uma lista vazia não altera nada.
+        O lote inteiro é gravado antes de qualquer mudança na mesa, então uma falha de gravação deixa
+        a mesa como estava e o lote pode ser aplicado de novo (ver IngestService).
+        """
+        if not result_types:
+            with self.lock:
+                return self.analysis_data
+        *head, last = result_types
+        with self.lock:
+            self.store.append_codes(bytes(RESULT_CODES[result_type] for result_type in result_types))
+            self.redo_stack.clear()
+            if head:
+                analysis = self.analysis_data
+                for remaining, result_type in zip(range(len(head), 0, -1), head): # Rodadas depois desta no lote
+                    previous = (self.last_suggested_bet_type, self.last_suggestion_confidence, self.last_guarantee_pattern)
+                    tracking = self._tracking()
+                    # O livro anterior só é copiado para as rodadas que ainda cabem em undo_stack ao fim do lote
+                    ledger = self._check_guarantee(result_type, keep_ledger=remaining < self.undo_stack.maxlen)
+                    self._append(result_type, analysis, tracking, ledger)
+                    analysis = None # Sem análise por rodada: desfazê-las recalcula a análise
+                    self._track(self.analyzer.suggestion(self.ledger))
+                    if self.exporter is not None: # Sem análise por rodada: só o resultado e a sugestão que ele avaliou
+                        self._export(result_type, previous, self.guarantee_failed, None)
+                self.analysis_data = self.analyzer.snapshot(self.ledger)
+            return self._record(last, store=False)
+
+    def _undo(self, refresh=True, store=True):
+        if store: # Gravado antes de qualquer mudança, como em _record
+            self.store.truncate(1)
+        code, dropped, analysis, tracking, ledger = self.undo_stack.pop()
+        self.redo_stack.append(((code, dropped, analysis, tracking, ledger), self.analysis_data, self._tracking(),
+                                self.ledger if ledger is not None else None))
+        self.analyzer.pop(dropped)
+        if ledger is not None:
+            self.ledger = ledger
+        if analysis is not None:
+            self.analysis_data = analysis
+            self._restore_tracking(tracking)
+        elif refresh: # Rodada de um lote: a análise anterior não foi guardada, só a sugestão vigente
+            self.analysis_data = self.analyzer.snapshot(self.ledger)
+            self._restore_tracking(tracking)
+        self.version += 1
+
+    def undo(self):
+        """Desfaz o último resultado registrado; retorna a análise restaurada, ou None se não há o que desfazer."""
+        with self.lock:
+            if not self.undo_stack:
+                return None
+            self._undo()
+            return self.analysis_data
+
+    def redo(self):
+        """Registra de novo o último resultado desfeito; retorna a análise restaurada, ou None se não há o que refazer."""
+        with self.lock:
+            if not self.redo_stack:
+                return None
+            revision, analysis, tracking, ledger = self.redo_stack[-1]
+            result_type = RESULT_TYPES[revision[0]]
+            self.store.append(result_type) # Gravado antes de qualquer mudança, como em _record
+            self.redo_stack.pop()
+            self.undo_stack.append(revision)
+            self.analyzer.push(result_type)
+            if ledger is not None:
+                self.ledger = ledger
+            self.analysis_data = analysis
+            self._restore_tracking(tracking)
+            self.version += 1
+            return self.analysis_data
+
+    def edit_result(self, index, result_type):
+        """
+        Corrige o resultado na posição `index` (0 = mais recente). Se ele ainda tem revisão guardada, as
+        rodadas a partir dele são desfeitas e registradas de novo com a correção, refazendo a verificação
+        de garantia, o livro e a sugestão de cada uma; as anteriores não mudam. Mais antigo que isso, o
+        resultado é trocado no histórico, no armazenamento e no motor, e só a análise atual é recalculada.
+        """
+        if result_type not in RESULT_CODES:
+            raise ValueError(f"Resultado desconhecido: {result_type!r}.")
+        with self.lock:
+            if not 0 <= index < len(self.results):
+                raise IndexError("índice fora do histórico")
+            if self.results[index] == result_type:
+                return self.analysis_data
+            self.store.replace(index, result_type) # Gravado antes de qualquer mudança, como em _record
+            self.redo_stack.clear()
+            if index < len(self.undo_stack):
+                newer = [self.results[position] for position in range(index - 1, -1, -1)] # Mais antigo primeiro
+                for step in range(index + 1): # O armazenamento já tem a correção: só a memória é refeita
+                    self._undo(refresh=step == index, store=False) # Só o estado anterior à rodada corrigida é usado
+                self.redo_stack.clear()
+                for replayed in [result_type] + newer:
+                    self._record(replayed, export=False, store=False)
+            else:
+                self.analyzer.replace(index, result_type)
+                self.analysis_data = self.analyzer.snapshot(self.ledger)
+                self._track_suggestion()
+                self.undo_stack.clear() # As análises guardadas não valem mais para o histórico corrigido
+                self.version += 1
+            return self.analysis_data
+
+    def window_stats(self, windows=None):
+        """Totais das janelas de análise (IncrementalAnalyzer.window_stats) para o histórico atual."""
+        with self.lock:
+            return self.analyzer.window_stats(windows)
+
+    def import_results(self, source, newest_first=False, column=None):
+        """
+        Importa resultados em lote e reconstrói a análise uma única vez ao final. Se a importação falhar
+        no meio (ex.: ImportFormatError ou UnicodeDecodeError), os lotes já gravados continuam no
+        armazenamento, então a análise é reconstruída com eles antes de repassar o erro.
+        """
+        with self.lock:
+            report = {}
+            try:
+                import_results(source, self.store, self.capacity, newest_first, column, report)
+            finally:
+                if report.get('imported'):
+                    self._rebuild((encode_history(self.results) + report['tail'])[-self.capacity:])
+            return report
+
+    def clear(self):
+        with self.lock:
+            self.store.clear()
+            self.analyzer = IncrementalAnalyzer(self.capacity, self.config)
+            self.ledger.clear()
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+            self.analysis_data = self.analyzer.snapshot() # Análise com histórico vazio
+            self.last_suggested_bet_type = 'none'
+            self.last_guarantee_pattern = "N/A"
+            self.last_suggestion_confidence = 0
+            self.guarantee_failed = False
+            self.version += 1
+
+    def summary(self):
+        """Linha do painel de mesas: tamanho do histórico, padrão de cores recente e sugestão vigente."""
+        with self.lock:
+            analysis = self.analysis_data
+            return {
+                'table': self.table_id,
+                'results': len(self.results),
+                'color_pattern': analysis['color_analysis']['color_pattern_27'],
+                'suggestion': analysis['suggestion'],
+                'guarantee_failed': self.guarantee_failed,
+                'version': self.version,
+            }
+
+    def close(self):
+        with self.lock:
+            self.store.close()
+
+
+class TableRegistry:
+    """
+    Mesas abertas no processo, por identificador. As mesas são abertas sob demanda e mantidas em
+    memória; `open_many` e `add_results` distribuem o trabalho de várias mesas pelo pool compartilhado.
+    """
+
+    def __init__(self, backend=HISTORY_STORAGE_BACKEND, directory=HISTORY_STORAGE_DIR, capacity=MAX_HISTORY_TO_STORE,
+                 config=DEFAULT_CONFIG, workers=TABLE_WORKERS, exporter=None):
+        self.backend = backend
+        self.directory = directory
+        self.capacity = capacity
+        self.config = config
+        self.exporter = exporter # SnapshotExporter compartilhado pelas mesas, ou None
+        self._tables = {} # table_id -> Future[TableState]; abrir a mesma mesa duas vezes reaproveita o carregamento
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hs-table')
+
+    def _open(self, table_id):
+        return TableState(table_id, open_history_store(table_id, self.backend, self.directory), self.capacity, self.config,
+                          self.exporter)
+
+    def future(self, table_id):
+        """Future (concurrent.futures) do estado da mesa; o carregamento é iniciado no pool se necessário."""
+        table_id = sanitize_table_id(table_id) # Mesmo identificador do armazenamento: uma única mesa por arquivo
+        with self._lock:
+            future = self._tables.get(table_id)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._tables[table_id] = self._executor.submit(self._open, table_id)
+            return future
+
+    def lookup(self, table_id):
+        """
+        Future da mesa se ela já está aberta ou tem histórico gravado; None se não existe. Ao contrário
+        de `future`, nunca cria o armazenamento de uma mesa nova (para leituras de identificadores externos).
+        """
+        table_id = sanitize_table_id(table_id)
+        with self._lock:
+            future = self._tables.get(table_id)
+            if future is not None and not (future.done() and future.exception() is not None):
+                return future
+        if table_id not in list_history_tables(self.backend, self.directory):
+            return None
+        return self.future(table_id)
+
+    def get(self, table_id):
+        """Retorna a mesa, carregando seu histórico gravado na primeira vez."""
+        return self.future(table_id).result()
+
+    def open_many(self, table_ids):
+        """Abre várias mesas em paralelo no pool; retorna os estados na mesma ordem."""
+        futures = [self.future(table_id) for table_id in table_ids]
+        return [future.result() for future in futures]
+
+    def open_stored(self):
+        """Abre todas as mesas com histórico gravado no armazenamento."""
+        return self.open_many(list_history_tables(self.backend, self.directory))
+
+    def table_ids(self):
+        with self._lock:
+            return sorted(self._tables)
+
+    def tables(self):
+        """Mesas já carregadas, em ordem de identificador."""
+        with self._lock:
+            futures = sorted(self._tables.items())
+        return [future.result() for _, future in futures if future.done() and future.exception() is None]
+
+    def submit(self, fn, *args):
+        """Executa `fn(*args)` no pool compartilhado; retorna um concurrent.futures.Future."""
+        return self._executor.submit(fn, *args)
+
+    def add_results(self, results):
+        """
+        Registra resultados em várias mesas de uma vez: {table_id: resultado ou lista de resultados}.
+        Cada mesa é atualizada em uma tarefa do pool (na ordem dada); retorna {table_id: análise atual},
+        com os identificadores sanitizados.
+        """
+        tables = self.open_many(results)
+        futures = {table.table_id: self._executor.submit(table.add_results, [batch] if isinstance(batch, str) else batch)
+                   for table, batch in zip(tables, results.values()) if batch}
+        return {table_id: future.result() for table_id, future in futures.items()}
+
+    def dashboard(self):
+        """Resumo de todas as mesas carregadas (ver TableState.summary)."""
+        return [table.summary() for table in self.tables()]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for table in self.tables():
+            table.close()
+        if self.exporter is not None:
+            self.exporter.close()
@@ -0,0 +1,162 @@
+"""
+Modelo de transições (cadeia de Markov de ordem 0 a k) sobre o histórico armazenado.
+
+As contagens de cada ordem j ficam em um único array plano: para cada contexto de j resultados
+(número em base 3 dos últimos j códigos, o mais recente na unidade) há três contadores, um por
+resultado seguinte. Acrescentar, descartar ou desfazer um resultado custa O(k), trocar um resultado
+do meio do histórico custa O(k^2) e consultar P(próximo | últimos j) custa O(1); a memória é de
+4 * 3 * (3^0 + ... + 3^k) bytes.
+"""
+import array
+
+from .config import optional_numpy
+from .history import RESULT_TYPES
+
+_LETTERS = 'RBY' # Letras de `color_pattern_27` por código
+
+class TransitionModel:
+    """Contagens de transição de ordem 0 a `order`, atualizadas resultado a resultado."""
+
+    def __init__(self, order=3):
+        self.order = order
+        # Início do bloco de cada ordem: 3 * (3^0 + ... + 3^(j-1)); o último item é o tamanho total
+        self.offsets = tuple(3 * (3 ** j - 1) // 2 for j in range(order + 2))
+        self.modulus = 3 ** order
+        self.counts = array.array('I', bytes(4 * self.offsets[-1]))
+        self.context = 0 # Últimos `order` códigos em base 3, o mais recente na unidade
+        self.length = 0 # Resultados contados
+
+    @classmethod
+    def from_codes(cls, codes, order=3):
+        """Constrói o modelo a partir de códigos uint8 (mais antigo primeiro); usa NumPy se disponível."""
+        model = cls(order)
+        np = optional_numpy()
+        if np is None or len(codes) < 64:
+            for code in codes:
+                model.push(code)
+            return model
+
+        codes = np.frombuffer(bytes(codes), dtype=np.uint8).astype(np.int64)
+        counts = np.zeros(model.offsets[-1], dtype=np.int64)
+        context = np.zeros(len(codes), dtype=np.int64) # Contexto de ordem j de cada posição (válido a partir de j)
+        for j in range(min(order, len(codes) - 1) + 1):
+            if j:
+                context[j:] += codes[:-j] * 3 ** (j - 1)
+            block = np.bincount(3 * context[j:] + codes[j:], minlength=3 ** (j + 1))
+            counts[model.offsets[j] : model.offsets[j + 1]] += block
+        model.counts = array.array('I', counts.astype(np.uint32).tobytes())
+        for code in codes[len(codes) - order:].tolist():
+            model.context = (model.context * 3 + code) % model.modulus
+        model.length = len(codes)
+        return model
+
+    def push(self, code):
+        """Conta o novo resultado (o mais recente) após cada um dos seus contextos de ordem 0 a k."""
+        counts, offsets, context = self.counts, self.offsets, self.context
+        scale = 1
+        for j in range(min(self.order, self.length) + 1):
+            counts[offsets[j] + 3 * (context % scale) + code] += 1
+            scale *= 3
+        self.context = (context * 3 + code) % self.modulus
+        self.length += 1
+
+    def drop(self, oldest):
+        """
+        Descarta o resultado mais antigo. `oldest` são os primeiros códigos do histórico (mais antigo
+        primeiro), ao menos min(order + 1, length); só as transições que começam nele são removidas.
+        """
+        counts, offsets = self.counts, self.offsets
+        context = 0
+        for j in range(min(self.order + 1, self.length)):
+            counts[offsets[j] + 3 * context + oldest[j]] -= 1
+            context = context * 3 + oldest[j]
+        self.length -= 1
+
+    def pop(self, previous, code):
+        """
+        Desfaz o `push` de `code`, o resultado mais recente. `previous` são os códigos anteriores a ele
+        (mais antigo primeiro), ao menos os últimos min(order, length - 1).
+        """
+        counts, offsets = self.counts, self.offsets
+        context = 0
+        for previous_code in previous[max(0, len(previous) - self.order):]:
+            context = context * 3 + previous_code
+        self.length -= 1
+        scale = 1
+        for j in range(min(self.order, self.length) + 1):
+            counts[offsets[j] + 3 * (context % scale) + code] -= 1
+            scale *= 3
+        self.context = context
+
+    def push_oldest(self, oldest):
+        """
+        Desfaz o `drop` do resultado mais antigo, já devolvido ao início de `oldest` (os primeiros códigos
+        do histórico, ao menos min(order + 1, length + 1)).
+        """
+        counts, offsets = self.counts, self.offsets
+        context = 0
+        self.length += 1
+        for j in range(min(self.order + 1, self.length)):
+            counts[offsets[j] + 3 * context + oldest[j]] += 1
+            context = context * 3 + oldest[j]
+        if self.length <= self.order: # O histórico inteiro é o contexto atual, agora com o mais antigo
+            self.context = context
+
+    def replace(self, codes, position, code):
+        """
+        Troca o código na posição `position` de `codes` (o histórico contado, mais antigo primeiro, ainda
+        sem a troca): só mudam as transições de até `order` + 1 resultados que passam por ela.
+        """
+        counts, offsets, order = self.counts, self.offsets, self.order
+        start = max(0, position - order)
+        old = list(codes[start : position + order + 1])
+        new = old.copy()
+        local = position - start
+        new[local] = code
+        for segment, change in ((old, -1), (new, 1)):
+            for end in range(local, len(segment)):
+                context, scale = 0, 1
+                for j in range(min(order, start + end) + 1): # Contexto de j resultados antes de `end`
+                    if j:
+                        context += segment[end - j] * scale
+                        scale *= 3
+                    if end - j <= local:
+                        counts[offsets[j] + 3 * context + segment[end]] += change
+        if position >= len(codes) - order: # Troca dentro do contexto atual
+            context = 0
+            for index in range(max(0, len(codes) - order), len(codes)):
+                context = context * 3 + (code if index == position else codes[index])
+            self.context = context
+
+    def distribution(self, order):
+        """Contagens (home, away, draw) do próximo resultado após os últimos `order` resultados; O(1)."""
+        start = self.offsets[order] + 3 * (self.context % 3 ** order)
+        return tuple(self.counts[start : start + 3])
+
+    def analyze(self, min_support=1):
+        """
+        P(próximo | últimos j) na maior ordem j cujo contexto atual tenha ao menos `min_support`
+        ocorrências (ordem 0, a frequência geral, se nenhuma tiver). Probabilidades em %.
+        """
+        if not self.length:
+            return {'order': 0, 'context': '', 'support': 0, 'probabilities': dict.fromkeys(RESULT_TYPES, 0)}
+        for order in range(min(self.order, self.length), -1, -1):
+            counts = self.distribution(order)
+            support = sum(counts)
+            if support >= min_support or order == 0:
+                break
+        context = self.context % 3 ** order
+        letters = []
+        for _ in range(order):
+            context, code = divmod(context, 3)
+            letters.append(_LETTERS[code])
+        return {
+            'order': order,
+            'context': ''.join(letters), # Mais recente primeiro, como em color_pattern_27
+            'support': support,
+            'probabilities': {result: round(count / support * 100, 2) if support else 0 for result, count in zip(RESULT_TYPES, counts)},
+        }
+
+    @property
+    def nbytes(self):
+        return self.counts.itemsize * len(self.counts)
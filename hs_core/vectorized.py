@@ -0,0 +1,481 @@
+"""
+Backend vetorizado (NumPy) dos analisadores: as mesmas análises sobre um array de códigos
+(0 = home/red, 1 = away/blue, 2 = draw/yellow), mais recente primeiro, usando operações de
+array em vez de laços por elemento.
+"""
+try:
+    import numpy as np
+except ImportError as exc: # NumPy é opcional para o restante do pacote
+    raise ImportError("O backend 'numpy' de análise requer a biblioteca NumPy instalada.") from exc
+
+from .analysis import BLUE_RED_DRAW, RED_BLUE_DRAW, SUGGESTION_RULE_TABLE, TAIL_RUN_CAP
+from .config import DEFAULT_CONFIG, NUM_RECENT_RESULTS_FOR_ANALYSIS, get_color
+from .history import RESULT_CODES, RESULT_TYPES, ResultHistory
+from .patterns import BREAK_PATTERNS, DRAW_PATTERNS
+
+COLOR_NAMES = tuple(get_color(result).capitalize() for result in RESULT_TYPES) # ('Red', 'Blue', 'Yellow')
+_PATTERN_LETTERS = bytes.maketrans(bytes(range(len(RESULT_TYPES))), b'RBY')
+
+def results_to_codes(results):
+    """Converte um histórico (lista, ResultHistory ou visão) em um array uint8 de códigos, mais recente primeiro."""
+    if isinstance(results, ResultHistory):
+        return results.to_numpy()
+    if isinstance(results, np.ndarray):
+        return results
+    return np.fromiter((RESULT_CODES[r] for r in results), dtype=np.uint8, count=len(results))
+
+def _ngram_counts(codes, span):
+    """
+    Histograma das sequências de `span` códigos consecutivos, retornado como {(código1, ..., códigoN): n}.
+    Cada padrão depende apenas das cores da ocorrência, então basta consultá-lo uma vez
+    por combinação distinta (no máximo 3^span) em vez de uma vez por posição.
+    """
+    size = len(codes) - span + 1
+    if size <= 0:
+        return {}
+    # Padrões definidos pelo usuário podem ser longos: acima de 3^12 combinações o histograma denso não compensa
+    dense = span <= 12
+    combined = np.zeros(size, dtype=np.int32 if dense else np.int64)
+    for k in range(span):
+        combined = combined * 3 + codes[k : k + size]
+    if dense:
+        counts = np.bincount(combined, minlength=3 ** span)
+        values = np.flatnonzero(counts)
+        counts = counts[values]
+    else:
+        values, counts = np.unique(combined, return_counts=True)
+    ngrams = {}
+    for code, count in zip(values.tolist(), counts.tolist()):
+        digits = []
+        for _ in range(span):
+            digits.append(code % 3)
+            code //= 3
+        ngrams[tuple(reversed(digits))] = count
+    return ngrams
+
+def analyze_surf_np(codes, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """Versão vetorizada de `analyze_surf`."""
+    relevant = codes[:window]
+    sequences = [0, 0, 0]
+    if len(relevant):
+        changes = np.flatnonzero(relevant != relevant[0])
+        sequences[relevant[0]] = int(changes[0]) if len(changes) else len(relevant)
+
+    max_sequences = [0, 0, 0]
+    if len(codes):
+        starts = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1))
+        lengths = np.diff(np.append(starts, len(codes)))
+        values = codes[starts]
+        for code in range(len(RESULT_TYPES)):
+            run_lengths = lengths[values == code]
+            if len(run_lengths):
+                max_sequences[code] = int(run_lengths.max())
+
+    return {
+        'home_sequence': sequences[0],
+        'away_sequence': sequences[1],
+        'draw_sequence': sequences[2],
+        'max_home_sequence': max_sequences[0],
+        'max_away_sequence': max_sequences[1],
+        'max_draw_sequence': max_sequences[2]
+    }
+
+def analyze_colors_np(codes, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """Versão vetorizada de `analyze_colors`."""
+    relevant = codes[:window]
+    if not len(relevant):
+        return {'red': 0, 'blue': 0, 'yellow': 0, 'current_color': '', 'streak': 0, 'color_pattern_27': ''}
+
+    counts = np.bincount(relevant, minlength=3)
+    changes = np.flatnonzero(codes != codes[0])
+    streak = int(changes[0]) if len(changes) else len(codes)
+
+    return {
+        'red': int(counts[0]),
+        'blue': int(counts[1]),
+        'yellow': int(counts[2]),
+        'current_color': get_color(RESULT_TYPES[codes[0]]),
+        'streak': streak,
+        'color_pattern_27': relevant.astype(np.uint8).tobytes().translate(_PATTERN_LETTERS).decode()
+    }
+
+def find_complex_patterns_np(codes, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """Versão vetorizada de `find_complex_patterns`, a partir dos histogramas de cada tamanho de padrão."""
+    relevant = codes[:window]
+    patterns = {}
+    for span in BREAK_PATTERNS.spans:
+        for ngram, count in _ngram_counts(relevant, span).items():
+            for key in BREAK_PATTERNS.match(ngram):
+                patterns[key] = patterns.get(key, 0) + count
+
+    for key in BREAK_PATTERNS.prefix_matches(tuple(relevant[:BREAK_PATTERNS.prefix_length].tolist()), len(relevant)):
+        patterns[key] = patterns.get(key, 0) + 1
+
+    return patterns
+
+def analyze_break_probability_np(codes, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """Versão vetorizada de `analyze_break_probability`."""
+    relevant = codes[:window]
+    if len(relevant) < 2:
+        return {'break_chance': 0, 'last_break_type': ''}
+
+    breaks = int(np.count_nonzero(relevant[:-1] != relevant[1:]))
+    break_chance = (breaks / (len(relevant) - 1)) * 100
+
+    last_break_type = ""
+    if codes[0] != codes[1]:
+        last_break_type = f"Quebrou de {COLOR_NAMES[codes[1]]} para {COLOR_NAMES[codes[0]]}"
+
+    return {
+        'break_chance': round(break_chance, 2),
+        'last_break_type': last_break_type
+    }
+
+def analyze_draw_specifics_np(codes, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """Versão vetorizada de `analyze_draw_specifics`."""
+    relevant = codes[:window]
+    if not len(relevant):
+        return {'draw_frequency_27': 0, 'time_since_last_draw': -1, 'draw_patterns': {}, 'recurrent_draw': False}
+
+    draw_indices = np.flatnonzero(relevant == 2)
+    draw_frequency_27 = (len(draw_indices) / len(relevant)) * 100
+
+    all_draws = np.flatnonzero(codes == 2)
+    time_since_last_draw = int(all_draws[0]) if len(all_draws) else -1
+
+    draw_patterns_found = {}
+    for span in DRAW_PATTERNS.spans:
+        for ngram, count in _ngram_counts(relevant, span).items():
+            for key in DRAW_PATTERNS.match(ngram):
+                draw_patterns_found[key] = draw_patterns_found.get(key, 0) + count
+
+    # Mesmo cálculo de intervalo de analyze_draw_specifics
+    intervals = draw_indices[:-1].astype(np.int64) - draw_indices[1:] - 1
+    recurrent_draw = bool(np.any((intervals >= 0) & (intervals <= 3)))
+
+    return {
+        'draw_frequency_27': round(draw_frequency_27, 2),
+        'time_since_last_draw': time_since_last_draw,
+        'draw_patterns': draw_patterns_found,
+        'recurrent_draw': recurrent_draw
+    }
+
+def analyze_numpy(results, window=NUM_RECENT_RESULTS_FOR_ANALYSIS):
+    """Executa os cinco analisadores vetorizados; usado pelo backend 'numpy' de update_analysis."""
+    codes = results_to_codes(results)
+    return (analyze_surf_np(codes, window), analyze_colors_np(codes, window), find_complex_patterns_np(codes, window),
+            analyze_break_probability_np(codes, window), analyze_draw_specifics_np(codes, window))
+
+# --- Regras da sugestão em todas as rodadas de um replay (backtest) ---
+
+_NO_COLOR = 3 # "Cor anterior" da sequência atual quando ela ocupa a janela inteira
+# Regra 1 de generate_advanced_suggestion por cor atual: (apostas, peso, sequência mínima, garantia)
+_SURF_RULES = {
+    'red': (('away',), 'weight_surf_max', 'surf_min_streak', "Surf Max Quebra: Red"),
+    'blue': (('home',), 'weight_surf_max', 'surf_min_streak', "Surf Max Quebra: Blue"),
+    'yellow': (('home', 'away'), 'weight_surf_max_draw', 'surf_min_draw_streak', "Surf Max Quebra: Empate"),
+}
+# Regras de empate de generate_advanced_suggestion, na ordem dos bits do campo de empates
+_DRAW_RULES = (
+    ('weight_draw_delayed', "Empate Atrasado/Baixa Frequência"),
+    ('weight_draw_sequence', "Padrão Red-Blue-Draw"),
+    ('weight_draw_sequence', "Padrão Blue-Red-Draw"),
+    ('weight_draw_recurrent', "Empate Recorrente"),
+)
+_GENERAL_BREAK_BETS = {'red': 'away', 'blue': 'home'} # Regra 7: quebra da sequência atual
+GENERAL_BREAK_GUARANTEE = "Alta Probabilidade de Quebra Geral"
+
+def _trailing_sums(indicator, lower):
+    """Soma de `indicator` nas posições lower[t] .. t de cada t (0 se lower[t] > t)."""
+    prefix = np.concatenate(([0], np.cumsum(indicator, dtype=np.int64)))
+    upper = np.arange(1, len(indicator) + 1)
+    return prefix[upper] - prefix[np.clip(lower, 0, upper)]
+
+def _range_max(values, lower, upper):
+    """max(values[lower[i] .. upper[i]]) para cada i (intervalos não vazios), por uma tabela esparsa de potências de 2."""
+    levels = [values]
+    while 2 ** len(levels) <= len(values):
+        step = 2 ** (len(levels) - 1)
+        levels.append(np.maximum(levels[-1][:-step], levels[-1][step:]))
+    level = np.log2(upper - lower + 1).astype(np.int64)
+    result = np.zeros(len(lower), dtype=values.dtype)
+    for k in np.unique(level).tolist():
+        chosen = level == k
+        result[chosen] = np.maximum(levels[k][lower[chosen]], levels[k][upper[chosen] - 2 ** k + 1])
+    return result
+
+def _window_pattern_counts(codes, sizes, patterns, keys):
+    """
+    Ocorrências de cada chave de `keys` na janela de cada rodada (os últimos sizes[t] resultados até t), como
+    PatternSet.count as conta lendo a janela mais recente primeiro: {chave: array}.
+    """
+    n = len(codes)
+    positions = np.arange(n)
+    counts = {key: np.zeros(n, dtype=np.int64) for key in keys}
+    for span in patterns.spans:
+        if span > n:
+            break
+        # Sequência que termina (no mais recente) em cada posição, lida do mais recente para o mais antigo
+        ngrams = np.zeros(n - span + 1, dtype=np.int64)
+        for k in range(span):
+            ngrams = ngrams * 3 + codes[span - 1 - k : n - k]
+        ngrams = np.concatenate((np.full(span - 1, 3 ** span), ngrams)) # Posições sem `span` resultados: nenhuma chave
+        matched = {}
+        for value in range(3 ** span):
+            digits = np.base_repr(value, 3).zfill(span)
+            for key in patterns.match(tuple(map(int, digits))):
+                if key in counts:
+                    matched.setdefault(key, []).append(value)
+        for key, values in matched.items():
+            table = np.zeros(3 ** span + 1, dtype=bool)
+            table[values] = True
+            counts[key] += _trailing_sums(table[ngrams], positions - sizes + span)
+    for prefix, key, guard in patterns.anchored:
+        if key not in counts:
+            continue
+        found = sizes >= len(prefix) # Janelas menores que o prefixo (inclusive as do início) não o contêm
+        for k, code in enumerate(prefix[:n]):
+            found[k:] &= codes[: n - k] == code
+        if guard is not None:
+            found &= guard[0](sizes, guard[1])
+        counts[key] += found
+    return counts
+
+def _following_counts(codes, keys, positions, rounds, lower):
+    """
+    Para cada rodada t de `rounds`, quantas posições e de `positions` em lower .. t - 1 têm a mesma chave
+    que t (o mesmo contexto terminando nelas), separadas pelo código seguinte: array (3, rodadas). As
+    posições, crescentes, incluem as rodadas. Retorna também o posto de cada chave (por posição), que
+    identifica o contexto e o estende a um resultado mais antigo.
+    """
+    n = len(codes)
+    order = np.argsort(keys, kind='stable') # Por chave e, dentro dela, por posição
+    ordered = positions[order]
+    sorted_keys = keys[order]
+    ranks = np.concatenate(([0], np.cumsum(sorted_keys[1:] != sorted_keys[:-1])))
+    index = np.empty(n, dtype=np.int64)
+    index[ordered] = np.arange(len(ordered))
+    rank = np.empty(n, dtype=np.int64)
+    rank[ordered] = ranks
+    end = index[rounds] # As ocorrências anteriores a t vêm logo antes dela na ordem
+    begin = np.minimum(np.searchsorted(ranks * n + ordered, rank[rounds] * n + lower), end)
+    following = codes[np.minimum(ordered + 1, n - 1)]
+    counts = np.empty((3, len(rounds)), dtype=np.int64)
+    for code in range(3):
+        prefix = np.concatenate(([0], np.cumsum(following == code)))
+        counts[code] = prefix[end] - prefix[begin]
+    return counts, rank
+
+def _context_keys(codes, length, positions):
+    """Contexto dos `length` resultados que terminam em cada posição, em base 3 (o mais recente na unidade)."""
+    keys = np.zeros(len(positions), dtype=np.int64)
+    for k in range(length - 1, -1, -1):
+        keys = keys * 3 + codes[positions - k]
+        if k and k % 30 == 0: # Recomprime antes de passar de 63 bits
+            keys = np.unique(keys, return_inverse=True)[1].astype(np.int64)
+    return keys
+
+def _context_letters(codes, end, length):
+    return ''.join('RBY'[code] for code in codes[end - length + 1 : end + 1][::-1].tolist())
+
+def _rounded_percent(counts, totals):
+    """round(counts / totals * 100, 2) como em Python (0 com total zero), calculado uma vez por par distinto."""
+    base = int(totals.max(initial=0)) + 1
+    pairs, inverse = np.unique(counts * base + totals, return_inverse=True)
+    values = np.array([round(pair // base / (pair % base) * 100, 2) if pair % base else 0 for pair in pairs.tolist()], dtype=float)
+    return values[inverse.reshape(-1)]
+
+def _threshold_table(size, check):
+    """table[contagem, tamanho] = check(contagem, tamanho), avaliado em Python para os valores possíveis."""
+    return np.array([[check(count, total) for total in range(size + 1)] for count in range(size + 1)], dtype=bool)
+
+def suggestion_rounds(codes, max_history, config=DEFAULT_CONFIG):
+    """
+    Regras de generate_advanced_suggestion que disparam depois de cada resultado de `codes` (uint8, mais
+    antigo primeiro), como em IncrementalAnalyzer.suggestion com `max_history` resultados armazenados e
+    sem o livro de garantias. As entradas das regras saem de operações de array sobre todas as rodadas:
+    sequências e máximos de surf por uma tabela esparsa das sequências, padrões e empates da janela por
+    somas acumuladas, e as ocorrências anteriores dos contextos (transições e sequência repetida)
+    ordenando as posições pelo contexto, um comprimento por vez.
+
+    Retorna (combinação de cada rodada, combinações), com cada combinação distinta de regras como
+    (regras, quebra geral): as regras são tuplas (índice da aposta em RESULT_TYPES, peso, garantia) e a
+    quebra geral, (aposta, peso, garantia) ou None, só pontua se a aposta dela ainda tiver menos de 70
+    pontos. A penalidade do livro e a escolha da aposta ficam com quem chama (backtest._resolve_rules).
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    n = len(codes)
+    rounds = np.arange(n)
+    stored = np.minimum(rounds + 1, max_history)
+    oldest = rounds + 1 - stored
+    window = min(config.window, max_history)
+    sizes = np.minimum(rounds + 1, window)
+    valid = sizes >= max(config.min_results_for_suggestion, 1)
+    colors = tuple(get_color(result) for result in RESULT_TYPES)
+    bets = {result: code for code, result in enumerate(RESULT_TYPES)}
+
+    # Sequência atual (limitada ao histórico armazenado) e a maior anterior do mesmo código ainda armazenada
+    change = np.ones(n, dtype=bool)
+    change[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(change)
+    run = np.cumsum(change) - 1
+    lengths = np.diff(np.append(starts, n))
+    ends = starts + lengths - 1
+    streak = np.minimum(rounds - starts[run] + 1, stored)
+    longest = np.zeros(n, dtype=np.int64)
+    rank = np.empty(len(starts), dtype=np.int64)
+    for code in range(3):
+        mine = np.flatnonzero(codes[starts] == code)
+        rank[mine] = np.arange(len(mine))
+        chosen = np.flatnonzero(codes == code)
+        current = rank[run[chosen]]
+        first = np.searchsorted(ends[mine], oldest[chosen]) # Primeira sequência do código que ainda termina no histórico
+        before = first < current
+        chosen, current, first = chosen[before], current[before], first[before]
+        longest[chosen] = np.minimum(lengths[mine][first], ends[mine][first] - oldest[chosen] + 1)
+        inner = first + 1 < current
+        if inner.any():
+            longest[chosen[inner]] = np.maximum(longest[chosen[inner]],
+                                                _range_max(lengths[mine], first[inner] + 1, current[inner] - 1))
+    minimum = np.array([getattr(config, _SURF_RULES[color][2]) for color in colors])
+    surf = np.where(valid & (streak >= longest) & (streak >= minimum[codes]), codes + 1, 0)
+
+    # Padrões recorrentes: estado do fim do histórico e bits das entradas da tabela de regras que disparam
+    before = np.where(streak < sizes, codes[np.maximum(rounds - streak, 0)], _NO_COLOR)
+    tails = (codes * TAIL_RUN_CAP + np.minimum(streak, TAIL_RUN_CAP) - 1) * 4 + before
+    tail_entries = {}
+    for (color, size, previous), entries in SUGGESTION_RULE_TABLE.items():
+        previous = _NO_COLOR if previous is None else colors.index(previous)
+        tail_entries[(colors.index(color) * TAIL_RUN_CAP + size - 1) * 4 + previous] = entries
+    width = max(map(len, tail_entries.values()), default=0)
+    counts = _window_pattern_counts(codes, sizes, BREAK_PATTERNS, {entry[0] for entries in tail_entries.values() for entry in entries})
+    patterns = np.zeros(n, dtype=np.int64)
+    for tail, entries in tail_entries.items():
+        chosen = np.flatnonzero(valid & (tails == tail))
+        bits = np.zeros(len(chosen), dtype=np.int64)
+        for bit, (key, *_) in enumerate(entries):
+            count = counts[key][chosen]
+            bits |= ((count > 0) & (count >= config.pattern_recurrence)).astype(np.int64) << bit
+        patterns[chosen] = np.where(bits > 0, tail << width | bits, 0)
+
+    # Empates: atrasado, sequências Red-Blue-Draw / Blue-Red-Draw e recorrente
+    draw = bets['draw']
+    last_draw = np.maximum.accumulate(np.where(codes == draw, rounds, -1))
+    since = np.where((last_draw >= 0) & (rounds - last_draw < stored), rounds - last_draw, -1)
+    low = _threshold_table(window, lambda count, total: bool(total) and round(count / total * 100, 2) < config.draw_delay_max_frequency)
+    draws = _trailing_sums(codes == draw, rounds - sizes + 1)
+    draw_rules = (valid & (since >= config.draw_delay_rounds) & low[draws, sizes]).astype(np.int64)
+    previous = codes[np.maximum(rounds - 1, 0)]
+    red_blue = np.array([[colors[a] == 'away' and colors[b] == 'home' for b in range(3)] for a in range(3)])
+    blue_red = np.array([[colors[a] == 'home' and colors[b] == 'away' for b in range(3)] for a in range(3)]) & ~red_blue
+    draw_counts = _window_pattern_counts(codes, sizes, DRAW_PATTERNS, {RED_BLUE_DRAW, BLUE_RED_DRAW})
+    for bit, (table, key) in enumerate(((red_blue, RED_BLUE_DRAW), (blue_red, BLUE_RED_DRAW)), 1):
+        draw_rules |= (valid & (sizes >= 2) & table[codes, previous] & (draw_counts[key] > 0)).astype(np.int64) << bit
+    positions = np.flatnonzero(codes == draw)
+    # Intervalo entre empates consecutivos da janela calculado como em analyze_draw_specifics (índices
+    # da janela mais recente primeiro: o do empate mais novo menos o do anterior, menos 1)
+    intervals = positions[:-1] - positions[1:] - 1
+    close = np.zeros(n + 1, dtype=bool)
+    close[positions[:-1][(intervals >= 0) & (intervals <= 3)]] = True
+    prefix = np.concatenate(([0], np.cumsum(close)))
+    start = rounds - sizes + 1
+    pairs = prefix[np.maximum(last_draw, start)] - prefix[start]
+    draw_rules |= (valid & (since >= 0) & (since <= 3) & (pairs > 0)).astype(np.int64) << 3
+
+    # Transições: maior ordem com contexto suficiente no histórico armazenado
+    order = np.zeros(n, dtype=np.int64)
+    following = np.zeros((3, n), dtype=np.int64)
+    context = np.zeros(n, dtype=np.int64)
+    for size in range(1, config.markov_order + 1):
+        positions = np.arange(size - 1, n)
+        keys = _context_keys(codes, size, positions)
+        chosen = np.flatnonzero(valid & (stored >= size))
+        found, _ = _following_counts(codes, keys, positions, chosen, oldest[chosen] + size - 1)
+        enough = found.sum(axis=0) >= config.markov_min_support
+        order[chosen[enough]] = size
+        following[:, chosen[enough]] = found[:, enough]
+        context[chosen[enough]] = keys[chosen[enough] - size + 1]
+    markov = np.zeros(n, dtype=np.int64)
+    chosen = np.flatnonzero(order > 0)
+    if len(chosen):
+        support = following[:, chosen].sum(axis=0)
+        percent = np.stack([_rounded_percent(following[code, chosen], support) for code in range(3)])
+        bet = np.argmax(percent, axis=0)
+        fired = percent[bet, np.arange(len(chosen))] >= config.markov_min_probability
+        # Ordem e contexto em um só número: contextos das ordens menores antes, aposta na unidade
+        offsets = (3 ** order[chosen] - 3) // 2
+        markov[chosen[fired]] = ((offsets + context[chosen]) * 3 + bet + 1)[fired]
+
+    # Sequência repetida: maior contexto a partir de suffix_min_context com ocorrências suficientes
+    upper = np.minimum(config.suffix_max_context, stored - 1)
+    size = max(config.suffix_min_context, 1)
+    repeated = np.zeros(n, dtype=np.int64)
+    repeated_counts = np.zeros((3, n), dtype=np.int64)
+    repeated_rank = np.zeros(n, dtype=np.int64)
+    alive = np.flatnonzero(valid & (upper >= size))
+    positions = np.arange(size - 1, n)
+    keys = _context_keys(codes, size, positions) if len(alive) else None
+    while len(alive):
+        found, rank = _following_counts(codes, keys, positions, alive, oldest[alive] + size - 1)
+        enough = found.sum(axis=0) >= max(config.suffix_min_occurrences, 1)
+        alive = alive[enough]
+        repeated[alive] = size
+        repeated_counts[:, alive] = found[:, enough]
+        repeated_rank[alive] = rank[alive]
+        alive = alive[upper[alive] > size]
+        if not len(alive):
+            break
+        # Só as posições com o mesmo contexto de alguma rodada ainda viva podem coincidir por mais um resultado
+        wanted = np.zeros(n, dtype=bool)
+        wanted[rank[alive]] = True
+        positions = positions[wanted[rank[positions]] & (positions >= size)]
+        keys = rank[positions] * 3 + codes[positions - size]
+        size += 1
+    suffix = np.zeros(n, dtype=np.int64)
+    chosen = np.flatnonzero(repeated)
+    if len(chosen):
+        found = repeated_counts[:, chosen]
+        bet = np.argmax(found, axis=0)
+        fired = found[bet, np.arange(len(chosen))] / found.sum(axis=0) * 100 >= config.suffix_min_probability
+        chosen, bet = chosen[fired], bet[fired]
+        identity = (repeated[chosen] * n + repeated_rank[chosen]) * 3 + bet
+        suffix[chosen] = np.unique(identity, return_inverse=True)[1].reshape(-1) + 1
+
+    # Quebra geral: chance de quebra alta e sequência atual curta
+    breaks = _trailing_sums(change & (rounds > 0), rounds - sizes + 2)
+    high = _threshold_table(window, lambda count, total: (round(count / (total - 1) * 100, 2) if total >= 2 else 0) > config.general_break_chance)
+    target = np.array([bets[_GENERAL_BREAK_BETS[color]] + 1 if color in _GENERAL_BREAK_BETS else 0 for color in colors])
+    general = np.where(valid & high[breaks, sizes] & (streak < config.general_break_max_streak), target[codes], 0)
+
+    fields = (surf, patterns, draw_rules, markov, general, suffix)
+    radix = 1
+    for values in fields:
+        radix *= int(values.max(initial=0)) + 1
+    if radix < 2 ** 63:
+        combined = np.zeros(n, dtype=np.int64)
+        for values in fields:
+            combined = combined * (int(values.max(initial=0)) + 1) + values
+    else:
+        combined = np.stack(fields, axis=1)
+    _, samples, combination = np.unique(combined, axis=0 if combined.ndim > 1 else None, return_index=True, return_inverse=True)
+
+    combinations = []
+    for t in samples.tolist():
+        rules = []
+        if surf[t]:
+            bet_types, weight, _, guarantee = _SURF_RULES[colors[surf[t] - 1]]
+            rules += [(bets[bet_type], getattr(config, weight), guarantee) for bet_type in bet_types]
+        if patterns[t]:
+            entries = tail_entries[int(patterns[t]) >> width]
+            rules += [(bets[bet_type], getattr(config, weight), str(key))
+                      for bit, (key, bet_type, _, weight, _) in enumerate(entries) if patterns[t] >> bit & 1]
+        rules += [(draw, getattr(config, weight), guarantee) for bit, (weight, guarantee) in enumerate(_DRAW_RULES) if draw_rules[t] >> bit & 1]
+        if markov[t]:
+            size = int(order[t])
+            rules.append((int(markov[t] - 1) % 3, config.weight_markov, f"Transição de Ordem {size}: {_context_letters(codes, t, size)}"))
+        if suffix[t]:
+            size = int(repeated[t])
+            bet = int(np.argmax(repeated_counts[:, t]))
+            rules.append((bet, config.weight_suffix_match, f"Sequência Repetida ({size}): {_context_letters(codes, t, size)}"))
+        combinations.append((tuple(rules), (int(general[t]) - 1, config.weight_general_break, GENERAL_BREAK_GUARANTEE) if general[t] else None))
+    return combination.reshape(-1), combinations
@@ -0,0 +1,161 @@
+"""
+Análise de várias janelas de uma vez a partir de somas acumuladas.
+
+Para cada resultado t do histórico (em ordem de chegada), WindowCounts guarda a linha C(t) com os
+totais acumulados até ele: resultados de cada tipo, quebras (t-1 -> t) e ocorrências de cada
+padrão deslizante de [quebras] que terminam em t. Os totais de qualquer janela dos últimos w
+resultados são diferenças entre duas linhas, e cada padrão de tamanho s só conta se começar
+dentro da janela. Acrescentar um resultado copia a linha anterior e soma os poucos eventos novos.
+Consultar uma janela custa O(colunas), sem percorrer os resultados. Só as últimas
+`max_window` + 1 linhas são mantidas, em um anel, mais SPARE_ROWS para desfazer acréscimos (`pop`)
+sem remontar as somas. O anel começa com a linha C(0) e dobra conforme o histórico cresce, até esse
+limite; antes disso ele não dá a volta, então a linha t continua na posição t ao crescer. Como nenhuma
+janela passa de `max_window` resultados, as somas são guardadas módulo 2**16 (2 bytes por coluna)
+quando `max_window` cabe nisso, e as diferenças entre linhas continuam exatas.
+"""
+import array
+import collections
+import itertools
+
+from .patterns import BREAK_PATTERNS
+
+_BREAKS = 3 # Coluna das quebras; as colunas 0, 1 e 2 são os códigos dos resultados
+_FIRST_PATTERN = 4
+SPARE_ROWS = 128 # Acréscimos seguidos que `pop` desfaz em O(colunas); além disso, remonta a partir dos códigos
+
+class WindowCounts:
+    """Somas acumuladas do histórico para consultar janelas de até `max_window` resultados."""
+
+    def __init__(self, max_window, patterns=BREAK_PATTERNS):
+        self.max_window = max_window
+        self.patterns = patterns
+        self.columns = {} # (chave, tamanho) -> coluna
+        self.span_columns = [] # (tamanho, primeira coluna, chaves em ordem de coluna), por tamanho
+        column = _FIRST_PATTERN
+        for span, group in itertools.groupby(patterns.sliding_keys, key=lambda item: item[0]):
+            keys = tuple(key for _, key in group)
+            self.span_columns.append((span, column, keys))
+            for key in keys:
+                self.columns[(key, span)] = column
+                column += 1
+        self.width = column
+        self.max_depth = max_window + 1 + SPARE_ROWS
+        self.typecode, self.mask = ('H', 0xFFFF) if max_window <= 0xFFFF else ('I', 0xFFFFFFFF)
+        self.rowbytes = array.array(self.typecode).itemsize * self.width
+        self.recent = collections.deque(maxlen=max(patterns.spans + (patterns.prefix_length, 2))) # Códigos, mais recente primeiro
+        self._reset()
+
+    def _reset(self):
+        self.depth = 1 # Linhas alocadas no anel, até `max_depth`
+        self.rows = array.array(self.typecode, bytes(self.rowbytes)) # C(t) na linha t % depth; C(0) = 0
+        self.recent.clear()
+        self.length = 0 # Resultados acrescentados
+        self.lowest = 0 # Linha mais antiga ainda no anel
+
+    def _grow(self):
+        """Dobra o anel (até `max_depth` linhas); só é chamado antes de ele dar a volta."""
+        depth = min(2 * self.depth, self.max_depth)
+        self.rows.frombytes(bytes(self.rowbytes * (depth - self.depth)))
+        self.depth = depth
+
+    def _load(self, codes):
+        for code in codes[-self.max_window:] if self.max_window else b'':
+            self.push(code)
+
+    @classmethod
+    def from_codes(cls, codes, max_window, patterns=BREAK_PATTERNS):
+        """Monta as somas a partir de códigos uint8 (mais antigo primeiro); só os últimos `max_window` importam."""
+        counts = cls(max_window, patterns)
+        counts._load(codes)
+        return counts
+
+    def push(self, code):
+        """Acrescenta o resultado mais recente: C(t) = C(t-1) + eventos de t."""
+        if self.length + 1 >= self.depth < self.max_depth:
+            self._grow()
+        rows, width, recent, mask = self.rows, self.width, self.recent, self.mask
+        start = ((self.length + 1) % self.depth) * width
+        previous = (self.length % self.depth) * width
+        rows[start:start + width] = rows[previous:previous + width]
+        rows[start + code] = (rows[start + code] + 1) & mask
+        recent.appendleft(code)
+        size = len(recent)
+        if size >= 2 and recent[1] != code:
+            rows[start + _BREAKS] = (rows[start + _BREAKS] + 1) & mask
+        codes = tuple(recent)
+        match, columns = self.patterns.match, self.columns
+        for span in self.patterns.spans:
+            if span > size:
+                break
+            for key in match(codes[:span]):
+                column = start + columns[(key, span)]
+                rows[column] = (rows[column] + 1) & mask
+        self.length += 1
+        self.lowest = max(self.lowest, self.length + 1 - self.depth)
+
+    def pop(self, codes):
+        """
+        Desfaz o último `push`; `codes` é o histórico depois disso (mais antigo primeiro). Se a linha mais
+        antiga que as janelas consultam já saiu do anel (ou as somas, remontadas, não cobrem `codes`), elas
+        são remontadas a partir de `codes`.
+        """
+        length = self.length - 1
+        if length < min(len(codes), self.max_window) or length - min(length, self.max_window) < self.lowest:
+            self._reset()
+            self._load(codes)
+            return
+        self.length = length
+        recent = self.recent
+        recent.popleft()
+        if len(recent) < min(recent.maxlen, length, len(codes)): # Códigos já descartados do histórico não são consultados
+            recent.append(codes[-len(recent) - 1])
+
+    def replace(self, codes, index):
+        """
+        Acompanha a troca do resultado na posição `index` (0 = mais recente) de `codes`, o histórico já
+        corrigido: as somas só são remontadas se a troca muda alguma janela de até `max_window`.
+        """
+        if index < self.max_window + max(self.patterns.spans + (self.recent.maxlen,)):
+            self._reset()
+            self._load(codes)
+
+    def _row(self, t):
+        start = (t % self.depth) * self.width
+        return self.rows[start:start + self.width]
+
+    def window(self, size):
+        """Totais dos últimos `size` resultados (limitado ao disponível e a `max_window`)."""
+        size = max(0, min(size, self.length, self.max_window))
+        end, mask = self.length, self.mask
+        top, bottom = self._row(end), self._row(end - size)
+        stats = {result: (top[code] - bottom[code]) & mask for code, result in enumerate(('home', 'away', 'draw'))}
+        stats['total'] = size
+
+        breaks = (top[_BREAKS] - self._row(end - size + 1)[_BREAKS]) & mask if size >= 2 else 0
+        patterns = {}
+        for span, first, keys in self.span_columns:
+            if span > size:
+                break
+            base = self._row(end - size + span - 1) # Ocorrências que terminam antes desta linha começam fora da janela
+            for column, key in enumerate(keys, first):
+                count = (top[column] - base[column]) & mask
+                if count:
+                    patterns[key] = count
+        prefix = tuple(itertools.islice(self.recent, min(self.patterns.prefix_length, size)))
+        for key in self.patterns.prefix_matches(prefix, size):
+            patterns[key] = patterns.get(key, 0) + 1
+
+        return {
+            'stats': stats,
+            'break_chance': round(breaks / (size - 1) * 100, 2) if size >= 2 else 0,
+            'draw_frequency': round(stats['draw'] / size * 100, 2) if size else 0,
+            'break_patterns': patterns,
+        }
+
+    def query(self, windows, stored=None):
+        """{tamanho pedido: totais da janela} para cada tamanho; `stored` limita ao histórico armazenado."""
+        return {size: self.window(size if stored is None else min(size, stored)) for size in windows}
+
+    @property
+    def nbytes(self):
+        return self.rows.itemsize * len(self.rows)
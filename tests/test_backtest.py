@@ -0,0 +1,72 @@
+"""Backtest: as sugestões passam pelo livro de garantias como no app, e os dois backends dão o mesmo relatório."""
+import dataclasses
+import random
+import time
+
+import pytest
+
+from hs_core import DEFAULT_CONFIG, RESULT_TYPES
+from hs_core.backtest import run_backtest
+from hs_core.benchmark import TIME_LIMITS
+from hs_core.storage import MemoryHistoryStore
+from hs_core.tables import TableState
+
+def _results(seed, size, weights=(45, 45, 10)):
+    return random.Random(seed).choices(RESULT_TYPES, weights=weights, k=size)
+
+# Limites baixos para que as regras de padrões, transições e sequência repetida disparem em históricos curtos
+LOOSE_CONFIG = dataclasses.replace(DEFAULT_CONFIG, pattern_recurrence=1, markov_min_support=3, markov_min_probability=40,
+                                   suffix_min_context=2, suffix_min_occurrences=2, suffix_min_probability=50)
+
+def test_backtest_records_gated_suggestions_like_the_app():
+    results = _results(7, 900) # Mais antigo primeiro
+    table = TableState('mesa', MemoryHistoryStore(), 1000)
+    for result in results:
+        table.add_result(result)
+    report = run_backtest(list(table.results), max_history=1000)
+    assert report['rounds'] == len(results)
+    assert report['gated_suggestions'] == table.ledger.rounds > 0
+    assert run_backtest(list(table.results), max_history=1000, ledger=False)['gated_suggestions'] != table.ledger.rounds
+
+def test_chunked_backtest_without_ledger_matches_sequential():
+    results = _results(8, 600)
+    assert run_backtest(results, max_history=100, workers=2, ledger=False) == run_backtest(results, max_history=100, ledger=False)
+
+def test_parallel_backtest_defaults_to_no_ledger():
+    results = _results(9, 600)
+    assert run_backtest(results, max_history=100, workers=2) == run_backtest(results, max_history=100, ledger=False)
+    with pytest.raises(ValueError):
+        run_backtest(results, max_history=100, workers=2, ledger=True)
+
+@pytest.mark.parametrize('config', [DEFAULT_CONFIG, LOOSE_CONFIG], ids=['padrao', 'limites-baixos'])
+@pytest.mark.parametrize('max_history', [5, 40, 1000])
+@pytest.mark.parametrize('ledger', [False, True])
+def test_numpy_backend_matches_incremental(config, max_history, ledger):
+    pytest.importorskip('numpy')
+    for seed, weights in enumerate([(45, 45, 10), (60, 35, 5), (30, 30, 40)]):
+        results = _results(seed, 700, weights)
+        assert run_backtest(results, max_history, config, ledger=ledger, backend='numpy') == \
+            run_backtest(results, max_history, config, ledger=ledger, backend='python')
+
+@pytest.mark.parametrize('results', [[], ['draw'], ['home'] * 300, ['home', 'away'] * 150, ['draw', 'draw', 'home'] * 100],
+                         ids=['vazio', 'um', 'constante', 'alternado', 'empates'])
+def test_numpy_backend_matches_incremental_on_degenerate_histories(results):
+    pytest.importorskip('numpy')
+    for config in (DEFAULT_CONFIG, LOOSE_CONFIG):
+        assert run_backtest(results, 50, config, backend='numpy') == run_backtest(results, 50, config, backend='python')
+
+def test_chunked_numpy_backtest_matches_incremental():
+    pytest.importorskip('numpy')
+    results = _results(10, 600)
+    assert run_backtest(results, max_history=100, workers=2, backend='numpy') == run_backtest(results, max_history=100, ledger=False, backend='python')
+
+def test_numpy_backtest_throughput():
+    """Rodadas por segundo do backend padrão com o livro, dentro do limite do alvo 'backtest_round[numpy]' do benchmark."""
+    pytest.importorskip('numpy')
+    results = _results(11, 200_000)
+    run_backtest(results[:2_000], backend='numpy') # Importações sob demanda
+    start = time.perf_counter()
+    report = run_backtest(results, backend='numpy')
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    assert report['rounds'] == len(results)
+    assert elapsed_us / len(results) < TIME_LIMITS['backtest_round[numpy]']
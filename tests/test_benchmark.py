@@ -0,0 +1,39 @@
+"""Benchmark: regressões pela razão das medianas e limites absolutos por alvo, em relatórios montados à mão."""
+import json
+
+from hs_core import benchmark
+from hs_core.benchmark import TIME_LIMITS, check_time_limits, compare_reports
+
+def _report(**p50_by_target):
+    """Relatório com as medianas dadas por alvo: {alvo: {tamanho: p50}}."""
+    return {'meta': {}, 'results': {name: {str(size): {'p50_us': p50} for size, p50 in by_size.items()}
+                                    for name, by_size in p50_by_target.items()}}
+
+def test_compare_reports_flags_only_ratios_above_the_threshold():
+    baseline = _report(analyze_surf={27: 10.0, 1000: 20.0}, add_result={27: 50.0})
+    current = _report(analyze_surf={27: 12.5, 1000: 25.2}, add_result={27: 40.0})
+    assert compare_reports(baseline, current) == [('analyze_surf', '1000', 20.0, 25.2, 1.26)] # 1,25 exato não é regressão
+    assert compare_reports(baseline, current, threshold=1.1) == [('analyze_surf', '27', 10.0, 12.5, 1.25),
+                                                                  ('analyze_surf', '1000', 20.0, 25.2, 1.26)]
+
+def test_compare_reports_skips_targets_and_sizes_missing_from_the_baseline():
+    baseline = _report(analyze_surf={27: 10.0}, add_result={27: 0.0})
+    current = _report(analyze_surf={27: 11.0, 1000: 99.0}, add_result={27: 5.0}, analyze_colors={27: 99.0})
+    assert compare_reports(baseline, current) == []
+    assert compare_reports({}, current) == []
+
+def test_check_time_limits_uses_the_absolute_limit_of_each_target():
+    limits = {'backtest_round[numpy]': 15}
+    report = _report(**{'backtest_round[numpy]': {27: 8.0, 1000: 15.0, 100_000: 15.5}, 'backtest_round': {27: 190.0}})
+    assert check_time_limits(report, limits) == [('backtest_round[numpy]', '100000', 15.5, 15)]
+    assert check_time_limits(report, {}) == []
+    assert set(TIME_LIMITS) <= set(benchmark.TARGETS) # Todo limite corresponde a um alvo medido
+
+def test_main_fails_on_time_limits_and_regressions(tmp_path, monkeypatch):
+    reports = iter([_report(analyze_surf={27: 10.0}), _report(analyze_surf={27: 13.0}), _report(**{'backtest_round[numpy]': {27: 99.0}})])
+    monkeypatch.setattr(benchmark, 'run_benchmarks', lambda *args, **kwargs: next(reports))
+    baseline = tmp_path / 'base.json'
+    baseline.write_text(json.dumps(_report(analyze_surf={27: 10.0})))
+    assert benchmark.main(['--compare', str(baseline)]) == 0
+    assert benchmark.main(['--compare', str(baseline)]) == 1
+    assert benchmark.main([]) == 1 # Acima do limite absoluto, mesmo sem relatório anterior
@@ -0,0 +1,104 @@
+"""Paridade do IncrementalAnalyzer com a análise completa de update_analysis."""
+import random
+
+import pytest
+
+from hs_core import GuaranteeLedger, IncrementalAnalyzer, RESULT_TYPES, encode_history, update_analysis
+from hs_core import windows
+from hs_core.analysis import check_guarantee_status
+from hs_core.config import DEFAULT_CONFIG
+
+WEIGHTS = (45, 45, 10)
+
+def _random_results(seed, size, weights=WEIGHTS):
+    """`size` resultados sorteados com semente fixa, mais antigo primeiro."""
+    return random.Random(seed).choices(RESULT_TYPES, weights=weights, k=size)
+
+@pytest.mark.parametrize('max_history', [1000, 40, 27, 12, 3])
+@pytest.mark.parametrize('seed', range(3))
+def test_snapshot_matches_update_analysis(seed, max_history):
+    analyzer = IncrementalAnalyzer(max_history)
+    stored = [] # Histórico armazenado, mais recente primeiro
+    assert analyzer.snapshot() == update_analysis(stored)
+    for result in _random_results(seed, 160):
+        analyzer.push(result)
+        stored = ([result] + stored)[:max_history]
+        assert analyzer.snapshot() == update_analysis(stored)
+
+@pytest.mark.parametrize('weights', [(1, 0, 0), (0, 0, 1), (1, 1, 1), (1, 1, 8)])
+def test_snapshot_matches_update_analysis_on_skewed_histories(weights):
+    analyzer = IncrementalAnalyzer(50)
+    stored = []
+    for result in _random_results(7, 120, weights):
+        analyzer.push(result)
+        stored = ([result] + stored)[:50]
+        assert analyzer.snapshot() == update_analysis(stored)
+
+def test_snapshot_matches_update_analysis_with_ledger():
+    """Como em TableState.add_result: as garantias verificadas alimentam o livro consultado pelas sugestões."""
+    config = DEFAULT_CONFIG
+    analyzer = IncrementalAnalyzer(200, config)
+    ledger = GuaranteeLedger(window=10, min_trials=2, min_hit_rate=60)
+    stored = []
+    suggestion = analyzer.snapshot(ledger)['suggestion']
+    for result in _random_results(11, 400):
+        if suggestion['bet_type'] != 'none' and suggestion['confidence'] >= config.guarantee_confidence:
+            ledger.record(suggestion['guarantee_pattern'], check_guarantee_status(suggestion['bet_type'], result, suggestion['guarantee_pattern']))
+        analyzer.push(result)
+        stored = ([result] + stored)[:200]
+        snapshot = analyzer.snapshot(ledger)
+        assert snapshot == update_analysis(stored, config=config, ledger=ledger)
+        suggestion = snapshot['suggestion']
+
+@pytest.mark.parametrize('weights', [WEIGHTS, (1, 1, 1), (1, 1, 8), (1, 0, 0)])
+@pytest.mark.parametrize('max_history', [1000, 30])
+def test_suggestion_matches_snapshot(weights, max_history):
+    """O caminho do backtest devolve a mesma sugestão do snapshot, com e sem o livro de garantias."""
+    config = DEFAULT_CONFIG
+    analyzer = IncrementalAnalyzer(max_history, config)
+    ledger = GuaranteeLedger(window=10, min_trials=2, min_hit_rate=60)
+    assert analyzer.suggestion() == analyzer.snapshot()['suggestion']
+    for result in _random_results(5, 600, weights):
+        suggestion = analyzer.suggestion(ledger)
+        assert suggestion == analyzer.snapshot(ledger)['suggestion']
+        assert analyzer.suggestion() == analyzer.snapshot()['suggestion']
+        if suggestion['bet_type'] != 'none':
+            ledger.record(suggestion['guarantee_pattern'], check_guarantee_status(suggestion['bet_type'], result, suggestion['guarantee_pattern']))
+        analyzer.push(result)
+
+@pytest.mark.parametrize('size', [0, 1, 26, 27, 28, 500])
+@pytest.mark.parametrize('max_history', [1000, 100])
+def test_from_codes_matches_push(size, max_history):
+    results = _random_results(size, size)
+    pushed = IncrementalAnalyzer(max_history)
+    for result in results:
+        pushed.push(result)
+    loaded = IncrementalAnalyzer.from_codes(encode_history(results[::-1]), max_history)
+    assert loaded.snapshot() == pushed.snapshot()
+    assert loaded.window_stats() == pushed.window_stats()
+
+@pytest.mark.parametrize('max_history', [1000, 40, 12, 3])
+def test_pop_and_replace_match_update_analysis(max_history, monkeypatch):
+    """Desfazer acréscimos (devolvendo o resultado descartado) e trocar resultados antigos, como em TableState."""
+    monkeypatch.setattr(windows, 'SPARE_ROWS', 4) # O anel das janelas se esgota e é remontado
+    rng = random.Random(max_history)
+    analyzer = IncrementalAnalyzer(max_history)
+    stored, steps = [], []
+    for _ in range(500):
+        action = rng.random()
+        if steps and action < 0.3:
+            dropped = steps.pop()
+            assert analyzer.pop(dropped and RESULT_TYPES.index(dropped)) == stored.pop(0)
+            if dropped is not None:
+                stored.append(dropped)
+        elif stored and action < 0.4:
+            index = rng.randrange(len(stored))
+            stored[index] = rng.choice(RESULT_TYPES)
+            analyzer.replace(index, stored[index])
+        else:
+            result = rng.choices(RESULT_TYPES, weights=WEIGHTS)[0]
+            analyzer.push(result)
+            stored.insert(0, result)
+            steps.append(stored.pop() if len(stored) > max_history else None)
+        assert analyzer.snapshot() == update_analysis(stored)
+        assert analyzer.window_stats() == IncrementalAnalyzer.from_codes(encode_history(stored), max_history).window_stats()
@@ -0,0 +1,74 @@
+"""
+SnapshotExporter: rodadas cuja gravação falha voltam para a fila, na ordem, e são gravadas depois; uma
+partição Parquet lida de volta tem as colunas e os tipos de ROUND_SCHEMA e as rodadas na ordem registrada.
+"""
+import csv
+
+import pytest
+
+from hs_core import IncrementalAnalyzer
+from hs_core.export import ROUND_COLUMNS, ROUND_SCHEMA, SnapshotExporter
+
+PREVIOUS = ('none', 0, 'N/A')
+
+@pytest.fixture
+def exporter(tmp_path):
+    exporter = SnapshotExporter(str(tmp_path), format='csv', flush_interval=3600)
+    yield exporter
+    exporter.close()
+
+def _rounds(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [int(row['round']) for row in csv.DictReader(f)]
+
+def test_failed_partition_is_requeued(exporter, tmp_path, monkeypatch):
+    for round_number in range(6):
+        exporter.record('mesa1' if round_number % 2 else 'mesa2', round_number, 'home', PREVIOUS, None, False, None)
+    write = exporter._write
+
+    def failing_write(directory, records):
+        if 'table=mesa1' in directory:
+            raise OSError("disco cheio")
+        write(directory, records)
+    monkeypatch.setattr(exporter, '_write', failing_write)
+    with pytest.raises(OSError):
+        exporter.flush()
+    assert [entry[1] for entry in exporter._pending] == [1, 3, 5]
+
+    monkeypatch.setattr(exporter, '_write', write)
+    assert exporter.flush() == 3
+    assert exporter.pending == 0
+    assert exporter.stats['written'] == 6
+    (mesa1,) = tmp_path.glob('table=mesa1/date=*/rounds.csv')
+    (mesa2,) = tmp_path.glob('table=mesa2/date=*/rounds.csv')
+    assert _rounds(mesa1) == [1, 3, 5]
+    assert _rounds(mesa2) == [0, 2, 4]
+
+def test_parquet_partition_round_trips_the_schema(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    parquet = pytest.importorskip('pyarrow.parquet')
+    exporter = SnapshotExporter(str(tmp_path), format='parquet', flush_interval=3600)
+    analyzer = IncrementalAnalyzer(100)
+    previous = PREVIOUS
+    for round_number, result in enumerate(['home', 'away', 'draw', 'home', 'home'] * 4):
+        analyzer.push(result)
+        analysis = analyzer.snapshot() if round_number % 3 else None # Rodadas de um lote não têm análise
+        exporter.record('mesa', round_number, result, previous, None if previous[0] == 'none' else previous[0] == result,
+                        False, analysis)
+        if analysis is not None:
+            suggestion = analysis['suggestion']
+            previous = (suggestion['bet_type'], suggestion['confidence'], suggestion['guarantee_pattern'])
+    assert exporter.flush() == 20
+    exporter.close()
+
+    (path,) = tmp_path.glob('table=mesa/date=*/part-*.parquet')
+    table = parquet.read_table(path)
+    types = {'timestamp': pa.timestamp('ms', tz='UTC'), 'str': pa.string(), 'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_()}
+    assert [(field.name, field.type) for field in table.schema] == [(name, types[kind]) for name, kind in ROUND_SCHEMA]
+    rows = table.to_pylist()
+    assert [row['round'] for row in rows] == list(range(20))
+    assert [row['result'] for row in rows] == ['home', 'away', 'draw', 'home', 'home'] * 4
+    assert all((row['confidence'] is None) == (row['round'] % 3 == 0) for row in rows)
+    assert list(rows[0]) == list(ROUND_COLUMNS)
+    last = analyzer.snapshot() # Análise da última rodada (19), registrada com ela
+    assert (rows[-1]['color_pattern_27'], rows[-1]['bet_type']) == (last['color_analysis']['color_pattern_27'], last['suggestion']['bet_type'])
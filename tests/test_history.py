@@ -0,0 +1,96 @@
+"""ResultHistory: equivalência com a lista original (insert(0, ...) + limite), validação da capacidade e memória por resultado."""
+import itertools
+import random
+import tracemalloc
+
+import pytest
+
+from hs_core import RESULT_TYPES, ResultHistory, RunLengthEncoding, encode_history
+from hs_core import runs
+
+@pytest.mark.parametrize('capacity', [1, 2, 27, 100])
+def test_append_matches_list(capacity):
+    history, expected = ResultHistory(capacity), []
+    for result in random.Random(capacity).choices(RESULT_TYPES, k=250):
+        history.append(result)
+        expected = ([result] + expected)[:capacity]
+        assert history == expected
+        assert history[:27] == expected[:27]
+        assert history.count('draw') == expected.count('draw')
+    assert ResultHistory.from_codes(encode_history(expected), capacity) == expected
+
+def test_pop_restores_previous_history():
+    history = ResultHistory(5, ['home', 'away', 'draw', 'home', 'away'])
+    dropped = encode_history(history)[0] # O mais antigo, descartado pelo próximo acréscimo
+    history.append('draw')
+    assert history.pop(dropped) == 'draw'
+    assert history == ['home', 'away', 'draw', 'home', 'away']
+    assert history.runs.max_run(0) == 1
+
+def test_runs_follow_pop_and_replace():
+    """As sequências e seus máximos acompanham desfazer e corrigir sem serem refeitas do histórico."""
+    rng = random.Random(4)
+    history, steps = ResultHistory(40), []
+    for _ in range(400):
+        action = rng.random()
+        if steps and action < 0.3:
+            history.pop(steps.pop())
+        elif len(history) and action < 0.5:
+            history.replace(rng.randrange(len(history)), rng.choice(RESULT_TYPES))
+        else:
+            steps.append(encode_history(history)[0] if len(history) == history.capacity else None)
+            history.append(rng.choices(RESULT_TYPES, weights=(45, 45, 10))[0])
+        expected = [[code, len(list(group))] for code, group in itertools.groupby(encode_history(history))]
+        assert list(map(list, history.runs)) == expected
+        assert [history.runs.max_run(code) for code in range(3)] == [max((size for value, size in expected if value == code), default=0) for code in range(3)]
+
+@pytest.mark.parametrize('backend', ['numpy', 'python'])
+def test_runs_from_codes_match_pushes(backend, monkeypatch):
+    if backend == 'python':
+        monkeypatch.setattr(runs, 'optional_numpy', lambda: None)
+    else:
+        pytest.importorskip('numpy')
+    codes = bytes(random.Random(7).choices((0, 1, 2), weights=(45, 45, 10), k=500)) + bytes(40) # Termina com uma sequência longa
+    pushed = RunLengthEncoding()
+    for code in codes:
+        pushed.push(code)
+    loaded = RunLengthEncoding.from_codes(codes)
+    assert list(loaded) == list(pushed) == [(code, len(list(group))) for code, group in itertools.groupby(codes)]
+    assert (loaded.maxima, loaded.sizes) == (pushed.maxima, pushed.sizes) and loaded.length == pushed.length == len(codes)
+
+@pytest.mark.parametrize('backend', ['numpy', 'python'])
+def test_runs_widen_for_long_sequences(backend, monkeypatch):
+    if backend == 'python':
+        monkeypatch.setattr(runs, 'optional_numpy', lambda: None)
+    else:
+        pytest.importorskip('numpy')
+    codes = bytes([1, 2]) + bytes(runs.WIDE_RUN + 5) + bytes([1])
+    assert RunLengthEncoding.from_codes(codes[:-10]).runs.typecode == 'H'
+    loaded = RunLengthEncoding.from_codes(codes)
+    assert loaded.runs.typecode == 'I' and list(loaded) == [(1, 1), (2, 1), (0, runs.WIDE_RUN + 5), (1, 1)]
+    history = ResultHistory(len(codes) + 10)
+    for code in codes:
+        history.append(RESULT_TYPES[code])
+    history.replace(1, 'draw') # Divide a sequência longa
+    assert history.runs.runs.typecode == 'I' and list(history.runs) == [(1, 1), (2, 1), (0, runs.WIDE_RUN + 4), (2, 1), (1, 1)]
+    assert history.runs.max_run(0) == runs.WIDE_RUN + 4
+
+def test_history_memory_stays_near_one_byte_per_result():
+    """Um byte por resultado no anel, mais as sequências (2 bytes cada, ~1,7 resultado por sequência), contra 8 bytes por resultado da lista original."""
+    capacity = 50_000
+    results = random.Random(9).choices(RESULT_TYPES, weights=(45, 45, 10), k=2 * capacity)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    history = ResultHistory(capacity)
+    for result in results:
+        history.append(result)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert used < 3 * capacity and history.runs.runs.itemsize == 2
+
+@pytest.mark.parametrize('capacity', [0, -1])
+def test_capacity_must_be_positive(capacity):
+    with pytest.raises(ValueError):
+        ResultHistory(capacity)
+    with pytest.raises(ValueError):
+        ResultHistory.from_codes(b'', capacity)
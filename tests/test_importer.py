@@ -0,0 +1,17 @@
+"""Importação em lote: formatos aceitos e erro de coluna ausente no CSV."""
+import pytest
+
+from hs_core.importer import ImportFormatError, parse_results
+
+def _codes(source, **options):
+    return b''.join(parse_results(source, **options))
+
+def test_parses_words_letters_and_csv_columns():
+    assert _codes("home, away; empate\nRBY") == bytes([0, 1, 2, 0, 1, 2])
+    assert _codes("RBY", newest_first=True) == bytes([2, 1, 0])
+    assert _codes("data,resultado\n2024-01-01,casa\n2024-01-02, visitante\n", column='resultado') == bytes([0, 1])
+    assert _codes("2024-01-01,casa\n2024-01-02,empate\n", column=1) == bytes([0, 2])
+
+def test_missing_csv_column_names_available_headers():
+    with pytest.raises(ImportFormatError, match="'resultado'.*'data', 'rodada'"):
+        _codes("data,rodada\n2024-01-01,casa\n", column='resultado')
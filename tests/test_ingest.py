@@ -0,0 +1,107 @@
+"""
+Ingestão: lotes que falham são aplicados de novo, sem duplicar resultados, e a mesa recusa eventos enquanto
+isso; uma mesa que não abre recusa os eventos com erro.
+"""
+import asyncio
+
+import pytest
+
+from hs_core.ingest import IngestError, IngestService, TableUnavailable, parse_events
+from hs_core.tables import TableRegistry
+
+class FlakyStore:
+    """Envolve um armazenamento e faz as primeiras `failures` gravações em lote falharem."""
+
+    def __init__(self, store, failures):
+        self.store = store
+        self.failures = failures
+
+    def append_codes(self, codes):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disco cheio")
+        self.store.append_codes(codes)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+async def _ingest(service, table, codes, failures):
+    table.store = FlakyStore(table.store, failures)
+    assert await service.submit('mesa', codes) == len(codes)
+    await asyncio.sleep(0.02) # O consumidor pega o lote e falha na primeira tentativa
+    rejected = await service.submit('mesa', b'\x00')
+    while not (service.stats['batches'] or service.stats['dropped']): # Lote aplicado ou descartado
+        await asyncio.sleep(0.01)
+    return rejected
+
+@pytest.fixture
+def registry():
+    registry = TableRegistry(backend='memory')
+    yield registry
+    registry.close()
+
+def test_failed_batch_is_retried_without_duplicates(registry):
+    table = registry.get('mesa')
+    service = IngestService(registry, retry_delay=0.05)
+    rejected = asyncio.run(_ingest(service, table, bytes([0, 1, 2, 1]), failures=2))
+    assert rejected == 0 # Enquanto o lote falha, nenhum evento novo recebe 202
+    assert list(table.results) == ['away', 'draw', 'away', 'home']
+    assert service.stats['errors'] == 2 and service.stats['dropped'] == 0 and service.stats['applied'] == 4
+
+def test_batch_is_dropped_after_retries(registry, caplog):
+    table = registry.get('mesa')
+    service = IngestService(registry, retries=1, retry_delay=0.05)
+    asyncio.run(_ingest(service, table, bytes([0, 1]), failures=5))
+    assert not table.results
+    assert service.stats['dropped'] == 2 and service.stats['errors'] == 2
+    assert "descartado" in caplog.text
+
+def test_table_that_fails_to_open_rejects_events(registry, monkeypatch, caplog):
+    open_table = registry._open
+    def locked(table_id):
+        raise OSError("histórico travado por outro processo")
+    monkeypatch.setattr(registry, '_open', locked)
+    service = IngestService(registry)
+
+    async def scenario():
+        status, reply = await service._route('POST', '/events', b'[{"table": "mesa", "result": "home"}, {"table": "mesa", "result": "R"}]')
+        assert status == 503 and reply['accepted'] == 0 and reply['rejected'] == 2 and 'travado' in reply['error']
+        with pytest.raises(TableUnavailable):
+            await service.submit('mesa', b'\x00')
+        monkeypatch.setattr(registry, '_open', open_table) # A trava foi liberada: o próximo envio abre a mesa
+        assert await service.submit('mesa', bytes([1, 2])) == 2
+        while not service.stats['batches']:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert list(registry.get('mesa').results) == ['draw', 'away']
+    assert service.stats['rejected'] == 3 and service.stats['errors'] == 2 and not service.stats['dropped']
+    assert "falha ao abrir" in caplog.text
+
+def test_parse_events_rejects_invalid_events():
+    assert parse_events([{'table': 'm 1', 'result': 'RBY'}]) == {'m_1': bytes([0, 1, 2])}
+    with pytest.raises(IngestError):
+        parse_events([{'table': 'm1', 'result': 'talvez'}])
+
+def test_reading_an_unknown_table_does_not_create_it(tmp_path):
+    registry = TableRegistry(backend='log', directory=str(tmp_path))
+    registry.get('gravada').add_result('home')
+    service = IngestService(registry)
+    try:
+        status, reply = asyncio.run(service._route('GET', '/tables/nenhuma', b''))
+        assert status == 404 and 'nenhuma' in reply['error']
+        assert registry.table_ids() == ['gravada'] and not list(tmp_path.glob('nenhuma*'))
+        status, reply = asyncio.run(service._route('GET', '/tables/gravada', b''))
+        assert status == 200 and reply['results'] == 1
+    finally:
+        for table in registry.tables():
+            table.close()
+        registry.close()
+    reopened = TableRegistry(backend='log', directory=str(tmp_path)) # Gravada mas ainda não aberta
+    try:
+        status, reply = asyncio.run(IngestService(reopened)._route('GET', '/tables/gravada', b''))
+        assert status == 200 and reply['results'] == 1
+    finally:
+        for table in reopened.tables():
+            table.close()
+        reopened.close()
@@ -0,0 +1,63 @@
+"""GuaranteeLedger: janela móvel por padrão, entrada e saída do conjunto em falha e peso reduzido na sugestão."""
+from hs_core import GuaranteeLedger, PatternKey, generate_advanced_suggestion
+from hs_core.config import DEFAULT_CONFIG
+
+def test_rolling_window_evicts_the_oldest_outcome():
+    ledger = GuaranteeLedger(window=4, min_trials=2, min_hit_rate=50)
+    for hit in (1, 1, 0, 0, 0): # O primeiro acerto sai da janela no quinto registro
+        ledger.record('A', hit)
+    assert ledger.hit_rate('A') == 25 and ledger.hit_rate('A', rolling=False) == 40
+    row, = ledger.rows()
+    assert (row['trials'], row['hits'], row['window_trials']) == (5, 2, 4)
+    assert (row['failure_streak'], row['max_failure_streak']) == (3, 3)
+    for _ in range(4):
+        ledger.record('A', 0)
+    assert ledger.hit_rate('A') == 0 and ledger.hit_rate('A', rolling=False) == round(2 / 9 * 100, 2)
+
+def test_patterns_enter_and_leave_the_failing_set():
+    ledger = GuaranteeLedger(window=4, min_trials=3, min_hit_rate=50)
+    ledger.record('A | B', 0)
+    ledger.record('A | B', 0)
+    assert not ledger.failing # Menos de `min_trials` registros na janela
+    ledger.record('A', 0)
+    assert ledger.failing == {'A'} and ledger.is_failing('A') and not ledger.is_failing('B')
+    ledger.record('B', 1)
+    assert ledger.failing == {'A', 'B'} # B: 1 acerto em 3 (33%)
+    ledger.record('B', 1)
+    assert ledger.failing == {'A'} # B: 2 em 4, a taxa mínima não é estrita
+    for _ in range(3): # A: 3 acertos nos 4 últimos
+        ledger.record('A', 1)
+    assert not ledger.failing and ledger.hit_rate('A') == 75
+    for _ in range(2): # B: cada erro novo tira um erro antigo da janela, segue 2 em 4
+        ledger.record('B', 0)
+    assert not ledger.failing
+    ledger.record('B', 0) # B: agora sai um acerto, 1 em 4
+    assert ledger.failing == {'B'}
+    assert ledger.rounds == 11 and len(ledger) == 2
+
+def test_copy_is_independent():
+    ledger = GuaranteeLedger(window=3, min_trials=1, min_hit_rate=50)
+    ledger.record('A', 0)
+    copy = ledger.copy()
+    copy.record('A', 1)
+    copy.record('A', 1)
+    assert copy.failing == set() and ledger.failing == {'A'} and ledger.rows()[0]['trials'] == 1
+
+def test_failing_pattern_scores_ledger_penalty_of_its_weight():
+    # Sequência de 3 Vermelhos que iguala o máximo histórico: a regra Surf Max aposta em Azul com peso 150
+    results = ['home'] * 3 + ['away'] * 6
+    surf = {'max_home_sequence': 3, 'max_away_sequence': 6, 'max_draw_sequence': 0}
+    draws = {'time_since_last_draw': -1, 'draw_frequency_27': 0, 'draw_patterns': {}, 'recurrent_draw': False}
+
+    def suggest(ledger):
+        return generate_advanced_suggestion(results, surf, {'streak': 3}, {}, {'break_chance': 0}, draws, DEFAULT_CONFIG, ledger=ledger)
+
+    ledger = GuaranteeLedger.from_config(DEFAULT_CONFIG)
+    assert suggest(ledger) == suggest(None)
+    assert suggest(None)['confidence'] == 100 and suggest(None)['guarantee_pattern'] == 'Surf Max Quebra: Red'
+    for _ in range(DEFAULT_CONFIG.ledger_min_trials):
+        ledger.record('Surf Max Quebra: Red', 0)
+    suggestion = suggest(ledger)
+    assert suggestion['bet_type'] == 'away'
+    assert suggestion['confidence'] == DEFAULT_CONFIG.weight_surf_max * DEFAULT_CONFIG.ledger_penalty // 100
+    assert ledger.is_failing(PatternKey('2x1', ('red', 'blue'))) is False # Chaves estruturadas usam o rótulo em texto
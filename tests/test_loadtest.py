@@ -0,0 +1,21 @@
+"""Teste de carga: um nível curto com uma sessão, para que as chaves dos botões do app não se desencontrem de RESULT_BUTTONS."""
+import pytest
+
+pytest.importorskip('streamlit')
+
+from hs_core import loadtest
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # Históricos das mesas de carga no diretório temporário
+
+def test_app_has_every_result_button():
+    session = loadtest._open_session(loadtest.APP_SCRIPT, 'carga-botoes')
+    assert not session.exception
+    for key in loadtest.RESULT_BUTTONS:
+        session.button(key=key) # KeyError se o app renomear o botão
+
+def test_single_session_level_runs_without_errors():
+    level = loadtest.run_level(1, rate=5, duration=1)
+    assert (level['sessions'], level['errors']) == (1, 0)
+    assert level['reruns'] > 0 and level['latency']['max_ms'] > 0
@@ -0,0 +1,78 @@
+"""Linguagem de padrões: erros de sintaxe com a linha, famílias repetidas, nomes por conjunto e contagem do autômato."""
+import collections
+import random
+
+import pytest
+
+from hs_core import PatternKey, PatternSet, PatternSyntaxError, parse_patterns
+from hs_core import patterns
+
+SOURCE = """\
+# Comentário
+[quebras]
+@2x1 2x1 ({X} para {Y}) := X X Y ; X != Y
+@bloco Bloco ({X} {Y}) := ^ X{2} Y{2} ; X != Y ; len < 8
+
+[empates]
+Empate após {X} := X yellow ; X != yellow
+"""
+
+def test_parses_sections_families_and_anchors():
+    groups = parse_patterns(SOURCE)
+    assert list(groups) == ['quebras', 'empates']
+    two_one, block = groups['quebras']
+    assert (two_one.family, two_one.elements, two_one.anchored) == ('2x1', ('X', 'X', 'Y'), False)
+    assert block.anchored and block.elements == ('X', 'X', 'Y', 'Y') and block.length_guard[1] == 8
+    draw, = groups['empates']
+    assert draw.family == 'Empate após {X}' and draw.label == ('Empate após {X}', ('X',)) # Sem @, o nome é a família
+
+@pytest.mark.parametrize('line, message', [
+    ("2x1 := X X Y", "fora de uma seção"),
+    ("[s]\n2x1 X X Y", "esperado '<nome> := <sequência>'"),
+    ("[s]\n := X Y", "esperado '<nome> := <sequência>'"),
+    ("[s]\nA := X green", "elemento inválido 'green'"),
+    ("[s]\nA := ^", "sequência vazia"),
+    ("[s]\nA := X Y ; X <> Y", "restrição inválida"),
+    ("[s]\nA := X Y ; X != Z", "'Z' não é variável"),
+    ("[s]\nA := X Y ; len < 3", "só valem para padrões ancorados"),
+    ("[s]\nA {Z} := X Y", "nome com campo inválido"),
+])
+def test_malformed_lines_raise_with_source_and_line(line, message):
+    with pytest.raises(PatternSyntaxError, match=message) as error:
+        parse_patterns("# cabeçalho\n\n" + line, 'meus.txt')
+    assert str(error.value).startswith(f"meus.txt, linha {2 + line.count(chr(10)) + 1}:")
+
+def test_family_must_keep_its_name_and_variables():
+    parse_patterns("[a]\n@f F ({X}) := X X\n[b]\n@f F ({X}) := X yellow") # Mesma família em outra seção
+    with pytest.raises(PatternSyntaxError, match=r"linha 4: família 'f' já definida"):
+        parse_patterns("[a]\n@f F ({X}) := X X\n[b]\n@f Outro ({X}) := X yellow")
+    with pytest.raises(PatternSyntaxError, match=r"linha 3: família 'f' já definida"):
+        parse_patterns("[a]\n@f F := X Y ; X != Y\n@f F := X X")
+
+def test_labels_belong_to_the_pattern_set(monkeypatch):
+    labels = dict(patterns.PATTERN_LABELS)
+    groups = parse_patterns("[a]\n@2x1 Outro nome ({X}) := X X\n@novo Novo ({X}) := X Y ; X != Y")
+    assert patterns.PATTERN_LABELS == labels # Interpretar não altera os nomes do arquivo carregado
+    pattern_set = PatternSet(groups['a'])
+    assert pattern_set.labels == {'2x1': ('Outro nome ({X})', ('X',)), 'novo': ('Novo ({X})', ('X', 'Y'))}
+    assert pattern_set.format(PatternKey('novo', ('red', 'blue'))) == 'Novo (Red)'
+    assert str(PatternKey('2x1', ('red', 'blue'))) == '2x1 (Red para Blue)'
+
+def _naive_count(rules, codes):
+    """Contagem direta: cada padrão expandido comparado em cada posição (os ancorados só no início)."""
+    totals = collections.Counter()
+    for rule in rules:
+        for expanded, key in rule.expand():
+            if rule.anchored:
+                guard = rule.length_guard
+                if tuple(codes[:len(expanded)]) == expanded and (guard is None or guard[0](len(codes), guard[1])):
+                    totals[key] += 1
+                continue
+            totals[key] += sum(tuple(codes[i:i + len(expanded)]) == expanded for i in range(len(codes) - len(expanded) + 1))
+    return {key: count for key, count in totals.items() if count}
+
+@pytest.mark.parametrize('size', [0, 1, 5, 7, 27, 60])
+def test_automaton_counts_match_naive_scan(size):
+    rules = parse_patterns(SOURCE)['quebras']
+    codes = random.Random(size).choices((0, 1, 2), weights=(45, 45, 10), k=size)
+    assert PatternSet(rules).count(codes) == _naive_count(rules, codes)
@@ -0,0 +1,34 @@
+"""Simulação de Monte Carlo: mesma semente, mesmo relatório com qualquer número de processos; erro claro sem NumPy."""
+import importlib
+import sys
+
+import pytest
+
+import hs_core
+
+def test_same_seed_gives_same_report_for_any_worker_count():
+    simulation = pytest.importorskip('hs_core.simulation') # Requer NumPy
+    report = simulation.run_simulation(1200, seed=3, streams=5, workers=1, max_history=200)
+    assert report['rounds'] == 1200 and report['suggestions'] > 0
+    for workers in (2, 3):
+        assert simulation.run_simulation(1200, seed=3, streams=5, workers=workers, max_history=200) == report
+    assert simulation.run_simulation(1200, seed=4, streams=5, workers=1, max_history=200) != report
+
+def test_same_seed_with_ledger_gives_same_report_for_any_worker_count():
+    simulation = pytest.importorskip('hs_core.simulation')
+    report = simulation.run_simulation(900, seed=5, streams=3, workers=1, max_history=200, ledger=True)
+    assert simulation.run_simulation(900, seed=5, streams=3, workers=2, max_history=200, ledger=True) == report
+
+def test_rejects_invalid_probabilities():
+    simulation = pytest.importorskip('hs_core.simulation')
+    with pytest.raises(ValueError, match="três probabilidades"):
+        simulation.run_simulation(10, probabilities=(0.5, 0.5), workers=1)
+
+def test_missing_numpy_raises_clear_error(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'numpy', None) # Importar numpy passa a falhar
+    monkeypatch.delitem(sys.modules, 'hs_core.simulation', raising=False)
+    monkeypatch.delitem(vars(hs_core), 'run_simulation', raising=False)
+    with pytest.raises(ImportError, match="A simulação de Monte Carlo requer a biblioteca NumPy instalada."):
+        importlib.import_module('hs_core.simulation')
+    with pytest.raises(ImportError, match="requer a biblioteca NumPy"):
+        hs_core.run_simulation # Também pelo atributo preguiçoso do pacote
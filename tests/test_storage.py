@@ -0,0 +1,72 @@
+"""Armazenamentos do histórico: o log binário guarda tudo, tem um único escritor e confirma os lotes sozinho."""
+import random
+import time
+
+import pytest
+
+from hs_core.storage import BinaryLogHistoryStore, open_history_store
+
+def _results(size):
+    return ['home', 'away', 'draw', 'away'] * (size // 4)
+
+def test_log_keeps_whole_history(tmp_path):
+    store = BinaryLogHistoryStore(str(tmp_path / 'mesa.log'))
+    store.append_codes(bytes([0, 1, 2, 1]) * 1000)
+    assert len(store.load(10)) == 10
+    store.close()
+    assert (tmp_path / 'mesa.log').stat().st_size == 4000 # A carga não descarta o histórico gravado
+
+def test_log_retention_is_explicit(tmp_path):
+    store = BinaryLogHistoryStore(str(tmp_path / 'mesa.log'), retention=100)
+    store.append_codes(bytes([0, 1, 2, 1]) * 1000)
+    assert store.load(10) == (bytes([0, 1, 2, 1]) * 1000)[-10:]
+    assert (tmp_path / 'mesa.log').stat().st_size == 100
+    assert store.load(500) == (bytes([0, 1, 2, 1]) * 1000)[-100:] # Menor que o dobro da retenção: não reescreve
+    store.close()
+
+def test_log_has_a_single_writer(tmp_path):
+    store = open_history_store('mesa', 'log', str(tmp_path))
+    with pytest.raises(RuntimeError):
+        open_history_store('mesa', 'log', str(tmp_path))
+    store.close()
+    open_history_store('mesa', 'log', str(tmp_path)).close() # Fechado, o log pode ser aberto de novo
+
+def test_log_fsyncs_pending_results_without_new_appends(tmp_path):
+    store = BinaryLogHistoryStore(str(tmp_path / 'mesa.log'), fsync_every=1000, fsync_interval=0.05)
+    for result in _results(8):
+        store.append(result)
+    assert store._pending == 8
+    time.sleep(0.3)
+    assert store._pending == 0
+    store.close()
+
+@pytest.mark.parametrize('backend', ['log', 'sqlite'])
+def test_truncate_and_replace(tmp_path, backend):
+    store = open_history_store('mesa', backend, str(tmp_path))
+    for result in _results(8):
+        store.append(result)
+    store.truncate(2)
+    store.replace(0, 'home')
+    assert store.load(100) == bytes([0, 1, 2, 1, 0, 0])
+    store.close()
+
+def test_sqlite_load_reads_the_newest_codes_in_one_query(tmp_path):
+    store = open_history_store('mesa', 'sqlite', str(tmp_path))
+    store.append_codes(bytes([0, 1, 2, 1]) * 100)
+    store.append_codes(bytes([7, 2])) # Código inválido gravado por fora: ignorado na carga
+    open_history_store('outra', 'sqlite', str(tmp_path)).append_codes(bytes([2]) * 10)
+    assert store.load(6) == bytes([0, 1, 2, 1, 2]) # As 6 últimas linhas, menos a inválida
+    assert store.load(1000) == bytes([0, 1, 2, 1]) * 100 + bytes([2])
+    store.close()
+
+def test_sqlite_load_follows_seq_order_after_out_of_order_inserts(tmp_path):
+    codes = bytes(random.Random(3).choices((0, 1, 2), k=500))
+    store = open_history_store('mesa', 'sqlite', str(tmp_path))
+    rows = [('mesa', seq, code) for seq, code in enumerate(codes)]
+    random.Random(4).shuffle(rows) # Linhas gravadas fora da ordem de seq
+    with store._conn:
+        store._conn.executemany("INSERT INTO results (table_id, seq, code) VALUES (?, ?, ?)", rows)
+    store._conn.execute("VACUUM")
+    assert store.load(1000) == codes
+    assert store.load(50) == codes[-50:]
+    store.close()
@@ -0,0 +1,73 @@
+"""
+SuffixIndex: equivalência com a varredura de analyze_history_matches ao acrescentar, descartar, desfazer
+e corrigir resultados do histórico que o autômato acompanha, inclusive depois de remontá-lo.
+"""
+import random
+
+import pytest
+
+from hs_core import RESULT_TYPES, ResultHistory, analyze_history_matches, encode_history
+from hs_core import suffix_index
+from hs_core.suffix_index import SuffixIndex
+
+def _expected(history, max_context):
+    return analyze_history_matches(list(history), max_context)
+
+@pytest.fixture(autouse=True)
+def frequent_rebuilds(monkeypatch):
+    monkeypatch.setattr(suffix_index, 'REBUILD_MIN', 16) # Remonta o autômato com frequência
+
+def _random_code(rng):
+    return rng.choices((0, 1, 2), weights=(45, 45, 10))[0]
+
+@pytest.mark.parametrize('size', [0, 1, 2, 70, 500])
+def test_built_from_history_matches_scan(size):
+    history = ResultHistory.from_codes(bytes(random.Random(size).choices((0, 1, 2), weights=(45, 45, 10), k=size)), 1000)
+    assert SuffixIndex(history, 8).matches() == _expected(history, 8)
+
+@pytest.mark.parametrize('capacity', [1, 5, 40, 120])
+def test_push_drop_pop_and_replace_match_scan(capacity):
+    rng = random.Random(capacity)
+    history = ResultHistory(capacity)
+    index, steps = SuffixIndex(history, 8), []
+    for _ in range(600):
+        action = rng.random()
+        if steps and action < 0.25: # Desfaz o último acréscimo (e o descarte que ele provocou)
+            history.pop(steps.pop())
+            index.invalidate()
+        elif history and action < 0.3:
+            history.replace(rng.randrange(len(history)), RESULT_TYPES[_random_code(rng)])
+            index.invalidate()
+            steps.clear()
+        else:
+            steps.append(encode_history(history)[0] if len(history) == capacity else None)
+            code = _random_code(rng)
+            history.append(RESULT_TYPES[code])
+            index.push(code)
+        assert index.matches() == _expected(history, 8)
+
+@pytest.mark.parametrize('sequence', ['repetida', 'alternada'])
+def test_long_repeated_contexts_match_scan(sequence):
+    """Contextos repetidos maiores que a zona das primeiras posições e o limite de 27 resultados."""
+    history = ResultHistory(200)
+    index = SuffixIndex(history, 27)
+    for position in range(700):
+        code = (2 if position % 61 == 0 else 0) if sequence == 'repetida' else position % 2
+        history.append(RESULT_TYPES[code])
+        index.push(code)
+        if position % 5 == 0:
+            assert index.matches() == _expected(history, 27)
+
+def test_limits_keep_the_rows_of_the_scan():
+    rng = random.Random(3)
+    history = ResultHistory(300)
+    index = SuffixIndex(history, 12)
+    for _ in range(900):
+        code = rng.choices((0, 1, 2), weights=(60, 35, 5))[0]
+        history.append(RESULT_TYPES[code])
+        index.push(code)
+        rows = _expected(history, 12)['by_length']
+        for min_occurrences, min_length in ((1, 1), (4, 3), (8, 6)):
+            kept = [row for row in rows if row['length'] >= min_length]
+            kept = kept[:next((i for i, row in enumerate(kept) if row['occurrences'] < min_occurrences), len(kept))]
+            assert index.matches(min_occurrences, min_length)['by_length'] == kept
@@ -0,0 +1,7 @@
+"""Varredura de parâmetros: sorteio de combinações distintas."""
+from hs_core.sweep import _random_configs
+
+def test_random_configs_ignore_repeated_values():
+    space = {'window': [27, 27, 54], 'markov_order': [2, 2]}
+    configs = _random_configs(space, samples=10, seed=1)
+    assert sorted((config['window'], config['markov_order']) for config in configs) == [(27, 2), (54, 2)]
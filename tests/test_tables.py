@@ -0,0 +1,134 @@
+"""TableState: registro em lote, desfazer, refazer e correção sobre o motor incremental."""
+import random
+
+import pytest
+
+from hs_core import IncrementalAnalyzer, RESULT_TYPES, encode_history, update_analysis
+from hs_core import importer
+from hs_core.storage import BinaryLogHistoryStore, MemoryHistoryStore
+from hs_core.tables import TableState
+
+def _table(capacity=1000, **options):
+    return TableState('mesa', MemoryHistoryStore(), capacity, **options)
+
+def _results(seed, size):
+    return random.Random(seed).choices(RESULT_TYPES, weights=(45, 45, 10), k=size)
+
+def test_add_results_empty_batch_is_a_no_op():
+    table = _table()
+    table.add_results(['home', 'away'])
+    version, analysis = table.version, table.analysis_data
+    assert table.add_results([]) is analysis
+    assert table.version == version and list(table.results) == ['away', 'home']
+
+def test_add_results_matches_full_analysis():
+    table = _table()
+    results = _results(1, 200)
+    table.add_results(results[:150])
+    table.add_results(results[150:])
+    assert list(table.results) == results[::-1]
+    assert table.analysis_data == update_analysis(list(table.results), ledger=table.ledger)
+
+def _ledger_state(ledger):
+    return (ledger.rounds, ledger.labels, list(ledger.trials), list(ledger.hits), ledger.failing, bytes(ledger._outcomes))
+
+def test_add_results_records_every_round_in_the_ledger():
+    """Lotes e resultados um a um registram as mesmas garantias e chegam à mesma sugestão."""
+    results = _results(4, 3000)
+    single, batched = _table(), _table(undo_depth=8)
+    for start in range(0, len(results), 50):
+        for result in results[start:start + 50]:
+            single.add_result(result)
+        batched.add_results(results[start:start + 50])
+        assert _ledger_state(batched.ledger) == _ledger_state(single.ledger)
+        assert batched.analysis_data['suggestion'] == single.analysis_data['suggestion']
+    assert single.ledger.rounds
+    for _ in range(8): # Desfazer rodadas do lote restaura o livro e a sugestão vigente de cada uma
+        single.undo()
+        batched.undo()
+        assert _ledger_state(batched.ledger) == _ledger_state(single.ledger)
+        assert batched.analysis_data == single.analysis_data and batched._tracking() == single._tracking()
+
+def test_undo_redo_and_edit_update_the_engine_in_place():
+    """O motor desfaz, refaz e corrige sem ser reconstruído e continua igual ao montado do histórico."""
+    table = _table(capacity=60, undo_depth=10)
+    rng = random.Random(3)
+    for result in _results(2, 80):
+        table.add_result(result)
+    engine = table.analyzer
+    for _ in range(150):
+        action = rng.random()
+        if action < 0.3:
+            table.undo()
+        elif action < 0.5:
+            table.redo()
+        elif action < 0.7:
+            table.edit_result(rng.randrange(len(table.results)), rng.choice(RESULT_TYPES))
+        else:
+            table.add_result(rng.choice(RESULT_TYPES))
+        assert table.analyzer is engine and table.results is engine.history # Um único histórico e uma única codificação por sequências
+        assert engine.snapshot(table.ledger) == update_analysis(list(table.results), ledger=table.ledger)
+        assert table.window_stats() == IncrementalAnalyzer.from_codes(encode_history(table.results), 60).window_stats()
+
+class FailingStore(MemoryHistoryStore):
+    """Armazenamento cujas gravações falham enquanto `failing` for verdadeiro."""
+
+    failing = False
+
+    def _write(self, *args):
+        if self.failing:
+            raise OSError("disco cheio")
+
+    append = append_codes = truncate = replace = _write
+
+def test_failed_undo_redo_and_edit_leave_the_table_unchanged():
+    store = FailingStore()
+    table = TableState('mesa', store, 1000)
+    for result in _results(4, 40):
+        table.add_result(result)
+    table.undo()
+
+    def state():
+        return (list(table.results), table.analysis_data, table.version, len(table.undo_stack), len(table.redo_stack),
+                table.analyzer.snapshot(table.ledger))
+    before = state()
+    store.failing = True
+    for action in (table.undo, table.redo, lambda: table.edit_result(30, 'draw' if table.results[30] != 'draw' else 'home')):
+        with pytest.raises(OSError):
+            action()
+        assert state() == before
+    store.failing = False
+    assert table.redo() is not None and table.analysis_data == update_analysis(list(table.results), ledger=table.ledger)
+
+class BrokenSource:
+    """Arquivo de texto que falha na decodificação depois de entregar `chunks`."""
+
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+
+    def read(self, size=-1):
+        if self.chunks:
+            return self.chunks.pop(0)
+        raise UnicodeDecodeError('utf-8', b'\xff', 0, 1, "byte inválido")
+
+def test_failed_import_keeps_the_analysis_in_sync_with_the_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, 'IMPORT_CHUNK_SIZE', 8) # Um lote gravado a cada 8 resultados
+    store = BinaryLogHistoryStore(str(tmp_path / 'mesa.log'))
+    table = TableState('mesa', store, 1000)
+    table.add_results(_results(5, 30))
+    with pytest.raises(UnicodeDecodeError):
+        table.import_results(BrokenSource('R B Y R B B R R Y B ', 'R R B B '))
+    assert store.load(1000) == encode_history(table.results) and len(table.results) > 30 # Os lotes gravados antes do erro
+    assert table.analysis_data == update_analysis(list(table.results), ledger=table.ledger)
+    table.close()
+    reopened = TableState('mesa', BinaryLogHistoryStore(str(tmp_path / 'mesa.log')), 1000)
+    assert list(reopened.results) == list(table.results)
+    reopened.close()
+
+def test_import_with_a_missing_column_leaves_the_table_unchanged():
+    table = _table()
+    table.add_results(_results(6, 30))
+    version = table.version
+    with pytest.raises(importer.ImportFormatError):
+        table.import_results('data,resultado\n2024-01-01,home\n', column='cor')
+    assert table.version == version and len(table.results) == 30
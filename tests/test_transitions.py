@@ -0,0 +1,64 @@
+"""TransitionModel: contagens iguais às recontadas do zero após acrescentar, descartar, desfazer e trocar resultados."""
+import random
+
+import pytest
+
+from hs_core import RESULT_TYPES, encode_history
+from hs_core import transitions
+from hs_core.transitions import TransitionModel
+
+def _recount(codes, order):
+    """Contagens e contexto recontados do zero (mais antigo primeiro; contexto com o mais recente na unidade)."""
+    model = TransitionModel(order) # Só para a disposição dos offsets
+    counts = [0] * model.offsets[-1]
+    for end, code in enumerate(codes):
+        context = 0
+        for j in range(min(order, end) + 1):
+            if j:
+                context += codes[end - j] * 3 ** (j - 1)
+            counts[model.offsets[j] + 3 * context + code] += 1
+    context = sum(codes[-i] * 3 ** (i - 1) for i in range(1, min(order, len(codes)) + 1))
+    return counts, context
+
+def _assert_matches(model, codes):
+    counts, context = _recount(codes, model.order)
+    relevant = 3 ** min(model.order, len(codes)) # Com menos de `order` resultados, os dígitos altos não são lidos
+    assert (list(model.counts), model.context % relevant, model.length) == (counts, context, len(codes))
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(transitions, 'optional_numpy', lambda: None)
+    return request.param
+
+@pytest.mark.parametrize('size', [0, 1, 3, 4, 63, 64, 300])
+def test_from_codes_matches_recount(backend, size):
+    codes = list(encode_history(random.Random(size).choices(RESULT_TYPES, weights=(45, 45, 10), k=size)))
+    _assert_matches(TransitionModel.from_codes(codes), codes)
+
+@pytest.mark.parametrize('order', [0, 1, 3])
+def test_updates_match_recount(order):
+    rng = random.Random(order)
+    model, codes = TransitionModel(order), []
+    for _ in range(1500):
+        operation = rng.choice(('push', 'push', 'pop', 'drop', 'push_oldest', 'replace'))
+        code = rng.choice((0, 0, 1, 1, 2))
+        if operation == 'push' or not codes and operation != 'push_oldest':
+            model.push(code)
+            codes.append(code)
+        elif operation == 'pop':
+            code = codes.pop()
+            model.pop(codes, code)
+        elif operation == 'drop':
+            model.drop(codes)
+            del codes[0]
+        elif operation == 'push_oldest':
+            codes.insert(0, code)
+            model.push_oldest(codes)
+        else:
+            position = rng.randrange(len(codes))
+            model.replace(codes, position, code)
+            codes[position] = code
+        _assert_matches(model, codes)
@@ -0,0 +1,43 @@
+"""Paridade do backend NumPy de update_analysis com os analisadores de referência em Python."""
+import random
+
+import pytest
+
+from hs_core import ANALYSIS_BACKENDS, RESULT_TYPES, ResultHistory, update_analysis
+
+pytest.importorskip('numpy')
+
+def _histories():
+    """Históricos (mais recente primeiro) de casos limite e sorteados."""
+    rng = random.Random(2024)
+    yield 'vazio', []
+    for result in RESULT_TYPES:
+        yield f'um_{result}', [result]
+    yield 'so_empates', ['draw'] * 60
+    yield 'so_casa', ['home'] * 30
+    yield 'alternado', ['home', 'away'] * 40
+    for size in (2, 8, 9, 26, 27, 28, 53, 54, 55, 200, 1000):
+        yield f'aleatorio_{size}', rng.choices(RESULT_TYPES, weights=(45, 45, 10), k=size)
+    yield 'muitos_empates', rng.choices(RESULT_TYPES, weights=(2, 2, 6), k=120)
+
+HISTORIES = dict(_histories())
+
+@pytest.mark.parametrize('name', HISTORIES)
+def test_numpy_backend_matches_python(name):
+    results = HISTORIES[name]
+    assert update_analysis(results, backend='numpy') == update_analysis(results, backend='python')
+
+@pytest.mark.parametrize('name', HISTORIES)
+@pytest.mark.parametrize('capacity', [54, 1000])
+def test_numpy_backend_matches_python_on_result_history(name, capacity):
+    results = HISTORIES[name]
+    history = ResultHistory(capacity, results)
+    expected = update_analysis(list(results[:capacity]), backend='python')
+    assert update_analysis(history, backend='numpy') == expected
+    assert update_analysis(history, backend='python') == expected
+    assert update_analysis(history[:40], backend='numpy') == update_analysis(list(results[:40]))
+
+@pytest.mark.parametrize('window', [3, 27, 54])
+def test_numpy_backend_matches_python_for_other_windows(window):
+    for results in HISTORIES.values():
+        assert ANALYSIS_BACKENDS['numpy'](results, window) == ANALYSIS_BACKENDS['python'](results, window)
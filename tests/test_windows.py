@@ -0,0 +1,93 @@
+"""WindowCounts: totais de cada janela iguais à contagem direta dos últimos w resultados, inclusive com o anel já reciclado."""
+import collections
+import random
+
+import pytest
+
+from hs_core import RESULT_TYPES, analyze_windows, find_complex_patterns
+from hs_core import windows
+from hs_core.windows import WindowCounts
+
+MAX_WINDOW = 30
+
+def _naive(codes, size):
+    """Totais da janela dos últimos `size` códigos de `codes` (mais antigo primeiro), contados um a um."""
+    recent = codes[::-1][:size] # Mais recente primeiro
+    counter = collections.Counter(recent)
+    breaks = sum(a != b for a, b in zip(recent, recent[1:]))
+    return {
+        'stats': {**{result: counter[code] for code, result in enumerate(RESULT_TYPES)}, 'total': len(recent)},
+        'break_chance': round(breaks / (len(recent) - 1) * 100, 2) if len(recent) >= 2 else 0,
+        'draw_frequency': round(counter[2] / len(recent) * 100, 2) if recent else 0,
+        'break_patterns': find_complex_patterns([RESULT_TYPES[code] for code in recent], size),
+    }
+
+def _assert_matches(counts, codes):
+    sizes = range(MAX_WINDOW + 3) # Todas as janelas, mais as maiores que `max_window`
+    expected = {size: _naive(codes, min(size, len(codes), MAX_WINDOW)) for size in sizes}
+    assert counts.query(sizes, len(codes)) == expected
+
+@pytest.fixture(autouse=True)
+def small_ring(monkeypatch):
+    monkeypatch.setattr(windows, 'SPARE_ROWS', 4) # O anel recicla as linhas a cada 35 acréscimos
+
+@pytest.mark.parametrize('size', [0, 1, 2, 29, 30, 31, 200])
+def test_from_codes_matches_naive_counts(size):
+    codes = random.Random(size).choices((0, 1, 2), weights=(45, 45, 10), k=size)
+    _assert_matches(WindowCounts.from_codes(bytes(codes), MAX_WINDOW), codes)
+
+def test_push_across_ring_wraparound_matches_naive_counts():
+    rng = random.Random(1)
+    counts, codes = WindowCounts(MAX_WINDOW), []
+    for _ in range(250): # Mais de sete voltas do anel
+        code = rng.choices((0, 1, 2), weights=(45, 45, 10))[0]
+        counts.push(code)
+        codes.append(code)
+        _assert_matches(counts, codes)
+
+@pytest.mark.parametrize('seed', range(2))
+def test_push_pop_and_replace_match_naive_counts(seed):
+    rng = random.Random(seed)
+    capacity = 50 # Histórico armazenado, como no IncrementalAnalyzer: o acréscimo descarta o mais antigo
+    counts, codes, steps = WindowCounts(MAX_WINDOW), [], []
+    for _ in range(400):
+        operation = rng.random()
+        if codes and operation < 0.15:
+            index = rng.randrange(len(codes)) # 0 = mais recente
+            codes[len(codes) - 1 - index] = rng.choice((0, 1, 2))
+            counts.replace(bytes(codes), index)
+            steps.clear()
+        elif steps and operation < 0.45: # Desfaz o último acréscimo, devolvendo o resultado descartado
+            dropped = steps.pop()
+            codes.pop()
+            if dropped is not None:
+                codes.insert(0, dropped)
+            counts.pop(bytes(codes))
+        else:
+            code = rng.choices((0, 1, 2), weights=(45, 45, 10))[0]
+            counts.push(code)
+            codes.append(code)
+            steps.append(codes.pop(0) if len(codes) > capacity else None)
+        _assert_matches(counts, codes)
+
+def test_analyze_windows_matches_naive_counts():
+    results = random.Random(5).choices(RESULT_TYPES, weights=(45, 45, 10), k=80) # Mais recente primeiro
+    codes = [RESULT_TYPES.index(result) for result in reversed(results)]
+    assert analyze_windows(results, (1, 9, 27, 80)) == {size: _naive(codes, size) for size in (1, 9, 27, 80)}
+
+def test_ring_grows_with_the_history():
+    counts = WindowCounts(1000)
+    assert counts.nbytes == counts.rowbytes == 2 * counts.width # Só C(0), sem reservar as 1000 janelas
+    counts = WindowCounts.from_codes(bytes(20), 1000)
+    assert counts.depth == 32 and counts.window(1000)['stats'] == {'home': 20, 'away': 0, 'draw': 0, 'total': 20}
+    for _ in range(2000):
+        counts.push(1)
+    assert counts.depth == counts.max_depth == 1000 + 1 + windows.SPARE_ROWS
+
+def test_sums_wrap_around_16_bits():
+    codes = random.Random(7).choices((0, 1, 2), weights=(45, 45, 10), k=70_000)
+    counts = WindowCounts(MAX_WINDOW)
+    for code in codes:
+        counts.push(code)
+    assert counts.rows.typecode == 'H' and counts.length > 0xFFFF # As somas já deram a volta em 16 bits
+    _assert_matches(counts, codes)